@@ -4,16 +4,70 @@
 SERIAL_PORT      = 'COM9'
 BAUD_RATE        = 115200
 WINDOW_SIZE      = 200  # Muestras a mostrar en la gráfica 2D
+UI_RATE_HZ       = 30   # Refrescos por segundo de las gráficas (lotes de muestras, 30-60)
 CSV_RAW_FILENAME = "datos_ejercicio_raw.csv"
 CSV_FILENAME     = "datos_ejercicio.csv"
 
 # Etiquetas posibles durante el registro
 RECORD_LABELS    = ["correcto", "incorrecto"]  # más tarde: ["error1", "error2", ...]
+# Segundos añadidos antes de pulsar "Iniciar Repetición" (el operador
+# reacciona tarde) y después de "Detener Repetición"
+PRE_ROLL_S       = 0.5
+POST_ROLL_S      = 0.0
+
+# Segmentación automática: umbral con histéresis sobre la velocidad angular
+# suavizada (parámetros de core.segmentation.RepSegmenter), un perfil por
+# ejercicio. Validar un perfil contra repeticiones segmentadas a mano con
+# `python -m core.segmentation data/datos_ejercicio.csv <perfil>`
+SEGMENTER_PROFILE  = "default"
+SEGMENTER_PROFILES = {
+    "default": {"on_threshold": 45.0, "off_threshold": 15.0, "tau": 0.05,
+                "min_active": 0.15, "min_quiet": 0.2, "min_duration": 1.0},
+}
 
 # Carpeta de datos y modelo
 DATA_FOLDER      = "./data"
 MODEL_PATH       = "./models/modelo_prototipo.joblib"
 
+# E/S de los puertos: 'auto' (selector en Linux/macOS, hilos en Windows),
+# 'selector' (un único hilo para todos los puertos) o 'threads' (un hilo por IMU)
+SENSOR_IO_MODE   = "auto"
+
+# Captura: 'thread' (en el proceso de la GUI) o 'process' (proceso aparte que
+# lee y graba; la GUI recibe las muestras por memoria compartida)
+ACQUISITION_MODE = "thread"
+
+# Grabación de CSV: fsync tras cada lote ('batch', más seguro ante cortes de
+# luz), sólo al cerrar ('close') o nunca ('never')
+RECORD_FSYNC     = "close"
+
+# Formato de grabación: 'csv' o 'binary' (.imub columnar, se carga con
+# memmap; convertir con `python -m core.recording csv2bin|bin2csv`)
+RECORD_FORMAT    = "csv"
+
+# Códec de los bloques .imub: 'raw' (columnas tal cual, lectura sin copia),
+# 'delta' (diferencias en varint, ángulos en centésimas), 'delta+zlib' o
+# 'delta+lzma' (además comprimidos; ~10-20x menos que el CSV)
+RECORD_CODEC     = "delta+zlib"
+
+# Raw particionado: cada sesión de captura en su carpeta, un fichero cada
+# RAW_PARTITION_S segundos y un manifiesto para consultas por rango
+# (core.partitions.load_range). None = un único fichero raw como antes
+RAW_PARTITION_S  = 300
+
+# Caché de features por repetición (core.feature_store): reentrenar sólo
+# calcula las repeticiones nuevas o cambiadas. None = sin caché
+FEATURE_CACHE_PATH = "./data/feature_cache.npz"
+FEATURE_CACHE_SIZE = 100000   # repeticiones guardadas como máximo (LRU)
+# Procesos para calcular features al entrenar (core.feature_pool); None o 0 =
+# todos los núcleos. Sólo compensa con muchas repeticiones nuevas: cada
+# proceso tarda en arrancar (ver test/bench_feature_pool.py)
+FEATURE_WORKERS    = 1
+# Selección de features al entrenar: 'mutual_info', 'permutation' o None
+# (todas). El modelo guarda el subconjunto y en vivo sólo se calcula ése
+FEATURE_SELECTION  = "mutual_info"
+FEATURE_SELECT_K   = 8
+
 # Configuración de sensores IMU
 # Cada entry se pasará a SensorManager
 SENSORS = [
@@ -21,4 +75,12 @@ SENSORS = [
     # Ejemplo para futuro:
     # {"id": "imu2", "port": "COM10", "baud_rate": BAUD_RATE},
     # {"id": "imu3", "port": "COM11", "baud_rate": BAUD_RATE},
+    # Reproducción de una sesión grabada (sin ESP32); speed: 1 = tiempo real,
+    # 10 = 10×, 0 = sin límite
+    # {"id": "imu1", "replay": "data/datos_ejercicio.csv", "speed": 10},
+    # Buffer de muestras por sensor (opcional): capacidad y qué hacer si se
+    # llena porque el consumidor se retrasa ('drop_oldest' por defecto,
+    # 'drop_newest' o 'block'; 'block' sólo con SENSOR_IO_MODE = "threads")
+    # {"id": "imu1", "port": SERIAL_PORT, "baud_rate": BAUD_RATE,
+    #  "queue_capacity": 4096, "overflow_policy": "drop_oldest"},
 ]
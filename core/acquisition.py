@@ -1,17 +1,29 @@
 # core/acquisition.py
 
 import os
-import csv
 import threading
-import time
-from typing import List, Dict, Any
+import numpy as np
+from typing import Dict, Any
 from PyQt5.QtCore import QObject, pyqtSignal
-from core.imu.manager import SensorManager
+from core.recording import open_writer
+from core.partitions import PartitionedWriter
+from core.catalog import RepCatalog
+from core.segment_buffer import SegmentBuffer, SegmentCapture
+from core.imu.manager import SensorManager, SensorStartupError
+from core.imu.parsing import block_to_readings
+from core.ui_batch import SampleBatcher
+from core.segmentation import RepSegmenter, segment_actions
 
 class DataRecorder:
     """
     Graba datos raw de N IMUs y, cuando se solicita, segmenta
-    repeticiones etiquetadas en un CSV aparte.
+    repeticiones etiquetadas en un fichero aparte. La escritura a disco la
+    hacen hilos escritores en lotes, fuera del hilo de adquisición; el
+    formato (CSV o .imub binario) lo decide la extensión de cada ruta.
+
+    Las repeticiones pueden incluir `pre_roll` segundos antes de pulsar y
+    `post_roll` después de parar (ver SegmentCapture); por eso todas las
+    muestras pasan por add_block, haya repetición abierta o no.
     """
     def __init__(
         self,
@@ -19,7 +31,27 @@ class DataRecorder:
         raw_filepath: str,
         labeled_filepath: str,
         starting_rep_id: int = 0,
+        fsync: str = 'close',
+        codec: str = 'raw',
+        pre_roll: float = 0.0,
+        post_roll: float = 0.0,
+        history_samples: int = 1024,
+        raw_partition_s: float = None,
+        catalog: bool = True,
     ):
+        """
+        :param fsync: política de fsync de las grabaciones: 'never' | 'batch' | 'close'
+        :param codec: códec de los bloques si se graba en .imub (core.codec.CODECS)
+        :param raw_partition_s: si se da, el raw va particionado por sesión y
+            ventanas de estos segundos en la carpeta `raw_filepath` sin
+            extensión (ver core.partitions); si no, a un único fichero
+        :param pre_roll: segundos previos a start_segment que se incluyen por defecto
+        :param post_roll: segundos posteriores a stop_segment que se incluyen por defecto
+        :param history_samples: muestras por sensor del ring de pre-roll
+        :param catalog: mantener el catálogo SQLite de repeticiones junto al
+            fichero etiquetado (core.catalog); los rep_id siguen entonces
+            la numeración del catálogo, únicos entre sesiones
+        """
         self.sm = sensor_manager
         self.raw_filepath = raw_filepath
         self.labeled_filepath = labeled_filepath
@@ -31,69 +63,138 @@ class DataRecorder:
         os.makedirs(os.path.dirname(raw_filepath) or ".", exist_ok=True)
         os.makedirs(os.path.dirname(labeled_filepath) or ".", exist_ok=True)
 
-        # Abrimos CSV raw en modo append
-        self.raw_file = open(raw_filepath, 'a', newline='')
-        self.raw_writer = csv.writer(self.raw_file)
-        # Escribimos cabecera si está vacío
-        if os.stat(raw_filepath).st_size == 0:
-            self.raw_writer.writerow(['timestamp', 'sensor_id', 'yaw', 'pitch', 'roll'])
-
-        # Abrimos CSV labeled en modo append
-        self.labeled_file = open(labeled_filepath, 'a', newline='')
-        self.labeled_writer = csv.writer(self.labeled_file)
-        if os.stat(labeled_filepath).st_size == 0:
-            self.labeled_writer.writerow(
-                ['rep_id', 'timestamp', 'sensor_id', 'yaw', 'pitch', 'roll', 'label']
-            )
+        # Catálogo (antes de abrir el fichero etiquetado, que puede cambiar su tamaño)
+        self.catalog = None
+        if catalog:
+            self.catalog = RepCatalog(labeled_filepath)
+            self.catalog.begin_session()
+            next_rep_id = self.catalog.next_rep_id()
+            if next_rep_id > self._next_rep_id:
+                self._next_rep_id = next_rep_id
+                self.current_rep_id = next_rep_id - 1
+
+        # Ficheros raw y etiquetado en modo append (cabecera si están vacíos)
+        raw_header = ['timestamp', 'sensor_id', 'yaw', 'pitch', 'roll']
+        if raw_partition_s:
+            root, extension = os.path.splitext(raw_filepath)
+            self.raw_writer = PartitionedWriter(root, raw_header, raw_partition_s, extension,
+                                                fsync=fsync, codec=codec)
+        else:
+            self.raw_writer = open_writer(raw_filepath, raw_header, fsync=fsync, codec=codec)
+        self.labeled_writer = open_writer(
+            labeled_filepath, ['rep_id', 'timestamp', 'sensor_id', 'yaw', 'pitch', 'roll', 'label'],
+            fsync=fsync, codec=codec)
 
         # Estado de segmento
-        self.segment_active = False
         self.current_label = None
-        self.current_buffer: List[Dict[str, Any]] = []
+        self.capture = SegmentCapture(self._write_segment, pre_roll, post_roll, history_samples)
 
-    def start_segment(self, label: str):
-        """Inicia una repetición etiquetada con `label`."""
-        if not self.segment_active:
-            self.segment_active = True
-            self.current_label = label
-            self.current_rep_id = self._next_rep_id
-            self._next_rep_id += 1
-            self.current_buffer = []
+    @property
+    def segment_active(self) -> bool:
+        return self.capture.active
 
-    def stop_segment(self):
-        """Finaliza la repetición, vuelca el buffer al CSV de etiquetas."""
-        if not self.segment_active:
-            return
-        for reading in self.current_buffer:
-            self.labeled_writer.writerow([
-                self.current_rep_id,
-                reading['timestamp'],
-                reading['sensor_id'],
-                reading['yaw'],
-                reading['pitch'],
-                reading['roll'],
-                self.current_label
-            ])
-        self.labeled_file.flush()
-        self.segment_active = False
+    @property
+    def current_buffer(self) -> SegmentBuffer:
+        return self.capture.buffer
+
+    def start_segment(self, label: str, pre_roll: float = None):
+        """
+        Inicia una repetición etiquetada con `label`, incluyendo los
+        `pre_roll` segundos anteriores (por defecto los del constructor).
+        """
+        rep_id = self._next_rep_id
+        if not self.capture.start((rep_id, label), pre_roll):
+            return False
+        self.current_rep_id = rep_id
+        self._next_rep_id += 1
+        self.current_label = label
+        return True
+
+    def add_block(self, sensor_id: str, block):
+        """Entrada de todas las muestras (n, 4) del sensor (ver SegmentCapture.add_block)."""
+        self.capture.add_block(sensor_id, block)
+
+    def stop_segment(self, post_roll: float = None):
+        """
+        Finaliza la repetición; sus columnas van al escritor de etiquetas
+        al acabar el `post_roll` (por defecto el del constructor; negativo
+        recorta el final).
+        """
+        return self.capture.stop(post_roll)
+
+    def cancel_segment(self):
+        """Descarta la repetición abierta sin grabarla y reutiliza su rep_id."""
+        if not self.capture.cancel():
+            return False
+        self._next_rep_id = self.current_rep_id
+        self.current_rep_id -= 1
+        self.current_label = None
+        return True
+
+    def apply_segment_actions(self, actions: list, label: str) -> list:
+        """
+        Ejecuta las órdenes de segmentación automática (ver
+        core.segmentation.segment_actions) y devuelve las que tuvieron
+        efecto como 'started' / 'stopped'.
+        """
+        done = []
+        for action in actions:
+            if action[0] == 'start':
+                if self.start_segment(label, pre_roll=action[1]):
+                    done.append('started')
+            elif action[0] == 'stop':
+                if self.stop_segment(post_roll=action[1]):
+                    done.append('stopped')
+            elif self.cancel_segment():
+                done.append('stopped')
+        return done
+
+    def _write_segment(self, buffer: SegmentBuffer, tag):
+        """Pasa una repetición terminada al escritor de etiquetas."""
+        rep_id, label = tag
+        columns = buffer.columns()
+        columns['rep_id'] = rep_id
+        columns['label'] = label
+        on_written = None
+        n = len(columns['timestamp'])
+        if self.catalog is not None and n:
+            ts, sensors = columns['timestamp'], columns['sensor_id']
+            sensors = [sensors] if not np.ndim(sensors) else sorted(set(sensors.tolist()))
+            t_start, t_end = float(ts.min()), float(ts.max())
+
+            def on_written(start, end):
+                self.catalog.add_rep(rep_id, label, sensors, t_start, t_end, n, start, end)
+        self.labeled_writer.write_columns(columns, on_written)
         self.current_label = None
-        self.current_buffer = []
 
     def write_raw(self, reading: Dict[str, Any]):
-        """Escribe una medida raw en el CSV correspondiente."""
-        self.raw_writer.writerow([
+        """Encola una medida raw para el CSV correspondiente."""
+        self.raw_writer.write_row([
             reading['timestamp'],
             reading['sensor_id'],
             reading['yaw'],
             reading['pitch'],
             reading['roll']
         ])
-        self.raw_file.flush()
+
+    def write_raw_block(self, sensor_id: str, block):
+        """Encola un bloque (n, 4) de medidas raw de un sensor, por columnas."""
+        self.raw_writer.write_columns({
+            'timestamp': block[:, 0],
+            'sensor_id': sensor_id,
+            'yaw': block[:, 1],
+            'pitch': block[:, 2],
+            'roll': block[:, 3],
+        })
 
     def close(self):
-        """Cierra los ficheros."""
-        self.raw_file.close()
-        self.labeled_file.close()
+        """Escribe lo pendiente (incluido un post-roll sin acabar) y cierra los ficheros."""
+        self.capture.flush()
+        self.raw_writer.close()
+        self.labeled_writer.close()
+        if self.catalog is not None:
+            self.catalog.end_session(getattr(self.raw_writer, 'session', None))
+            self.catalog.close()
 
 
 class CaptureController(QObject):
@@ -101,7 +202,10 @@ class CaptureController(QObject):
     Controller que lanza el bucle de adquisición en un hilo,
     delega en DataRecorder y emite señales Qt para la UI.
     """
-    # Señal por cada nueva lectura (un dict con keys: timestamp, sensor_id, yaw, pitch, roll)
+    # Lote de lecturas a ritmo de pantalla: {sensor_id: {columna: array}} (ver SampleBatcher)
+    data_batch_ready = pyqtSignal(dict)
+    # Señal por cada nueva lectura (un dict con keys: timestamp, sensor_id, yaw, pitch, roll).
+    # Sólo por compatibilidad: se emite únicamente si hay algo conectado
     data_ready = pyqtSignal(dict)
     # Señal al iniciar/parar grabación
     recording_started = pyqtSignal()
@@ -109,11 +213,37 @@ class CaptureController(QObject):
     # Señal al iniciar/parar segmento (label o vacía)
     segment_started = pyqtSignal(str)
     segment_stopped = pyqtSignal()
+    # Señal si no se pudo arrancar algún sensor (mensaje con el motivo de cada uno)
+    start_failed = pyqtSignal(str)
 
-    def __init__(self, sensor_configs, raw_filepath, labeled_filepath):
+    def __init__(self, sensor_configs, raw_filepath, labeled_filepath, io_mode='auto',
+                 fsync='close', ui_rate_hz: float = 30, pre_roll: float = 0.0,
+                 post_roll: float = 0.0, segmenter: RepSegmenter = None,
+                 segment_sensor: str = None, codec: str = 'raw',
+                 raw_partition_s: float = None):
+        """
+        :param codec: códec de los bloques si se graba en .imub
+        :param raw_partition_s: ventana (s) de las particiones raw (None: un único fichero)
+        :param ui_rate_hz: lotes por segundo de data_batch_ready
+        :param pre_roll: segundos previos incluidos en cada repetición (ver DataRecorder)
+        :param post_roll: segundos posteriores incluidos en cada repetición
+        :param segmenter: detector para la segmentación automática (ver set_auto_segment)
+        :param segment_sensor: sensor que lo alimenta (por defecto el primero)
+        """
         super().__init__()
         # Guardamos los parámetros para recrear el recorder
         self._sensor_configs = sensor_configs
+        self._io_mode = io_mode
+        self._fsync = fsync
+        self._codec = codec
+        self._raw_partition_s = raw_partition_s
+        self._pre_roll = pre_roll
+        self._post_roll = post_roll
+        # Segmentación automática (desactivada hasta set_auto_segment)
+        self._segmenter = segmenter
+        self._segment_sensor = segment_sensor or sensor_configs[0]['id']
+        self._auto_segment = False
+        self._auto_label = None
         self._raw_filepath = raw_filepath
         self._label_filepath = labeled_filepath
         self.recorder = None
@@ -123,6 +253,11 @@ class CaptureController(QObject):
         self.rep_id = 0
         # Guarda en .csv el raw data o no
         self._record_raw_data = True  # valor por defecto
+        # Agrupa las muestras hacia la GUI
+        self._batcher = SampleBatcher(ui_rate_hz, self)
+        self._batcher.data_batch_ready.connect(self.data_batch_ready)
+        # Se emite desde el hilo de captura: el QTimer arranca en el de la GUI
+        self.recording_started.connect(self._start_batcher)
 
     def set_record_raw_data(self, value: bool):
         """Establece si se debe grabar datos raw"""
@@ -132,28 +267,47 @@ class CaptureController(QObject):
         """Obtiene el estado actual de grabación raw"""
         return self._record_raw_data
 
+    def set_auto_segment(self, enabled: bool, label: str = None):
+        """
+        Activa/desactiva la segmentación automática: el segmenter abre y
+        cierra repeticiones etiquetadas con `label` sin pulsar nada.
+        """
+        if enabled and self._segmenter is None:
+            raise ValueError("CaptureController creado sin segmenter")
+        self._auto_label = label
+        if enabled and not self._auto_segment:
+            self._segmenter.reset()
+        self._auto_segment = enabled
+
+    def _start_batcher(self):
+        # Si se paró mientras se abrían los sensores, el timer no debe arrancar
+        if not self._stop_event.is_set():
+            self._batcher.start()
+
+    def telemetry(self) -> dict:
+        """Telemetría por sensor durante la grabación ({} si está parada)."""
+        recorder = self.recorder
+        return recorder.sm.telemetry() if recorder else {}
+
     def start_recording(self):
-        """Arranca el hilo que lee continuamente de las IMUs."""
-        # Si ya hay un hilo vivo, no hacemos nada
+        """
+        Arranca el hilo que lee continuamente de las IMUs. Los sensores se
+        abren (y se espera a que respondan) en ese hilo, no en el de la GUI:
+        el resultado llega por recording_started o start_failed.
+        """
+        # Si ya hay un hilo vivo (grabando o abriendo sensores), no hacemos nada
         if self._thread and self._thread.is_alive():
             return
-        # 1) Re-creamos un DataRecorder con puertos y CSVs nuevos
-        self.recorder = DataRecorder(
-            sensor_manager = SensorManager(self._sensor_configs),
-            raw_filepath = self._raw_filepath,
-            labeled_filepath = self._label_filepath,
-            starting_rep_id = self.rep_id)
-        # 2) Arrancamos el hilo de captura
         self._stop_event.clear()
         self._thread = threading.Thread(target=self._record_loop, daemon=True)
         self._thread.start()
-        self.recording_started.emit()
 
     def stop_recording(self):
         """Pide parada al hilo, espera a que termine y cierra sensores y ficheros."""
         self._stop_event.set()
         if self._thread:
             self._thread.join()
+        self._batcher.stop()
         # Cerramos sensores y ficheros del recorder actual
         if self.recorder:
             self.rep_id = self.recorder.current_rep_id # Almacena la repetición en la que queda
@@ -172,18 +326,66 @@ class CaptureController(QObject):
         self.recorder.stop_segment()
         self.segment_stopped.emit()
 
+    def _open_recorder(self) -> bool:
+        """
+        Abre los sensores y re-crea el DataRecorder con CSVs nuevos (hilo de
+        captura); False si algún sensor no arrancó.
+        """
+        try:
+            sensor_manager = SensorManager(self._sensor_configs, io_mode=self._io_mode)
+        except SensorStartupError as e:
+            self.start_failed.emit(str(e))
+            return False
+        self.recorder = DataRecorder(
+            sensor_manager = sensor_manager,
+            raw_filepath = self._raw_filepath,
+            labeled_filepath = self._label_filepath,
+            starting_rep_id = self.rep_id,
+            fsync = self._fsync,
+            codec = self._codec,
+            raw_partition_s = self._raw_partition_s,
+            pre_roll = self._pre_roll,
+            post_roll = self._post_roll)
+        if self._segmenter is not None:
+            self._segmenter.reset()
+        return True
+
     def _record_loop(self):
-        """Bucle interno que lee, escribe y emite cada medida."""
+        """Bucle interno que abre los sensores y lee, escribe y emite cada medida."""
+        if not self._open_recorder():
+            return
+        self.recording_started.emit()
+        sm = self.recorder.sm
         while not self._stop_event.is_set():
-            readings = self.recorder.sm.read_all()
-            for reading in readings:
-                # 1) graba raw
+            # Bloquea hasta que haya datos nuevos (sin sondeo activo)
+            if not sm.wait_data(timeout=0.1):
+                continue
+            per_sample = self.receivers(self.data_ready) > 0
+            for sensor_id, block in sm.read_all_arrays().items():
+                if not len(block):
+                    continue
+                # 1) historia de pre-roll y, si hay segmento abierto, repetición
+                self.recorder.add_block(sensor_id, block)
+                if self._auto_segment and sensor_id == self._segment_sensor:
+                    self._auto_segment_block(block)
+                # 2) a la GUI en lotes
+                self._batcher.push(sensor_id, block)
+                # 3) graba raw
                 if self._record_raw_data:
-                    self.recorder.write_raw(reading)
-                # 2) si hay segmento abierto, acumula
-                if self.recorder.segment_active:
-                    self.recorder.current_buffer.append(reading)
-                # 3) emite señal para UI
-                self.data_ready.emit(reading)
-            # muy corta pausa para evitar busy‐wait excesivo
-            time.sleep(0.001)
\ No newline at end of file
+                    self.recorder.write_raw_block(sensor_id, block)
+                # 4) señal por muestra (compatibilidad)
+                if per_sample:
+                    for reading in block_to_readings(sensor_id, block):
+                        self.data_ready.emit(reading)
+
+    def _auto_segment_block(self, block):
+        """Pasa un bloque del sensor guía por el segmenter y aplica sus eventos."""
+        events = self._segmenter.update(block)
+        if not events:
+            return
+        actions = segment_actions(events, block[-1, 0])
+        for done in self.recorder.apply_segment_actions(actions, self._auto_label):
+            if done == 'started':
+                self.segment_started.emit(self._auto_label)
+            else:
+                self.segment_stopped.emit()
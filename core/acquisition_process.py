@@ -0,0 +1,316 @@
+# core/acquisition_process.py
+
+import multiprocessing as mp
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer, QCoreApplication, pyqtSignal
+
+from core.acquisition import DataRecorder
+from core.imu.manager import SensorManager, SensorStartupError
+from core.imu.shm_ring import SharedSampleRing
+from core.ui_batch import columns_of
+from core.segmentation import RepSegmenter, segment_actions
+
+# Columnas del ring compartido: índice del sensor + SAMPLE_COLUMNS
+RING_COLUMNS = 5
+
+
+def _acquisition_worker(conn, ring_name, sensor_configs, raw_filepath, labeled_filepath,
+                        io_mode, starting_rep_id, fsync, pre_roll=0.0, post_roll=0.0,
+                        segmenter=None, segment_sensor=None, codec='raw',
+                        raw_partition_s=None):
+    """
+    Proceso de adquisición: posee SensorManager y DataRecorder, graba los CSV
+    y publica cada muestra en el ring compartido. Recibe órdenes
+    (tuplas (comando, *args)) por `conn` y responde con eventos.
+    """
+    ring = SharedSampleRing.attach(ring_name)
+    index = {cfg['id']: i for i, cfg in enumerate(sensor_configs)}
+    recorder = None
+    record_raw = True
+    rep_id = starting_rep_id
+    auto_label = None      # etiqueta de la segmentación automática (None: desactivada)
+
+    def handle(cmd, args):
+        nonlocal recorder, record_raw, rep_id, auto_label
+        if cmd == 'start_recording' and recorder is None:
+            try:
+                sm = SensorManager(sensor_configs, io_mode=io_mode)
+            except SensorStartupError as e:
+                conn.send(('start_failed', str(e)))
+                return
+            recorder = DataRecorder(sm, raw_filepath, labeled_filepath,
+                                    starting_rep_id=rep_id, fsync=fsync, codec=codec,
+                                    raw_partition_s=raw_partition_s,
+                                    pre_roll=pre_roll, post_roll=post_roll)
+            if segmenter is not None:
+                segmenter.reset()
+            conn.send(('recording_started',))
+        elif cmd == 'stop_recording' and recorder is not None:
+            rep_id = recorder.current_rep_id
+            recorder.sm.close_all()
+            recorder.close()
+            recorder = None
+            conn.send(('recording_stopped', rep_id))
+        elif cmd == 'start_segment' and recorder is not None:
+            recorder.start_segment(args[0])
+            conn.send(('segment_started', args[0]))
+        elif cmd == 'stop_segment' and recorder is not None:
+            recorder.stop_segment()
+            conn.send(('segment_stopped', recorder.current_rep_id))
+        elif cmd == 'set_record_raw':
+            record_raw = bool(args[0])
+        elif cmd == 'set_auto_segment' and segmenter is not None:
+            if args[0] and auto_label is None:
+                segmenter.reset()
+            auto_label = args[1] if args[0] else None
+        elif cmd == 'telemetry':
+            conn.send(('telemetry', recorder.sm.telemetry() if recorder else {}))
+
+    try:
+        while True:
+            if recorder is None:
+                # Sin captura: sólo esperamos órdenes
+                if not conn.poll(0.5):
+                    continue
+            else:
+                if recorder.sm.wait_data(timeout=0.05):
+                    for sensor_id, block in recorder.sm.read_all_arrays().items():
+                        if not len(block):
+                            continue
+                        if record_raw:
+                            recorder.write_raw_block(sensor_id, block)
+                        recorder.add_block(sensor_id, block)
+                        if auto_label is not None and sensor_id == segment_sensor:
+                            events = segmenter.update(block)
+                            actions = segment_actions(events, block[-1, 0]) if events else []
+                            for done in recorder.apply_segment_actions(actions, auto_label):
+                                if done == 'started':
+                                    conn.send(('segment_started', auto_label))
+                                else:
+                                    conn.send(('segment_stopped', recorder.current_rep_id))
+                        rows = np.empty((len(block), RING_COLUMNS))
+                        rows[:, 0] = index[sensor_id]
+                        rows[:, 1:] = block
+                        ring.write(rows)
+            while conn.poll():
+                cmd, *args = conn.recv()
+                if cmd == 'close':
+                    return
+                handle(cmd, args)
+    except (EOFError, BrokenPipeError):
+        pass  # el proceso de la GUI ha terminado
+    finally:
+        if recorder is not None:
+            recorder.sm.close_all()
+            recorder.close()
+        ring.mark_closed()
+        ring.close()
+
+
+class ProcessCaptureController(QObject):
+    """
+    Misma interfaz y señales que CaptureController, pero la adquisición
+    (puertos, parseo y escritura de CSV) corre en otro proceso, con su
+    propio GIL: los repintados de la GUI no retrasan la lectura ni la
+    grabación.
+
+    Las órdenes viajan por un Pipe y las muestras llegan por un
+    SharedSampleRing que la GUI lee con un QTimer, sin copias ni locks.
+    Si la GUI se retrasa más de una vuelta del ring sólo se pierde la
+    visualización (ring_lost); la grabación del otro proceso no se ve afectada.
+    """
+    data_batch_ready = pyqtSignal(dict)
+    data_ready = pyqtSignal(dict)
+    recording_started = pyqtSignal()
+    recording_stopped = pyqtSignal()
+    segment_started = pyqtSignal(str)
+    segment_stopped = pyqtSignal()
+    start_failed = pyqtSignal(str)
+
+    def __init__(self, sensor_configs, raw_filepath, labeled_filepath, io_mode='auto',
+                 fsync='close', ui_rate_hz: float = 30, pre_roll: float = 0.0,
+                 post_roll: float = 0.0, segmenter: RepSegmenter = None,
+                 segment_sensor: str = None, ring_capacity: int = 1 << 16,
+                 codec: str = 'raw', raw_partition_s: float = None):
+        """
+        :param codec: códec de los bloques si se graba en .imub
+        :param raw_partition_s: ventana (s) de las particiones raw (None: un único fichero)
+        :param pre_roll: segundos previos incluidos en cada repetición (ver DataRecorder)
+        :param post_roll: segundos posteriores incluidos en cada repetición
+        :param segmenter: detector para la segmentación automática (se copia al
+            proceso de adquisición, donde corre)
+        :param segment_sensor: sensor que lo alimenta (por defecto el primero)
+        :param ui_rate_hz: veces por segundo que la GUI recoge muestras y
+            eventos (un data_batch_ready por vez)
+        :param ring_capacity: filas del ring compartido (~40 B por fila)
+        """
+        super().__init__()
+        self._sensor_configs = [dict(cfg) for cfg in sensor_configs]
+        self._sensor_ids = [cfg['id'] for cfg in sensor_configs]
+        self._raw_filepath = raw_filepath
+        self._labeled_filepath = labeled_filepath
+        self._io_mode = io_mode
+        self._fsync = fsync
+        self._codec = codec
+        self._raw_partition_s = raw_partition_s
+        self._pre_roll = pre_roll
+        self._post_roll = post_roll
+        self._segmenter = segmenter
+        self._segment_sensor = segment_sensor or self._sensor_ids[0]
+        self._auto_segment = (False, None)
+        self._ring_capacity = ring_capacity
+        self._record_raw_data = True
+        self.rep_id = 0
+        self._telemetry = {}
+
+        self._proc = None
+        self._conn = None
+        self._ring = None
+        self._reader = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(1, round(1000 / ui_rate_hz)))
+        self._timer.timeout.connect(self.poll)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.close)
+
+    def _ensure_worker(self):
+        """Arranca el proceso de adquisición la primera vez que se necesita."""
+        if self._proc is not None and self._proc.is_alive():
+            return
+        self._release_worker()
+        # 'spawn': no se hereda el estado de Qt del proceso de la GUI
+        ctx = mp.get_context('spawn')
+        self._ring = SharedSampleRing.create(self._ring_capacity, RING_COLUMNS)
+        self._reader = self._ring.reader()
+        self._conn, child_conn = ctx.Pipe()
+        self._proc = ctx.Process(
+            target=_acquisition_worker,
+            args=(child_conn, self._ring.name, self._sensor_configs, self._raw_filepath,
+                  self._labeled_filepath, self._io_mode, self.rep_id, self._fsync,
+                  self._pre_roll, self._post_roll, self._segmenter, self._segment_sensor,
+                  self._codec, self._raw_partition_s),
+            daemon=True,
+        )
+        self._proc.start()
+        child_conn.close()
+        self._conn.send(('set_record_raw', self._record_raw_data))
+        self._conn.send(('set_auto_segment', *self._auto_segment))
+        self._timer.start()
+
+    def _send(self, *command):
+        if self._conn is not None:
+            self._conn.send(command)
+
+    def set_record_raw_data(self, value: bool):
+        """Establece si se debe grabar datos raw"""
+        self._record_raw_data = value
+        self._send('set_record_raw', value)
+
+    def get_record_raw_data(self) -> bool:
+        """Obtiene el estado actual de grabación raw"""
+        return self._record_raw_data
+
+    def set_auto_segment(self, enabled: bool, label: str = None):
+        """Activa/desactiva la segmentación automática (ver CaptureController)."""
+        if enabled and self._segmenter is None:
+            raise ValueError("ProcessCaptureController creado sin segmenter")
+        self._auto_segment = (enabled, label)
+        self._send('set_auto_segment', enabled, label)
+
+    def start_recording(self):
+        """Pide al proceso de adquisición que abra los sensores y empiece a grabar."""
+        self._ensure_worker()
+        self._send('start_recording')
+
+    def stop_recording(self):
+        self._send('stop_recording')
+
+    def start_segment(self, label: str):
+        self._send('start_segment', label)
+
+    def stop_segment(self):
+        self._send('stop_segment')
+
+    def telemetry(self) -> dict:
+        """
+        Última telemetría recibida del proceso de adquisición; cada llamada
+        pide una nueva, que llega en el siguiente poll().
+        """
+        self._send('telemetry')
+        return self._telemetry
+
+    @property
+    def ring_lost(self) -> int:
+        """Muestras que la GUI no llegó a leer del ring (sólo visualización)."""
+        return self._reader.lost if self._reader else 0
+
+    def poll(self):
+        """
+        Recoge las muestras nuevas del ring y los eventos del proceso y los
+        reemite como señales Qt. Lo llama el QTimer en el hilo de la GUI.
+        """
+        if self._reader is not None:
+            rows = self._reader.read_array()
+            if len(rows):
+                # Copia antes de emitir: el ring puede sobrescribir las vistas
+                rows = rows.copy()
+                if not self._reader.still_valid():
+                    # El proceso dio la vuelta al ring durante la copia: las
+                    # filas pueden estar a medio sobrescribir
+                    self._reader.lost += len(rows)
+                    rows = rows[:0]
+            if len(rows):
+                ids = self._sensor_ids
+                self.data_batch_ready.emit({
+                    ids[i]: columns_of(rows[rows[:, 0] == i, 1:])
+                    for i in np.unique(rows[:, 0]).astype(int).tolist()
+                })
+                if self.receivers(self.data_ready) > 0:
+                    for idx, t, y, p, r in rows.tolist():
+                        self.data_ready.emit({'sensor_id': ids[int(idx)], 'timestamp': t,
+                                              'yaw': y, 'pitch': p, 'roll': r})
+        try:
+            while self._conn is not None and self._conn.poll():
+                event, *args = self._conn.recv()
+                if event == 'recording_started':
+                    self.recording_started.emit()
+                elif event == 'recording_stopped':
+                    self.rep_id = args[0]
+                    self._telemetry = {}
+                    self.recording_stopped.emit()
+                elif event == 'segment_started':
+                    self.segment_started.emit(args[0])
+                elif event == 'segment_stopped':
+                    self.rep_id = args[0]
+                    self.segment_stopped.emit()
+                elif event == 'start_failed':
+                    self.start_failed.emit(args[0])
+                elif event == 'telemetry':
+                    self._telemetry = args[0]
+        except (EOFError, OSError):
+            print("El proceso de adquisición ha terminado inesperadamente")
+            self._release_worker()
+            self.recording_stopped.emit()
+
+    def _release_worker(self):
+        self._timer.stop()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._proc is not None:
+            self._proc.join(timeout=2)
+            if self._proc.is_alive():
+                self._proc.terminate()
+            self._proc = None
+        if self._ring is not None:
+            self._reader = None
+            self._ring.close()
+            self._ring = None
+
+    def close(self):
+        """Detiene la captura y termina el proceso de adquisición."""
+        if self._proc is not None and self._proc.is_alive():
+            self._send('close')
+        self._release_worker()
@@ -0,0 +1,327 @@
+# core/catalog.py
+
+"""
+Catálogo SQLite de repeticiones junto al fichero etiquetado.
+
+Por cada repetición guarda una fila con un id único en todo el catálogo,
+su sesión, etiqueta, sensores, timestamps de inicio y fin, número de
+muestras y los bytes [inicio, fin) que ocupa en el fichero de datos. Así
+se listan y filtran repeticiones sin leer los datos, y se carga una (o un
+subconjunto) leyendo sólo sus bytes:
+
+    catalog = RepCatalog.open('data/datos_ejercicio.csv')
+    reps = catalog.reps(label='incorrecto')
+    frames = load_reps('data/datos_ejercicio.csv', reps)
+
+El catálogo vive en `<fichero>.sqlite` y lo mantiene DataRecorder (una
+fila por repetición, cuando ya está escrita). Si falta, o el fichero de
+datos ha cambiado por fuera, se reconstruye recorriendo el fichero una vez;
+en ese caso las repeticiones con el mismo rep_id (de sesiones anteriores al
+catálogo) reciben ids distintos.
+"""
+
+import io
+import os
+import time
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+
+from core.recording import is_binary, RecordingReader, LABEL_COLUMNS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    started     REAL NOT NULL,
+    ended       REAL,
+    raw_session TEXT
+);
+CREATE TABLE IF NOT EXISTS reps (
+    id          INTEGER PRIMARY KEY,
+    rep_id      INTEGER NOT NULL,
+    session_id  INTEGER REFERENCES sessions(id),
+    label       TEXT,
+    sensors     TEXT,
+    t_start     REAL,
+    t_end       REAL,
+    n_samples   INTEGER NOT NULL,
+    byte_start  INTEGER NOT NULL,
+    byte_end    INTEGER NOT NULL,
+    created     REAL
+);
+CREATE INDEX IF NOT EXISTS reps_label ON reps(label);
+CREATE INDEX IF NOT EXISTS reps_session ON reps(session_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def catalog_path(data_path: str) -> str:
+    return data_path + ".sqlite"
+
+
+class RepCatalog:
+    """
+    Catálogo de un fichero etiquetado (CSV o .imub). Las repeticiones se
+    devuelven como dicts con las columnas de la tabla `reps` ('sensors' como
+    lista). Se puede usar desde varios hilos (el escritor de DataRecorder
+    añade filas mientras la GUI consulta).
+    """
+
+    def __init__(self, data_path: str):
+        """
+        :param data_path: fichero etiquetado al que acompaña (puede no existir aún)
+        """
+        self.data_path = data_path
+        self.path = catalog_path(data_path)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+        self.session_id = None
+
+    @classmethod
+    def open(cls, data_path: str) -> 'RepCatalog':
+        """Abre el catálogo y lo reconstruye si falta o está desactualizado."""
+        catalog = cls(data_path)
+        if catalog.is_stale():
+            catalog.rebuild()
+        return catalog
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # — Estado —
+
+    def _meta(self, key: str):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, str(value)))
+
+    def _data_size(self) -> int:
+        return os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+
+    def is_stale(self) -> bool:
+        """
+        True si el catálogo no corresponde al fichero de datos: no hay filas
+        y el fichero sí tiene datos, o (sin ninguna sesión grabando) el
+        tamaño no es el que tenía al cerrar la última sesión.
+        """
+        with self._lock:
+            n_reps = self._conn.execute("SELECT COUNT(*) FROM reps").fetchone()[0]
+            recording = self._conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE ended IS NULL").fetchone()[0]
+            size = self._meta('data_size')
+        data_size = self._data_size()
+        if not n_reps:
+            return data_size > 0 and size != str(data_size)
+        return not recording and size != str(data_size)
+
+    # — Escritura (DataRecorder) —
+
+    def begin_session(self) -> int:
+        """
+        Empieza una sesión de grabación. Cierra las que quedaran abiertas
+        por un corte y, si el fichero cambió desde entonces, reindexa.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("""
+                UPDATE sessions SET ended = COALESCE(
+                    (SELECT MAX(created) FROM reps WHERE session_id = sessions.id), started)
+                WHERE ended IS NULL""")
+        if self.is_stale():
+            self.rebuild()
+        with self._lock, self._conn:
+            cur = self._conn.execute("INSERT INTO sessions (started) VALUES (?)", (time.time(),))
+        self.session_id = cur.lastrowid
+        return self.session_id
+
+    def end_session(self, raw_session: str = None):
+        """Cierra la sesión actual y anota el tamaño del fichero de datos."""
+        with self._lock, self._conn:
+            if self.session_id is not None:
+                self._conn.execute("UPDATE sessions SET ended = ?, raw_session = ? WHERE id = ?",
+                                   (time.time(), raw_session, self.session_id))
+            self._set_meta('data_size', self._data_size())
+        self.session_id = None
+
+    def next_rep_id(self) -> int:
+        """Primer id libre: mayor que cualquier id o rep_id ya catalogado."""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(MAX(id), MAX(rep_id)) FROM reps").fetchone()
+        return (row[0] or 0) + 1
+
+    def add_rep(self, rep_id: int, label: str, sensors, t_start: float, t_end: float,
+                n_samples: int, byte_start: int, byte_end: int):
+        """Cataloga una repetición ya escrita en [byte_start, byte_end)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (rep_id, rep_id, self.session_id, label, ",".join(sorted(sensors)),
+                 t_start, t_end, n_samples, byte_start, byte_end, time.time()))
+
+    def rebuild(self):
+        """Reconstruye las filas de repeticiones recorriendo el fichero de datos una vez."""
+        print(f"Indexando {self.data_path} en {self.path}")
+        entries = index_file(self.data_path) if self._data_size() else []
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM reps")
+            now = time.time()
+            self._conn.executemany(
+                "INSERT INTO reps VALUES (?, ?, NULL, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(i + 1, e['rep_id'], e['label'], ",".join(e['sensors']), e['t_start'],
+                  e['t_end'], e['n_samples'], e['byte_start'], e['byte_end'], now)
+                 for i, e in enumerate(entries)])
+            self._set_meta('data_size', self._data_size())
+
+    # — Consultas —
+
+    def reps(self, label: str = None, session_id: int = None, sensor_id: str = None) -> list:
+        """Repeticiones (dicts) que cumplen los filtros, en orden de grabación."""
+        where, args = [], []
+        if label is not None:
+            where.append("label = ?")
+            args.append(label)
+        if session_id is not None:
+            where.append("session_id = ?")
+            args.append(session_id)
+        if sensor_id is not None:
+            where.append("(',' || sensors || ',') LIKE ?")
+            args.append(f"%,{sensor_id},%")
+        sql = "SELECT * FROM reps"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY byte_start", args).fetchall()
+        out = []
+        for row in rows:
+            entry = dict(row)
+            entry['sensors'] = entry['sensors'].split(",") if entry['sensors'] else []
+            out.append(entry)
+        return out
+
+    def labels(self) -> dict:
+        """{etiqueta: número de repeticiones}."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT label, COUNT(*) FROM reps GROUP BY label ORDER BY label").fetchall()
+        return {label: n for label, n in rows}
+
+    def sessions(self) -> list:
+        """Sesiones (dicts) con su número de repeticiones."""
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT sessions.*, COUNT(reps.id) AS n_reps FROM sessions
+                LEFT JOIN reps ON reps.session_id = sessions.id
+                GROUP BY sessions.id ORDER BY sessions.id""").fetchall()
+        return [dict(row) for row in rows]
+
+
+def _label_column(columns) -> str:
+    return next((c for c in LABEL_COLUMNS if c in columns), None)
+
+
+def _runs(values: np.ndarray) -> list:
+    """Tramos [i, j) de valores consecutivos iguales."""
+    if not len(values):
+        return []
+    cuts = np.flatnonzero(values[1:] != values[:-1]) + 1
+    bounds = np.concatenate(([0], cuts, [len(values)]))
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def _entry(df: pd.DataFrame, i: int, j: int, byte_start: int, byte_end: int) -> dict:
+    label_col = _label_column(df.columns)
+    ts = df['timestamp'].to_numpy()[i:j]
+    sensors = sorted(set(df['sensor_id'].iloc[i:j].astype(str))) if 'sensor_id' in df else []
+    return {
+        'rep_id': int(df['rep_id'].iat[i]),
+        'label': str(df[label_col].iat[i]) if label_col else None,
+        'sensors': sensors,
+        't_start': float(ts.min()),
+        't_end': float(ts.max()),
+        'n_samples': j - i,
+        'byte_start': byte_start,
+        'byte_end': byte_end,
+    }
+
+
+def index_file(data_path: str) -> list:
+    """
+    Repeticiones de un fichero etiquetado como dicts sin 'id' (ver
+    RepCatalog.reps), una por tramo de rep_id consecutivo.
+    """
+    if is_binary(data_path):
+        reader = RecordingReader(data_path)
+        try:
+            entries = []
+            chunks = reader.chunks
+            for i, j in _runs(np.array([-1 if c[2] is None else c[2] for c in chunks])):
+                df = reader.to_dataframe(range(i, j))
+                entries.append(_entry(df, 0, len(df), chunks[i][0], reader.chunk_end(j - 1)))
+            return entries
+        finally:
+            reader.close()
+
+    buf = np.fromfile(data_path, dtype=np.uint8)
+    newlines = np.flatnonzero(buf == ord('\n'))
+    df = pd.read_csv(data_path)
+    # Fila k (0 = primera de datos) en [newlines[k] + 1, newlines[k + 1] + 1)
+    if len(newlines) < len(df) + 1:
+        newlines = np.append(newlines, len(buf) - 1)   # última línea sin salto
+    return [_entry(df, i, j, int(newlines[i]) + 1, int(newlines[j]) + 1)
+            for i, j in _runs(df['rep_id'].to_numpy())]
+
+
+def load_reps_table(data_path: str, entries: list) -> tuple:
+    """
+    Las repeticiones `entries` (de RepCatalog.reps) en un único DataFrame,
+    contiguas y en el mismo orden, leyendo sólo sus bytes del fichero de
+    datos. Devuelve (DataFrame, índice de la primera fila de cada una).
+    """
+    if is_binary(data_path):
+        reader = RecordingReader(data_path)
+        try:
+            offsets = np.array([c[0] for c in reader.chunks])
+            ids = []
+            for e in entries:
+                lo, hi = np.searchsorted(offsets, [e['byte_start'], e['byte_end']])
+                ids.extend(range(lo, hi))
+            df = reader.to_dataframe(ids)
+        finally:
+            reader.close()
+    else:
+        with open(data_path, 'rb') as f:
+            parts = [f.readline()]      # cabecera
+            for e in entries:
+                f.seek(e['byte_start'])
+                parts.append(f.read(e['byte_end'] - e['byte_start']))
+        df = pd.read_csv(io.BytesIO(b"".join(parts)))
+    bounds = np.cumsum([0] + [e['n_samples'] for e in entries])
+    return df, bounds[:-1]
+
+
+def read_rep_bytes(data_path: str, entries: list) -> list:
+    """Bytes tal cual de cada repetición en el fichero de datos (CSV o .imub)."""
+    out = []
+    with open(data_path, 'rb') as f:
+        for e in entries:
+            f.seek(e['byte_start'])
+            out.append(f.read(e['byte_end'] - e['byte_start']))
+    return out
+
+
+def load_reps(data_path: str, entries: list) -> list:
+    """DataFrames de las repeticiones `entries`, en el mismo orden (ver load_reps_table)."""
+    if not entries:
+        return []
+    df, starts = load_reps_table(data_path, entries)
+    bounds = np.append(starts, len(df))
+    return [df.iloc[i:j].reset_index(drop=True) for i, j in zip(bounds[:-1], bounds[1:])]
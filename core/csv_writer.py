@@ -0,0 +1,239 @@
+# core/csv_writer.py
+
+import abc
+import io
+import os
+import csv
+import time
+import queue
+import threading
+import itertools
+import numpy as np
+
+FSYNC_POLICIES = ('never', 'batch', 'close')
+
+_CLOSE = object()
+
+
+class ColumnBatch:
+    """
+    Filas en forma de columnas {columna: array o escalar} para
+    BatchedWriter.write_columns; los escalares valen para todas las filas.
+    """
+
+    def __init__(self, columns: dict, on_written=None):
+        self.columns = columns
+        self.on_written = on_written
+        self.n = max((len(v) for v in columns.values() if np.ndim(v)), default=0)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def column(self, name: str) -> np.ndarray:
+        value = self.columns[name]
+        return np.asarray(value) if np.ndim(value) else np.full(self.n, value)
+
+    def rows(self, names: list) -> list:
+        """Filas como listas de valores Python, en el orden de `names`."""
+        values = [v.tolist() if np.ndim(v) else itertools.repeat(v, self.n)
+                  for v in (self.columns[name] for name in names)]
+        return list(zip(*values))
+
+
+class BatchedWriter(abc.ABC):
+    """
+    Escritor en segundo plano con escritura agrupada ("group commit").
+
+    Quien graba sólo encola filas (sin tocar el disco); un hilo las acumula
+    y las vuelca al fichero en lotes cuando se acumulan `flush_bytes` o pasan
+    `flush_interval` segundos desde la primera fila pendiente. Así hay
+    decenas de llamadas al sistema por segundo en vez de una por fila, y la
+    latencia del disco queda fuera del hilo de adquisición.
+
+    Las subclases deben definir cómo se acumulan las filas (_add) y cómo
+    se escribe un lote (_write_batch); sin ellos no se pueden instanciar.
+    Un write_columns puede pedir que se le avise con los bytes [inicio,
+    fin) que ocupan sus filas en el fichero, ya escritos (p.ej. para
+    indexarlas en core.catalog).
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.05, flush_bytes: int = 4096,
+                 fsync: str = 'close'):
+        """
+        :param path: fichero de salida
+        :param flush_interval: espera máxima (s) de una fila antes de escribirse
+        :param flush_bytes: tamaño de lote que fuerza la escritura
+        :param fsync: 'never' (sólo flush), 'batch' (fsync en cada lote) o
+            'close' (fsync al cerrar)
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync debe ser uno de {FSYNC_POLICIES}, no {fsync!r}")
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.fsync = fsync
+
+        self._queue = queue.Queue()
+        self._written = []      # (on_written, inicio, fin) del lote en curso
+        self._closed = False
+        self.error = None
+
+        # Contadores
+        self.rows = 0
+        self.batches = 0
+
+    def _start(self, file):
+        """Arranca el hilo escritor sobre `file` (ya abierto por la subclase)."""
+        self._file = file
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    def write_row(self, row: list):
+        """Encola una fila (no bloquea)."""
+        self._queue.put((row,))
+
+    def write_rows(self, rows: list):
+        """Encola varias filas de una vez (p.ej. una repetición completa)."""
+        if rows:
+            self._queue.put(rows)
+
+    def write_columns(self, columns: dict, on_written=None):
+        """
+        Encola filas dadas por columnas {columna: array o escalar}. La
+        conversión a filas (o a bloques binarios) la hace el hilo escritor;
+        los arrays no deben modificarse después.
+
+        :param on_written: función (inicio, fin) con los offsets en bytes de
+            estas filas; se llama desde el hilo escritor tras escribir el lote
+        """
+        batch = ColumnBatch(columns, on_written)
+        if len(batch):
+            self._queue.put(batch)
+
+    @abc.abstractmethod
+    def _add(self, rows) -> int:
+        """
+        Acumula filas (lista de filas o ColumnBatch) en el lote pendiente y
+        devuelve su tamaño en bytes.
+        """
+
+    @abc.abstractmethod
+    def _write_batch(self):
+        """
+        Escribe el lote pendiente en self._file y lo vacía, anotando en
+        self._written los (on_written, inicio, fin) de sus ColumnBatch.
+        """
+
+    def _write_footer(self):
+        """Gancho para escribir un pie/índice al cerrar."""
+
+    def _writer_loop(self):
+        first_pending = None
+        pending_rows = 0
+        size = 0
+        done = False
+        while not done:
+            timeout = None
+            if first_pending is not None:
+                timeout = max(0.0, first_pending + self.flush_interval - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _CLOSE:
+                done = True
+            elif item is not None:
+                size = self._add(item)
+                pending_rows += len(item)
+                if first_pending is None:
+                    first_pending = time.monotonic()
+            if pending_rows and (done or size >= self.flush_bytes
+                                 or time.monotonic() - first_pending >= self.flush_interval):
+                self._commit(pending_rows)
+                first_pending, pending_rows, size = None, 0, 0
+
+    def _commit(self, n_rows: int):
+        """Escribe un lote completo con un único write + flush."""
+        try:
+            self._write_batch()
+            self._file.flush()
+            if self.fsync == 'batch':
+                os.fsync(self._file.fileno())
+            self.rows += n_rows
+            self.batches += 1
+        except OSError as e:
+            # Se informa una vez; el resto de lotes fallarán igual
+            if self.error is None:
+                print(f"Error escribiendo {self.path}: {e}")
+            self.error = e
+            self._written = []
+            return
+        written, self._written = self._written, []
+        for on_written, start, end in written:
+            try:
+                on_written(start, end)
+            except Exception as e:
+                print(f"Error en el aviso de escritura de {self.path}: {e}")
+
+    def close(self):
+        """Vacía la cola, escribe lo pendiente y cierra el fichero."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        if self.error is None:
+            self._write_footer()
+            self._file.flush()
+            if self.fsync != 'never':
+                os.fsync(self._file.fileno())
+        self._file.close()
+
+
+class BatchedCSVWriter(BatchedWriter):
+    """BatchedWriter que escribe CSV de texto (mismo formato que csv.writer)."""
+
+    def __init__(self, path: str, header: list = None, flush_interval: float = 0.05,
+                 flush_bytes: int = 4096, fsync: str = 'close'):
+        """
+        :param path: fichero CSV (se abre en modo append)
+        :param header: cabecera a escribir si el fichero está vacío
+        """
+        super().__init__(path, flush_interval, flush_bytes, fsync)
+        self.columns = header
+        # En binario para conocer los offsets en bytes de lo escrito
+        file = open(path, 'ab')
+        self._buffer = io.StringIO()
+        self._csv = csv.writer(self._buffer)
+        if header is not None and os.stat(path).st_size == 0:
+            self._csv.writerow(header)
+            file.write(self._buffer.getvalue().encode())
+            file.flush()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+        self._marks = []    # (on_written, inicio, fin) en caracteres del buffer
+        self._start(file)
+
+    def _add(self, rows) -> int:
+        if isinstance(rows, ColumnBatch):
+            start = self._buffer.tell()
+            self._csv.writerows(rows.rows(self.columns or list(rows.columns)))
+            if rows.on_written is not None:
+                self._marks.append((rows.on_written, start, self._buffer.tell()))
+        else:
+            self._csv.writerows(rows)
+        return self._buffer.tell()
+
+    def _write_batch(self):
+        text = self._buffer.getvalue()
+        data = text.encode()
+        base = self._file.tell()
+        self._file.write(data)
+        for on_written, start, end in self._marks:
+            if len(data) != len(text):
+                # Hay caracteres no ASCII: caracteres → bytes
+                start, end = len(text[:start].encode()), len(text[:end].encode())
+            self._written.append((on_written, base + start, base + end))
+        self._marks = []
+        self._buffer.seek(0)
+        self._buffer.truncate()
@@ -0,0 +1,135 @@
+# core/feature_pool.py
+
+"""
+Extracción de features en paralelo con varios procesos.
+
+Las muestras (n, 4) [timestamp, yaw, pitch, roll] se copian una vez a
+memoria compartida y cada proceso recibe sólo el nombre del segmento y
+el rango de repeticiones de su tarea: no se serializa ningún DataFrame.
+Cada tarea aplica extract_features_batch a su trozo y devuelve una
+matriz pequeña (repeticiones × features); se unen en orden de repetición.
+
+    with FeaturePool(4) as pool:
+        X = pool.extract(df, starts)
+"""
+
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+from core.features import extract_features_batch, group_rows, AXES
+from core.imu.shm_ring import attach_segment
+
+SAMPLE_COLUMNS = ("timestamp",) + AXES
+
+# Muestras mínimas por tarea: por debajo, lanzar la tarea cuesta más que
+# lo que se reparte
+MIN_CHUNK_SAMPLES = 50000
+# Tareas por proceso, para repartir bien repeticiones de longitud desigual
+CHUNKS_PER_WORKER = 4
+
+
+def _extract_chunk(name: str, n: int, bounds: np.ndarray) -> pd.DataFrame:
+    """
+    Tarea de un proceso: features de las repeticiones que empiezan en
+    bounds[:-1] (bounds[-1] es el final de la última).
+    """
+    shm = attach_segment(name)
+    try:
+        samples = np.ndarray((n, len(SAMPLE_COLUMNS)), dtype=np.float64, buffer=shm.buf)
+        lo, hi = int(bounds[0]), int(bounds[-1])
+        view = samples[lo:hi]
+        X = extract_features_batch(dict(zip(SAMPLE_COLUMNS, view.T)), bounds[:-1] - lo)
+        # Sin vistas vivas el segmento se puede cerrar
+        del samples, view
+        return X
+    finally:
+        shm.close()
+
+
+def resolve_workers(workers) -> int:
+    """Número de procesos: None o 0 = todos los núcleos."""
+    return max(1, int(workers) if workers else os.cpu_count() or 1)
+
+
+class FeaturePool:
+    """
+    Procesos para extract_features_batch, reutilizables entre llamadas
+    (arrancarlos cuesta importar NumPy/pandas/SciPy en cada uno). Con un
+    único proceso, o pocas muestras, calcula en el propio proceso.
+    """
+
+    def __init__(self, workers: int = None, min_chunk_samples: int = MIN_CHUNK_SAMPLES):
+        """
+        :param workers: procesos; None o 0 = todos los núcleos
+        :param min_chunk_samples: muestras mínimas de cada tarea
+        """
+        self.workers = resolve_workers(workers)
+        self.min_chunk_samples = min_chunk_samples
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _chunks(self, starts: np.ndarray, n: int) -> list:
+        """Cortes (en índices de repetición) con ~n / tareas muestras cada uno."""
+        n_chunks = min(len(starts), self.workers * CHUNKS_PER_WORKER,
+                       max(1, n // self.min_chunk_samples))
+        targets = np.arange(1, n_chunks) * (n / n_chunks)
+        cuts = np.unique(np.searchsorted(starts, targets))
+        cuts = cuts[(cuts > 0) & (cuts < len(starts))]
+        return np.concatenate(([0], cuts, [len(starts)])).tolist()
+
+    def extract(self, data, starts=None, by: str = "rep_id") -> pd.DataFrame:
+        """Como extract_features_batch(data, starts, by), repartido entre los procesos."""
+        index = None
+        if starts is None:
+            columns, starts, index = group_rows(data, by)
+        else:
+            columns = data
+        starts = np.asarray(starts, dtype=np.intp)
+        n = len(columns["timestamp"])
+        cuts = self._chunks(starts, n) if len(starts) else [0, 0]
+        if self.workers == 1 or len(cuts) <= 2:
+            X = extract_features_batch(columns, starts)
+            if index is not None:
+                X.index = index
+            return X
+
+        if self._executor is None:
+            # 'spawn': no se hereda el estado de Qt del proceso de la GUI
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=mp.get_context('spawn'))
+        shm = shared_memory.SharedMemory(create=True, size=max(1, n * len(SAMPLE_COLUMNS) * 8))
+        try:
+            samples = np.ndarray((n, len(SAMPLE_COLUMNS)), dtype=np.float64, buffer=shm.buf)
+            for k, c in enumerate(SAMPLE_COLUMNS):
+                samples[:, k] = columns[c]
+            del samples
+            bounds = np.append(starts, n)
+            futures = [self._executor.submit(_extract_chunk, shm.name, n, bounds[a:b + 1])
+                       for a, b in zip(cuts[:-1], cuts[1:])]
+            X = pd.concat([f.result() for f in futures], ignore_index=True)
+        finally:
+            shm.close()
+            shm.unlink()
+        if index is not None:
+            X.index = index
+        return X
+
+
+def extract_features_parallel(data, starts=None, workers: int = None,
+                              by: str = "rep_id") -> pd.DataFrame:
+    """FeaturePool(workers).extract(...) con procesos que sólo viven esta llamada."""
+    with FeaturePool(workers) as pool:
+        return pool.extract(data, starts, by)
@@ -0,0 +1,178 @@
+# core/feature_store.py
+
+"""
+Caché en disco de las features de cada repetición.
+
+La clave es un hash de las muestras de la repetición y de
+FEATURES_VERSION, así que una repetición nueva o modificada, o un cambio
+en el cálculo, no encuentran nada y se calculan; el resto se lee. Las
+muestras se pueden dar como arrays (sample_keys) o, para no tener que
+parsearlas, como los bytes que ocupan en el fichero etiquetado según el
+catálogo (bytes_keys). Todo vive en un único .npz (claves, matriz de
+features y último uso) y al pasar de `capacity` se descartan las menos
+usadas recientemente:
+
+    store = FeatureStore('data/feature_cache.npz')
+    X = store.features(df, starts)      # como extract_features_batch
+    store.save()
+"""
+
+import os
+import time
+import hashlib
+import numpy as np
+import pandas as pd
+
+from core.features import extract_features_batch, FEATURES_VERSION
+
+SAMPLE_COLUMNS = ("timestamp", "yaw", "pitch", "roll")
+KEY_BYTES = 16
+
+
+def bytes_keys(buffers) -> list:
+    """Clave de cada repetición a partir de sus bytes."""
+    version = str(FEATURES_VERSION).encode()
+    return [hashlib.blake2b(buf, digest_size=KEY_BYTES, key=version).digest()
+            for buf in buffers]
+
+
+def sample_keys(samples: np.ndarray, starts: np.ndarray) -> list:
+    """Clave de cada repetición de `samples` (n, 4) que empieza en `starts`."""
+    bounds = np.append(starts, len(samples))
+    view = memoryview(np.ascontiguousarray(samples)).cast('B')
+    row = samples.shape[1] * samples.itemsize
+    return bytes_keys(view[i * row:j * row]
+                      for i, j in zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+class FeatureStore:
+    """
+    Features por repetición guardadas en `path` (.npz). No es segura entre
+    hilos: la usa el hilo de entrenamiento.
+    """
+
+    def __init__(self, path: str, capacity: int = 100000):
+        """
+        :param path: fichero .npz (se crea al guardar)
+        :param capacity: repeticiones guardadas como máximo
+        """
+        self.path = path
+        self.capacity = capacity
+        self.columns = None
+        self._keys = {}                       # clave → fila
+        self._values = np.empty((0, 0))
+        self._used = np.empty(0)
+        self.hits = self.misses = 0           # de la última llamada a missing()
+        self._dirty = False
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _load(self):
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if int(data['version']) != FEATURES_VERSION:
+                    return
+                keys, values, used = data['keys'], data['values'], data['used']
+                columns = data['columns'].tolist()
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Caché de features ilegible ({self.path}), se rehace: {e}")
+            return
+        self.columns = columns
+        self._keys = {k.tobytes(): i for i, k in enumerate(keys)}
+        self._values = values
+        self._used = used
+
+    def missing(self, keys: list) -> list:
+        """
+        Índices de `keys` que no están guardados, uno por clave distinta
+        (una repetición duplicada sólo se calcula una vez).
+        """
+        pending = {}
+        for i, key in enumerate(keys):
+            if key not in self._keys:
+                pending.setdefault(key, i)
+        self.hits, self.misses = len(keys) - len(pending), len(pending)
+        return list(pending.values())
+
+    def add(self, keys: list, X: pd.DataFrame):
+        """Guarda las features `X` (una fila por clave de `keys`)."""
+        if not len(keys):
+            return
+        if self.columns is None:
+            self.columns = list(X.columns)
+            self._values = np.empty((0, len(self.columns)))
+        elif self.columns != list(X.columns):
+            # Cambió el cálculo sin subir FEATURES_VERSION: se empieza de cero
+            print("Las features guardadas no coinciden con las actuales: se descartan")
+            self.columns = list(X.columns)
+            self._keys, self._used = {}, np.empty(0)
+            self._values = np.empty((0, len(self.columns)))
+        first = len(self._values)
+        for n, key in enumerate(keys):
+            self._keys[key] = first + n
+        self._values = np.concatenate((self._values, X.to_numpy(dtype=np.float64)))
+        self._used = np.concatenate((self._used, np.zeros(len(keys))))
+        self._dirty = True
+
+    def take(self, keys: list) -> pd.DataFrame:
+        """Features de `keys` (todas guardadas), en ese orden; cuentan como usadas."""
+        rows = np.array([self._keys[k] for k in keys], dtype=np.intp)
+        self._used[rows] = time.time()
+        self._dirty = True
+        X = pd.DataFrame(self._values[rows], columns=self.columns)
+        # Los recuentos de picos vuelven a ser enteros, como en extract_features
+        for c in X.columns:
+            if c.endswith("_num_peaks"):
+                X[c] = X[c].astype(np.int64)
+        return X
+
+    def features(self, data, starts) -> pd.DataFrame:
+        """
+        Como extract_features_batch(data, starts), calculando sólo las
+        repeticiones que no están guardadas.
+        """
+        samples = np.column_stack([np.asarray(data[c], dtype=np.float64)
+                                   for c in SAMPLE_COLUMNS])
+        starts = np.asarray(starts, dtype=np.intp)
+        keys = sample_keys(samples, starts)
+        missing = self.missing(keys)
+        if missing:
+            # Sólo las filas de las repeticiones que faltan, contiguas
+            bounds = np.append(starts, len(samples))
+            take = np.concatenate([np.arange(bounds[i], bounds[i + 1]) for i in missing])
+            lengths = bounds[np.add(missing, 1)] - bounds[missing]
+            self.add([keys[i] for i in missing],
+                     extract_features_batch(dict(zip(SAMPLE_COLUMNS, samples[take].T)),
+                                            np.cumsum(lengths) - lengths))
+        return self.take(keys)
+
+    def _evict(self):
+        """Se queda con las `capacity` repeticiones usadas más recientemente."""
+        if len(self._keys) <= self.capacity:
+            return
+        keep = np.sort(np.argsort(self._used, kind='stable')[-self.capacity:])
+        remap = np.full(len(self._used), -1)
+        remap[keep] = np.arange(len(keep))
+        self._keys = {k: int(remap[i]) for k, i in self._keys.items() if remap[i] >= 0}
+        self._values = self._values[keep]
+        self._used = self._used[keep]
+
+    def save(self):
+        """Escribe la caché (de forma atómica) si ha cambiado."""
+        if not self._dirty or self.columns is None:
+            return
+        self._evict()
+        keys = np.zeros((len(self._keys), KEY_BYTES), dtype=np.uint8)
+        for k, i in self._keys.items():
+            keys[i] = np.frombuffer(k, dtype=np.uint8)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, version=FEATURES_VERSION, keys=keys, values=self._values,
+                     used=self._used, columns=np.array(self.columns))
+        os.replace(tmp, self.path)
+        self._dirty = False
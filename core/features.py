@@ -1,47 +1,391 @@
 # core/features.py
 
+from typing import Callable, NamedTuple
 import numpy as np
+import pandas as pd
 from scipy.signal import find_peaks
 
-def extract_features(group):
+AXES = ("yaw", "pitch", "roll")
+
+# Versión del cálculo de features: subirla al cambiar cualquier feature
+# invalida lo guardado en core.feature_store
+FEATURES_VERSION = 1
+
+
+class Feature(NamedTuple):
+    """
+    Entrada del registro de features:
+    - name: columna en los DataFrames de features y en el modelo
+    - cost: coste relativo de calcularla (µs con extract_features en una
+      repetición de ~3 s a 100 Hz)
+    - deps: estadísticos que necesita (de STATS); son los únicos que
+      FeatureAccumulator mantiene al pedirle un subconjunto
+    - compute: función (RepData) → valor, para extract_features
+    """
+    name: str
+    cost: float
+    deps: tuple
+    compute: Callable
+
+
+# Estadísticos de los que dependen las features
+STATS = (
+    "time",       # primera/última/máxima marca de tiempo
+    "moments",    # medias y co-momentos (Welford/Chan en FeatureAccumulator)
+    "range",      # mínimo y máximo
+    "energy",     # suma de cuadrados
+    "velocity",   # |dx/dt|
+) + tuple(f"peaks_{axis}" for axis in AXES)    # tramos de valores iguales del eje
+
+
+class RepData:
+    """Columnas de una repetición con los intermedios compartidos entre features."""
+
+    def __init__(self, group):
+        timestamp = np.asarray(group["timestamp"])
+        self.x = {axis: np.asarray(group[axis]) for axis in AXES}
+        # Normalizamos tiempo en segundos
+        t = (timestamp - timestamp[0])  # en s si ya está en s
+        if t.max() > 1e3:  # si está en ms
+            t = t / 1000.0
+        self.t = t
+        self._vel = {}
+
+    def vel(self, axis: str) -> np.ndarray:
+        """Velocidad |dx/dt| del eje (dt == 0 se sustituye por 1e-6)."""
+        vel = self._vel.get(axis)
+        if vel is None:
+            dx = np.diff(self.x[axis])
+            dt = np.diff(self.t)
+            # evitar división por cero
+            vel = self._vel[axis] = np.abs(dx / np.where(dt == 0, 1e-6, dt))
+        return vel
+
+
+FEATURES = {}
+
+
+def register(name: str, cost: float, deps: tuple, compute: Callable):
+    """Añade una feature al registro (el orden de registro es el de las columnas)."""
+    unknown = set(deps) - set(STATS)
+    if unknown:
+        raise ValueError(f"Estadísticos desconocidos para {name}: {unknown}")
+    FEATURES[name] = Feature(name, cost, tuple(deps), compute)
+
+
+register("duration", 1, ("time",), lambda r: r.t[-1] - r.t[0])
+for _axis in AXES:
+    register(f"{_axis}_mean", 7, ("moments",), lambda r, a=_axis: r.x[a].mean())
+    register(f"{_axis}_std", 20, ("moments",), lambda r, a=_axis: r.x[a].std())
+    register(f"{_axis}_range", 6, ("range",), lambda r, a=_axis: r.x[a].max() - r.x[a].min())
+    register(f"{_axis}_vel_mean", 25, ("time", "velocity"),
+             lambda r, a=_axis: r.vel(a).mean() if len(r.vel(a)) else 0.0)
+    register(f"{_axis}_vel_max", 25, ("time", "velocity"),
+             lambda r, a=_axis: r.vel(a).max() if len(r.vel(a)) else 0.0)
+    register(f"{_axis}_num_peaks", 12, (f"peaks_{_axis}",),
+             lambda r, a=_axis: len(find_peaks(r.x[a])[0]))
+for _a, _b in (("yaw", "pitch"), ("yaw", "roll"), ("pitch", "roll")):
+    register(f"corr_{_a}_{_b}", 70, ("moments",),
+             lambda r, a=_a, b=_b: np.corrcoef(r.x[a], r.x[b])[0, 1])
+register("energy_total", 27, ("energy",),
+         lambda r: (r.x["yaw"]**2).mean() + (r.x["pitch"]**2).mean() + (r.x["roll"]**2).mean())
+
+FEATURE_NAMES = tuple(FEATURES)
+
+
+def resolve_features(names=None) -> tuple:
+    """Nombres validados, en el orden pedido (None = todas)."""
+    if names is None:
+        return FEATURE_NAMES
+    names = tuple(names)
+    unknown = [n for n in names if n not in FEATURES]
+    if unknown:
+        raise ValueError(f"Features desconocidas: {unknown}")
+    return names
+
+
+def required_stats(names=None) -> set:
+    """Estadísticos que hay que mantener para calcular `names`."""
+    return {dep for name in resolve_features(names) for dep in FEATURES[name].deps}
+
+
+def features_cost(names=None) -> float:
+    """Coste relativo de calcular `names` (suma de los de cada feature)."""
+    return sum(FEATURES[n].cost for n in resolve_features(names))
+
+
+def extract_features(group, names=None):
     """
     Dada la subtabla DataFrame de una repetición (múltiples sensores),
     calcula características estadísticas y dinámicas sobre yaw, pitch, roll.
+    También acepta un dict {columna: array} (p.ej. SegmentBuffer.columns()).
+
+    :param names: features a calcular, en ese orden (None = todo el registro)
+    """
+    rep = RepData(group)
+    return {name: FEATURES[name].compute(rep) for name in resolve_features(names)}
+
+
+def _local_maxima(x: np.ndarray, starts: np.ndarray, seg: np.ndarray) -> np.ndarray:
+    """
+    Número de picos por segmento, igual que len(find_peaks(x)[0]) en cada
+    uno: una meseta de valores iguales cuenta una vez si sus dos vecinos
+    (dentro del segmento) son menores; los extremos no cuentan.
+    """
+    # Tramos de valores iguales consecutivos que no cruzan segmentos
+    new_run = np.empty(len(x), dtype=bool)
+    np.not_equal(x[1:], x[:-1], out=new_run[1:])
+    new_run[starts] = True
+    run_start = np.flatnonzero(new_run)
+    v = x[run_start]
+    seg = seg[run_start]
+    peak = np.zeros(len(run_start), dtype=bool)
+    same_prev = seg[1:-1] == seg[:-2]
+    same_next = seg[1:-1] == seg[2:]
+    peak[1:-1] = same_prev & same_next & (v[:-2] < v[1:-1]) & (v[2:] < v[1:-1])
+    return np.bincount(seg[peak], minlength=len(starts))
+
+
+def group_rows(data, by: str = "rep_id") -> tuple:
+    """
+    Ordena una vez las filas por `by` (orden estable, como groupby).
+    Devuelve ({timestamp, yaw, pitch, roll: array float64}, índice de la
+    primera fila de cada repetición, pd.Index con sus valores de `by`).
+    """
+    keys = np.asarray(data[by])
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    starts = np.flatnonzero(first)
+    columns = {c: np.asarray(data[c], dtype=np.float64)[order] for c in ("timestamp",) + AXES}
+    return columns, starts, pd.Index(keys[starts], name=by)
+
+
+def extract_features_batch(data, starts=None, by: str = "rep_id") -> pd.DataFrame:
     """
-    feat = {}
-    # Normalizamos tiempo en segundos
-    t = (group["timestamp"].values - group["timestamp"].values[0])  # en s si ya está en s
-    if t.max() > 1e3:  # si está en ms
-        t = t / 1000.0
-
-    feat["duration"] = t[-1] - t[0]
-
-    for axis in ("yaw", "pitch", "roll"):
-        x = group[axis].values
-        feat[f"{axis}_mean"]  = x.mean()
-        feat[f"{axis}_std"]   = x.std()
-        feat[f"{axis}_range"] = x.max() - x.min()
-
-        # Velocidades
-        dx = np.diff(x)
-        dt = np.diff(t)
-        # evitar división por cero
-        vel = np.abs(dx / np.where(dt == 0, 1e-6, dt))
-        feat[f"{axis}_vel_mean"] = vel.mean() if len(vel) else 0.0
-        feat[f"{axis}_vel_max"]  = vel.max()  if len(vel) else 0.0
-
-        # Picos
-        peaks = find_peaks(x)[0]
-        feat[f"{axis}_num_peaks"] = len(peaks)
-
-    # Correlaciones
-    feat["corr_yaw_pitch"]  = np.corrcoef(group["yaw"],   group["pitch"])[0, 1]
-    feat["corr_yaw_roll"]   = np.corrcoef(group["yaw"],   group["roll"])[0, 1]
-    feat["corr_pitch_roll"] = np.corrcoef(group["pitch"], group["roll"])[0, 1]
-
-    # Energía combinada
-    feat["energy_total"] = (group["yaw"]**2).mean() + \
-                           (group["pitch"]**2).mean() + \
-                           (group["roll"]**2).mean()
-
-    return feat
+    extract_features de muchas repeticiones a la vez, sin un groupby ni
+    una llamada por repetición: todas las features salen de sumas y
+    máximos por segmento (np.add.reduceat / np.maximum.reduceat) sobre las
+    columnas enteras.
+
+    :param data: DataFrame o dict {columna: array} con timestamp, yaw, pitch, roll
+    :param starts: índice de la primera fila de cada repetición, si ya
+        están contiguas (p.ej. de core.catalog); si no, se ordena una vez
+        por la columna `by` (orden estable, como groupby)
+    :return: DataFrame con una fila por repetición y las columnas de
+        extract_features; con `starts` None, indexado por los valores de `by`
+    """
+    index = None
+    if starts is None:
+        columns, starts, index = group_rows(data, by)
+    else:
+        columns = {c: np.asarray(data[c], dtype=np.float64) for c in ("timestamp",) + AXES}
+    starts = np.asarray(starts, dtype=np.intp)
+    n = len(columns["timestamp"])
+    counts = np.diff(np.append(starts, n))
+    if not len(starts) or (counts <= 0).any():
+        raise ValueError("Cada repetición necesita al menos una muestra")
+    seg = np.repeat(np.arange(len(starts)), counts)
+
+    def expand(values):
+        return np.repeat(values, counts)
+
+    def seg_sum(x):
+        return np.add.reduceat(x, starts)
+
+    def seg_mean(x):
+        return seg_sum(x) / counts
+
+    # Tiempo desde la primera muestra de cada repetición; en s si venía en ms
+    timestamp = columns["timestamp"]
+    t = timestamp - expand(timestamp[starts])
+    scale = np.where(np.maximum.reduceat(t, starts) > 1e3, 1000.0, 1.0)
+    t /= expand(scale)
+    last = np.append(starts[1:], n) - 1
+
+    # Diferencias dentro de cada repetición; la de la última fila de cada
+    # una (que enlazaría con la siguiente) se deja a 0 para las reducciones
+    dt = np.diff(t)
+    dt = np.where(dt == 0, 1e-6, dt)
+    n_vel = counts - 1
+
+    feat = {"duration": t[last]}
+    centered = {}
+    for axis in AXES:
+        x = columns[axis]
+        mean = seg_mean(x)
+        centered[axis] = x - expand(mean)
+        feat[f"{axis}_mean"] = mean
+        feat[f"{axis}_std"] = np.sqrt(seg_mean(centered[axis] ** 2))
+        feat[f"{axis}_range"] = np.maximum.reduceat(x, starts) - np.minimum.reduceat(x, starts)
+
+        vel = np.empty(n)
+        np.divide(np.diff(x), dt, out=vel[:-1])
+        np.abs(vel, out=vel)
+        vel[last] = 0.0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            feat[f"{axis}_vel_mean"] = np.where(n_vel > 0, seg_sum(vel) / n_vel, 0.0)
+        feat[f"{axis}_vel_max"] = np.where(n_vel > 0, np.maximum.reduceat(vel, starts), 0.0)
+        feat[f"{axis}_num_peaks"] = _local_maxima(x, starts, seg)
+
+    # Correlación de Pearson como np.corrcoef (acotada a [-1, 1]; NaN si
+    # algún eje no varía)
+    sq = {axis: seg_sum(centered[axis] ** 2) for axis in AXES}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for a, b in (("yaw", "pitch"), ("yaw", "roll"), ("pitch", "roll")):
+            r = seg_sum(centered[a] * centered[b]) / np.sqrt(sq[a]) / np.sqrt(sq[b])
+            feat[f"corr_{a}_{b}"] = np.clip(r, -1, 1)
+
+    feat["energy_total"] = sum(seg_mean(columns[axis] ** 2) for axis in AXES)
+    return pd.DataFrame(feat, index=index)
+
+
+class FeatureAccumulator:
+    """
+    Las features de extract_features de una repetición que llega por
+    bloques, sin guardar sus muestras: cada bloque (n, 4) [timestamp, yaw,
+    pitch, roll] se funde en unos pocos acumuladores (trabajo O(n) por
+    bloque, memoria O(1)) y features() es de tiempo constante.
+
+    - medias, varianzas y co-momentos (correlaciones) con Welford,
+      fundiendo el bloque entero con la fórmula de Chan
+    - mínimo, máximo y suma de cuadrados (energía)
+    - velocidades: suma y máximo de |dx/dt|, aparte los pares con dt == 0,
+      porque la escala de tiempo (s o ms) se decide al final con la duración
+    - picos: los dos últimos tramos de valores iguales de cada eje, así
+      una meseta que cruza bloques cuenta como en find_peaks
+
+    El resultado coincide con extract_features sobre las mismas muestras en
+    el mismo orden (salvo redondeo). Con `names` sólo se mantienen los
+    estadísticos de esas features (ver Feature.deps), así que el coste en
+    vivo depende de lo que use el modelo.
+    """
+
+    def __init__(self, names=None):
+        """:param names: features a calcular (None = todo el registro)"""
+        self.names = resolve_features(names)
+        self._stats = frozenset(required_stats(self.names))
+        self.n = 0
+        self._t0 = None
+        self._t_last = None
+        self._t_max = -np.inf
+        self._x_last = None
+        self._mean = np.zeros(3)
+        self._comoment = np.zeros((3, 3))   # Σ (x_i - media)(x_j - media)
+        self._min = np.full(3, np.inf)
+        self._max = np.full(3, -np.inf)
+        self._sq = np.zeros(3)
+        self._vel_sum = np.zeros(3)          # Σ |dx/dt| con dt != 0 (unidades de entrada)
+        self._vel_max = np.full(3, -np.inf)
+        self._still_sum = np.zeros(3)        # Σ |dx| con dt == 0
+        self._still_max = np.full(3, -np.inf)
+        self._runs = [(None, None)] * 3      # (tramo anterior, tramo actual) por eje
+        self._peaks = [0, 0, 0]
+
+    def copy(self) -> 'FeatureAccumulator':
+        other = FeatureAccumulator.__new__(FeatureAccumulator)
+        other.__dict__ = {k: v.copy() if isinstance(v, (np.ndarray, list)) else v
+                          for k, v in self.__dict__.items()}
+        return other
+
+    def update(self, block: np.ndarray):
+        """Añade un bloque (n, 4) con columnas [timestamp, yaw, pitch, roll]."""
+        nb = len(block)
+        if not nb:
+            return
+        ts = block[:, 0]
+        x = block[:, 1:4]
+        stats = self._stats
+
+        # Velocidades, enlazando con la última muestra del bloque anterior
+        if self._t_last is None:
+            self._t0 = ts[0]
+            t_pairs, x_pairs = ts, x
+        elif "velocity" in stats:
+            t_pairs = np.concatenate(([self._t_last], ts))
+            x_pairs = np.concatenate((self._x_last[None, :], x))
+        if "velocity" in stats and len(t_pairs) > 1:
+            dt = np.diff(t_pairs)
+            dx = np.diff(x_pairs, axis=0)
+            still = dt == 0
+            if still.any():
+                moved = np.abs(dx[still])
+                self._still_sum += moved.sum(axis=0)
+                self._still_max = np.maximum(self._still_max, moved.max(axis=0))
+                dt, dx = dt[~still], dx[~still]
+            if len(dt):
+                vel = np.abs(dx / dt[:, None])
+                self._vel_sum += vel.sum(axis=0)
+                self._vel_max = np.maximum(self._vel_max, vel.max(axis=0))
+        self._t_last = ts[-1]
+        self._x_last = x[-1].copy()
+        self._t_max = max(self._t_max, ts.max())
+
+        # Welford por bloques (Chan et al.): media y co-momentos
+        n = self.n + nb
+        if "moments" in stats:
+            mean_b = x.mean(axis=0)
+            centered = x - mean_b
+            comoment_b = centered.T @ centered
+            d = mean_b - self._mean
+            self._comoment += comoment_b + np.outer(d, d) * (self.n * nb / n)
+            self._mean += d * (nb / n)
+        self.n = n
+
+        if "range" in stats:
+            self._min = np.minimum(self._min, x.min(axis=0))
+            self._max = np.maximum(self._max, x.max(axis=0))
+        if "energy" in stats:
+            self._sq += (x * x).sum(axis=0)
+
+        for k, axis in enumerate(AXES):
+            if f"peaks_{axis}" in stats:
+                self._count_peaks(k, x[:, k])
+
+    def _count_peaks(self, k: int, x: np.ndarray):
+        before, current = self._runs[k]
+        new_run = np.ones(len(x), dtype=bool)
+        new_run[1:] = x[1:] != x[:-1]
+        v = x[new_run]
+        if current is not None and v[0] == current:
+            v = v[1:]          # el bloque sigue la meseta en curso
+        head = [r for r in (before, current) if r is not None]
+        v = np.concatenate((head, v))
+        if len(v) >= 3:
+            mid = v[1:-1]
+            self._peaks[k] += int(np.count_nonzero((v[:-2] < mid) & (v[2:] < mid)))
+        self._runs[k] = (v[-2] if len(v) >= 2 else None, v[-1])
+
+    def features(self) -> dict:
+        """Features `names` de lo acumulado, como extract_features(..., names)."""
+        if not self.n:
+            raise ValueError("FeatureAccumulator vacío")
+        # Mismo criterio que extract_features: ms si la repetición dura más de 1e3
+        scale = 1000.0 if self._t_max - self._t0 > 1e3 else 1.0
+        n_vel = self.n - 1
+        feat = {"duration": (self._t_last - self._t0) / scale}
+        var = np.diag(self._comoment) / self.n
+        for k, axis in enumerate(AXES):
+            feat[f"{axis}_mean"] = self._mean[k]
+            feat[f"{axis}_std"] = np.sqrt(var[k])
+            feat[f"{axis}_range"] = self._max[k] - self._min[k]
+            if n_vel:
+                feat[f"{axis}_vel_mean"] = (self._vel_sum[k] * scale
+                                            + self._still_sum[k] / 1e-6) / n_vel
+                feat[f"{axis}_vel_max"] = max(self._vel_max[k] * scale,
+                                              self._still_max[k] / 1e-6)
+            else:
+                feat[f"{axis}_vel_mean"] = 0.0
+                feat[f"{axis}_vel_max"] = 0.0
+            feat[f"{axis}_num_peaks"] = self._peaks[k]
+
+        c = self._comoment
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for i, j in ((0, 1), (0, 2), (1, 2)):
+                r = c[i, j] / np.sqrt(c[i, i]) / np.sqrt(c[j, j])
+                feat[f"corr_{AXES[i]}_{AXES[j]}"] = float(np.clip(r, -1, 1))
+
+        feat["energy_total"] = (self._sq / self.n).sum()
+        # Lo que no está en `names` sale de estadísticos sin mantener y se descarta
+        return {name: feat[name] for name in self.names}
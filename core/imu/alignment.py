@@ -0,0 +1,253 @@
+# core/imu/alignment.py
+
+import heapq
+import math
+from collections import deque
+from typing import List
+import numpy as np
+
+
+class ClockSync:
+    """
+    Estimación online del reloj de un ESP32 frente al reloj del host:
+
+        host ≈ offset + (1 + deriva) · device
+
+    mediante mínimos cuadrados con olvido exponencial (medias y
+    covarianzas ponderadas tipo Welford, memoria constante). La latencia
+    media de transmisión queda incluida en el offset, igual para todos los
+    sensores, por lo que no afecta a la alineación entre ellos.
+    """
+
+    def __init__(self, half_life: float = 30.0, max_drift_ppm: float = 1000.0):
+        """
+        :param half_life: segundos (de reloj del dispositivo) tras los que
+            una observación pesa la mitad
+        :param max_drift_ppm: deriva máxima admitida; acota la pendiente
+            mientras hay pocas observaciones
+        """
+        self.half_life = half_life
+        self.max_drift = max_drift_ppm * 1e-6
+        self.resets = 0
+        self._clear()
+
+    def _clear(self):
+        self._w = 0.0
+        self._mx = self._my = 0.0
+        self._cxx = self._cxy = 0.0
+        self._last_x = None
+
+    def reset(self):
+        """Olvida el ajuste (p.ej. tras un reinicio del ESP32)."""
+        self._clear()
+        self.resets += 1
+
+    def update(self, device_s: np.ndarray, host_s: np.ndarray):
+        """Añade observaciones (tiempo del dispositivo, llegada al host) en segundos."""
+        w, mx, my, cxx, cxy, last_x = self._w, self._mx, self._my, self._cxx, self._cxy, self._last_x
+        k = math.log(2) / self.half_life
+        for x, y in zip(device_s.tolist(), host_s.tolist()):
+            if last_x is not None and x < last_x - 1.0:
+                # El reloj del dispositivo ha vuelto atrás: reinicio del ESP32
+                self.reset()
+                w = mx = my = cxx = cxy = 0.0
+            lam = math.exp(-k * (x - last_x)) if last_x is not None and x > last_x else 1.0
+            w = lam * w + 1.0
+            dx = x - mx
+            mx += dx / w
+            dy = y - my
+            my += dy / w
+            cxx = lam * cxx + dx * (x - mx)
+            cxy = lam * cxy + dx * (y - my)
+            last_x = x
+        self._w, self._mx, self._my, self._cxx, self._cxy, self._last_x = w, mx, my, cxx, cxy, last_x
+
+    @property
+    def slope(self) -> float:
+        if self._cxx <= 1e-9:
+            return 1.0
+        return min(max(self._cxy / self._cxx, 1.0 - self.max_drift), 1.0 + self.max_drift)
+
+    @property
+    def drift_ppm(self) -> float:
+        return (self.slope - 1.0) * 1e6
+
+    @property
+    def ready(self) -> bool:
+        return self._w > 0
+
+    def to_host(self, device_s):
+        """Convierte tiempo del dispositivo (s) a la escala común del host (s)."""
+        return self._my + self.slope * (np.asarray(device_s) - self._mx)
+
+
+class StreamAligner:
+    """
+    Alinea los flujos de varios sensores sobre una rejilla temporal común.
+
+    1. Por sensor, ClockSync traduce los millis() del ESP32 al reloj del host.
+    2. Mezcla k-way con un heap de tamaño k (una cabeza por sensor): cada
+       flujo ya llega ordenado, así que el heap sólo ordena entre sensores.
+       Una muestra se libera cuando su tiempo queda por detrás de la marca
+       de agua `ahora - latency` (ventana de reordenación).
+    3. Remuestreo por interpolación lineal a una rejilla de periodo `period`.
+       Un punto de rejilla se emite cuando todos los sensores lo han
+       superado o, como muy tarde, `max_gap` después de la marca de agua;
+       un sensor sin datos cercanos (> max_gap) aporta NaN. Si ninguno
+       tiene datos cercanos la rejilla salta hasta la marca de agua sin
+       emitir esos puntos (contador `skipped`): tras una parada larga no se
+       generan miles de tramas vacías.
+
+    Latencia acotada por latency + max_gap y memoria constante: colas por
+    sensor con capacidad fija (se descartan las más antiguas si se llenan).
+    """
+
+    def __init__(self, sensor_ids: List[str], period: float = 0.01, latency: float = 0.1,
+                 max_gap: float = 0.05, capacity: int = 4096, clock_half_life: float = 30.0):
+        """
+        :param sensor_ids: sensores a alinear (orden de las columnas de salida)
+        :param period: periodo de la rejilla de salida en s (0.01 = 100 Hz)
+        :param latency: ventana de reordenación / presupuesto de latencia en s
+        :param max_gap: hueco máximo (s) que se interpola o se mantiene
+        :param capacity: muestras pendientes máximas por sensor
+        :param clock_half_life: semivida del ajuste de reloj (s)
+        """
+        self.sensor_ids = list(sensor_ids)
+        self._index = {sid: i for i, sid in enumerate(self.sensor_ids)}
+        self.period = period
+        self.latency = latency
+        self.max_gap = max_gap
+        self.clocks = {sid: ClockSync(clock_half_life) for sid in self.sensor_ids}
+
+        k = len(self.sensor_ids)
+        self._pending = [deque(maxlen=capacity) for _ in range(k)]   # sin liberar
+        self._released = [deque(maxlen=capacity) for _ in range(k)]  # ventana de interpolación
+        self._heap = []          # (t, sensor_idx) de la cabeza de cada cola pendiente
+        self._in_heap = [False] * k
+        self._last_t = [-math.inf] * k
+        self._watermark = -math.inf
+        self._next_grid = None
+
+        # Contadores
+        self.late = 0          # muestras llegadas tras pasar su ventana
+        self.out_of_order = 0  # muestras no crecientes dentro de un sensor
+        self.overflow = 0      # muestras descartadas por capacidad
+        self.skipped = 0       # puntos de rejilla sin datos de ningún sensor
+
+    def push(self, sensor_id: str, block: np.ndarray, host_times: np.ndarray):
+        """
+        Añade un bloque (n, 4) [timestamp ms, yaw, pitch, roll] de un sensor
+        con el instante de llegada al host (s) de cada muestra.
+        """
+        if not len(block):
+            return
+        i = self._index[sensor_id]
+        clock = self.clocks[sensor_id]
+        device_s = block[:, 0] / 1000.0
+        clock.update(device_s, host_times)
+        common = clock.to_host(device_s)
+
+        pending = self._pending[i]
+        last = self._last_t[i]
+        for t, values in zip(common.tolist(), block[:, 1:].tolist()):
+            if t <= last:
+                self.out_of_order += 1
+                continue
+            if t <= self._watermark:
+                self.late += 1
+                continue
+            if len(pending) == pending.maxlen:
+                self.overflow += 1
+            pending.append((t, values))
+            last = t
+        self._last_t[i] = last
+        if pending and not self._in_heap[i]:
+            heapq.heappush(self._heap, (pending[0][0], i))
+            self._in_heap[i] = True
+
+    def pop_frames(self, now: float):
+        """
+        Libera lo que queda fuera de la ventana en `now` (time.monotonic())
+        y devuelve los puntos de rejilla completos:
+            (tiempos (m,), valores (m, n_sensores, 3) [yaw, pitch, roll])
+        """
+        watermark = now - self.latency
+        self._watermark = max(self._watermark, watermark)
+        heap = self._heap
+
+        # Mezcla k-way de todo lo que ya es definitivo
+        while heap and heap[0][0] <= watermark:
+            _, i = heapq.heappop(heap)
+            pending = self._pending[i]
+            released = self._released[i]
+            released.append(pending.popleft())
+            if pending:
+                heapq.heappush(heap, (pending[0][0], i))
+            else:
+                self._in_heap[i] = False
+
+        if self._next_grid is None:
+            starts = [r[0][0] for r in self._released if r]
+            if not starts:
+                return np.empty(0), np.empty((0, len(self.sensor_ids), 3))
+            self._next_grid = math.ceil(min(starts) / self.period) * self.period
+
+        times, frames = [], []
+        g = self._next_grid
+        while g <= watermark:
+            newest = max((r[-1][0] for r in self._released if r), default=-math.inf)
+            if newest < g - self.max_gap:
+                # Todos los sensores callados: hasta watermark - max_gap sólo
+                # saldrían tramas NaN
+                skip = math.ceil((watermark - self.max_gap - g) / self.period)
+                if skip > 0:
+                    g += skip * self.period
+                    self.skipped += skip
+                    continue
+            # Esperamos a que todos los sensores pasen g, salvo que venza max_gap
+            if g > watermark - self.max_gap and not all(
+                    r and r[-1][0] >= g for r in self._released):
+                break
+            times.append(g)
+            frames.append([self._interpolate(r, g) for r in self._released])
+            g += self.period
+        self._next_grid = g
+
+        if not times:
+            return np.empty(0), np.empty((0, len(self.sensor_ids), 3))
+        return np.asarray(times), np.asarray(frames, dtype=np.float64)
+
+    def _interpolate(self, released: deque, g: float) -> list:
+        # Descartamos lo anterior a la pareja que rodea a g
+        while len(released) >= 2 and released[1][0] <= g:
+            released.popleft()
+        if not released or released[0][0] > g:
+            # Sin muestra anterior a g: sólo válida si la siguiente está cerca
+            if released and released[0][0] - g <= self.max_gap:
+                return released[0][1]
+            return [math.nan] * 3
+        t0, v0 = released[0]
+        if len(released) >= 2:
+            t1, v1 = released[1]
+            if t1 - t0 <= 2 * self.max_gap:
+                a = (g - t0) / (t1 - t0)
+                return [x0 + a * (x1 - x0) for x0, x1 in zip(v0, v1)]
+        # Mantener el último valor si no es demasiado antiguo
+        return v0 if g - t0 <= self.max_gap else [math.nan] * 3
+
+    def stats(self) -> dict:
+        """Deriva y estado de cada sensor más los contadores de descarte."""
+        return {
+            'sensors': {
+                sid: {
+                    'drift_ppm': self.clocks[sid].drift_ppm,
+                    'clock_resets': self.clocks[sid].resets,
+                    'pending': len(self._pending[i]),
+                }
+                for sid, i in self._index.items()
+            },
+            'late': self.late,
+            'out_of_order': self.out_of_order,
+            'overflow': self.overflow,
+            'skipped': self.skipped,
+        }
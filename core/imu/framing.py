@@ -0,0 +1,83 @@
+# core/imu/framing.py
+
+class LineFramer:
+    """
+    Separador de líneas a nivel de bytes para el flujo serie.
+
+    Acumula los bytes recibidos en un único bytearray y, en cada llamada a
+    feed(), localiza todos los saltos de línea de una sola pasada. Sólo se
+    copia una vez la parte completa del buffer; la cola incompleta (menos de
+    una línea) se queda en su sitio, de modo que el coste es lineal en los
+    bytes recibidos aunque llegue una ráfaga tras una pausa.
+    """
+
+    def __init__(self, max_frame: int = 256):
+        """
+        :param max_frame: longitud máxima de una línea válida en bytes. Si se
+            acumulan más bytes sin salto de línea se descartan como parciales.
+        """
+        self.max_frame = max_frame
+        self._buffer = bytearray()
+
+        # Contadores
+        self.frames = 0    # líneas completas entregadas
+        self.partial = 0   # fragmentos descartados sin llegar a completarse
+        self.garbage = 0   # líneas completas pero inválidas (vacías, binarias o demasiado largas)
+
+    def feed(self, data: bytes) -> list:
+        """
+        Añade `data` al buffer y devuelve la lista de líneas completas
+        (bytes, sin '\\r\\n') que contiene. Las líneas vacías, con bytes no
+        ASCII o más largas que `max_frame` se cuentan como basura.
+        """
+        buf = self._buffer
+        buf += data
+        if b"\n" not in data:
+            # Sin salto de línea: si crece demasiado es ruido, lo tiramos
+            if len(buf) > self.max_frame:
+                self.partial += 1
+                buf.clear()
+            return []
+
+        last = buf.rfind(b"\n")
+
+        # Una sola copia de la parte completa; la cola (< 1 línea) se queda
+        # en el buffer y no se vuelve a copiar
+        if last == len(buf) - 1:
+            block = bytes(buf)
+            buf.clear()
+        else:
+            block = bytes(buf[:last + 1])
+            del buf[:last + 1]
+
+        # splitlines recorre el bloque una sola vez y quita '\r\n'
+        lines = block.splitlines()
+        max_frame = self.max_frame
+        if block.isascii() and all(lines) and (
+                len(block) <= max_frame or max(map(len, lines)) <= max_frame):
+            self.frames += len(lines)
+            return lines
+
+        valid = []
+        for line in lines:
+            if not line or len(line) > max_frame or not line.isascii():
+                self.garbage += 1
+                continue
+            valid.append(line)
+        self.frames += len(valid)
+        return valid
+
+    def reset(self):
+        """Descarta el contenido pendiente (p.ej. tras vaciar el puerto)."""
+        if self._buffer:
+            self.partial += 1
+            self._buffer.clear()
+
+    def stats(self) -> dict:
+        """Devuelve los contadores del framer."""
+        return {
+            'frames': self.frames,
+            'partial': self.partial,
+            'garbage': self.garbage,
+            'pending_bytes': len(self._buffer),
+        }
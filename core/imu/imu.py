@@ -2,109 +2,226 @@
 
 import time
 import threading
-import queue
+import numpy as np
 import serial
 
+from core.imu.parsing import parse_text_block, block_to_readings, empty_block, N_COLUMNS
+from core.imu.protocol import AutoFramer
+from core.imu.ring import SampleRing
+from core.imu.telemetry import StreamTelemetry
+
 class IMUSensor:
     """
     Interfaz a un único sensor inertial (IMU) vía puerto serie,
-    con lectura en segundo plano y almacenamiento en cola.
+    con lectura en segundo plano y almacenamiento en un buffer circular
+    acotado (SampleRing).
     """
 
-    def __init__(self, sensor_id: str, port: str, baud_rate: int):
+    def __init__(self, sensor_id: str, port: str, baud_rate: int,
+                 start_reader: bool = True, data_event: threading.Event = None,
+                 ser=None, queue_capacity: int = 4096, overflow_policy: str = 'drop_oldest'):
         """
         :param sensor_id: identificador único del sensor (e.g. "imu1")
         :param port: puerto serie (e.g. "COM9" o "/dev/ttyUSB0")
         :param baud_rate: velocidad de comunicación (e.g. 115200)
+        :param start_reader: si False no se lanza hilo lector propio; otro
+            componente (SensorManager en modo 'selector' o 'async') lee el puerto
+        :param data_event: Event (compartido) que se activa cada vez que se
+            encolan datos nuevos, para que los consumidores no hagan polling
+        :param ser: objeto compatible con serial.Serial ya abierto (p.ej.
+            ReplaySerial); si se indica no se abre `port`
+        :param queue_capacity: muestras pendientes máximas (memoria fija)
+        :param overflow_policy: qué hacer si el consumidor se retrasa y el
+            buffer se llena: 'drop_oldest' | 'drop_newest' | 'block'
         """
         self.id = sensor_id
-        # timeout=0 para lectura no bloqueante
-        self.ser = serial.Serial(port, baud_rate, timeout=0)
-        print("Puerto serie abierto:", self.ser.name)
-        time.sleep(2)  # Dar tiempo a estabilizar el ESP32
-        # Vacía buffers iniciales
+        if ser is None:
+            # timeout=0 para lectura no bloqueante
+            ser = serial.Serial(port, baud_rate, timeout=0)
+            print("Puerto serie abierto:", ser.name)
+        self.ser = ser
+        # Vacía buffers iniciales. En lugar de esperar un tiempo fijo a que
+        # arranque el ESP32, el sensor pasa a "listo" con la primera muestra
+        # válida o la cabecera CSV (ver wait_ready)
         self.ser.reset_input_buffer()
+        self._ready = threading.Event()
 
-        # Buffer de texto parcial y cola de líneas completas
-        self._text_buffer = ""
-        self._queue = queue.Queue()
+        # Separador de tramas (detecta texto CSV o binario) y buffer circular
+        # de muestras ya parseadas con su instante de llegada
+        self._framer = AutoFramer()
+        # (el propio buffer activa data_event al escribir)
+        self._ring = SampleRing(queue_capacity, overflow_policy, data_event)
+        self._telemetry = StreamTelemetry()
 
         # Señal de parada y hilo lector
         self._stop_event = threading.Event()
-        self._thread = threading.Thread(target=self._reader_loop, daemon=True)
-        self._thread.start()
+        self._thread = None
+        if start_reader:
+            self._thread = threading.Thread(target=self._reader_loop, daemon=True)
+            self._thread.start()
+
+    def fileno(self) -> int:
+        """Descriptor del puerto (sólo POSIX), para registrarlo en un selector."""
+        return self.ser.fileno()
+
+    def read_available(self, at_least_one: bool = False) -> int:
+        """
+        Lee lo que haya en el buffer del puerto y encola las tramas completas.
+        Devuelve el número de bytes disponibles.
+
+        :param at_least_one: intentar leer aunque in_waiting sea 0 (el selector
+            ya indicó que hay datos); si el puerto se ha desconectado pyserial
+            lanza SerialException en vez de devolver vacío indefinidamente.
+        """
+        n = self.ser.in_waiting
+        if not n and at_least_one:
+            n = 1
+        if n:
+            self._ingest(self.ser.read(n))
+        return n
+
+    def read_block(self) -> np.ndarray:
+        """
+        Lee lo disponible en el puerto y devuelve directamente las muestras
+        completas como array (n, 4), sin pasar por la cola. Pensado para
+        lectores que ya saben que hay datos (p.ej. loop.add_reader).
+        """
+        return self._decode(self.ser.read(max(self.ser.in_waiting, 1)), time.monotonic())
+
+    def _decode(self, raw_bytes: bytes, now: float) -> np.ndarray:
+        """
+        Separa y parsea las tramas completas de una lectura, actualizando el
+        estado "listo" y la telemetría. Devuelve las muestras válidas (n, 4).
+        """
+        frames = self._framer.feed(raw_bytes)
+        errors = 0
+        if isinstance(frames, np.ndarray):
+            block = frames
+        elif frames:
+            block = parse_text_block(frames)
+            errors = len(frames) - len(block)
+            if errors:
+                # La cabecera del ESP32 no es un error
+                errors -= sum(1 for line in frames if line.startswith(b"timestamp"))
+        else:
+            block = empty_block()
+        if not self._ready.is_set() and len(frames):
+            self._check_ready(frames, block)
+        self._telemetry.update(now, len(raw_bytes), block[:, 0], errors)
+        return block
+
+    def _check_ready(self, frames, block: np.ndarray):
+        """Marca el sensor como listo al ver una muestra válida o la cabecera."""
+        if len(block) or any(line.startswith(b"timestamp") for line in frames):
+            self._ready.set()
+
+    def _ingest(self, raw_bytes: bytes):
+        """Parsea las tramas completas de una pasada y las guarda juntas."""
+        arrived = time.monotonic()
+        block = self._decode(raw_bytes, arrived)
+        if len(block):
+            self._ring.put(block, arrived)
 
     def _reader_loop(self):
         """
         Hilo en segundo plano que descarga todo el buffer de serie
-        y encola líneas completas.
+        y encola, por cada lectura, el bloque de tramas completas.
         """
         while not self._stop_event.is_set():
-            n = self.ser.in_waiting
-            if n:
-                raw_bytes = self.ser.read(n)
-                chunk = raw_bytes.decode('utf-8', errors='ignore')
-                self._text_buffer += chunk
-                # Separa líneas completas
-                while "\n" in self._text_buffer:
-                    line, self._text_buffer = self._text_buffer.split("\n", 1)
-                    self._queue.put(line.strip())
-            else:
+            if not self.read_available():
                 # Evitamos busy‐wait continuo
                 time.sleep(0.001)
 
-    def read_now(self) -> list:
+    @property
+    def ready(self) -> bool:
+        """True cuando el dispositivo ya ha enviado algo válido."""
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: float, poll: bool = None) -> bool:
+        """
+        Espera a que el ESP32 esté enviando: primera muestra válida o línea de
+        cabecera. Devuelve False si vence `timeout` (s) sin recibirla.
+
+        :param poll: leer el puerto desde este hilo mientras se espera; por
+            defecto sólo si no hay hilo lector propio. Pasar False cuando otro
+            componente ya lee el puerto (SensorManager en modo 'selector').
+        """
+        if poll is None:
+            poll = self._thread is None
+        if not poll:
+            return self._ready.wait(timeout)
+        deadline = time.monotonic() + timeout
+        while not self._ready.is_set():
+            if time.monotonic() >= deadline:
+                return False
+            if not self.read_available():
+                time.sleep(0.005)
+        return True
+
+    def read_now_timed(self) -> tuple:
         """
-        Extrae todas las líneas pendientes de la cola,
-        las parsea y devuelve una lista de dicts con datos válidos.
+        Como read_now_array, pero devuelve también el instante de llegada al
+        host (time.monotonic(), en s) de cada muestra: (array (n, 4), array (n,)).
+        Todas las muestras de una misma lectura del puerto comparten instante.
         """
-        readings = []
-        while True:
-            parsed = None
-            try:
-                raw = self._queue.get_nowait()
-                parsed = self._parse_line(raw)
-            except queue.Empty:
-                break
-            if parsed:
-                readings.append(parsed)
-        return readings
+        rows = self._ring.drain()
+        return rows[:, :N_COLUMNS], rows[:, N_COLUMNS]
 
-    def _parse_line(self, line: str) -> dict:
+    def read_now_array(self) -> np.ndarray:
         """
-        Lee una línea del sensor y devuelve un diccionario con:
+        Extrae todas las muestras pendientes (ya parseadas en el hilo lector).
+        Devuelve un array float64 (n, 4) con columnas SAMPLE_COLUMNS
+        (timestamp, yaw, pitch, roll); las líneas mal formadas se descartan.
+        """
+        return self.read_now_timed()[0]
+
+    def read_now(self) -> list:
+        """
+        Extrae todas las muestras pendientes del buffer,
+        las parsea y devuelve una lista de dicts con datos válidos:
         { 'sensor_id': str, 'timestamp': float, 'yaw': float, 'pitch': float, 'roll': float }
-        
-        Args:
-            line: línea de texto a parsear con el formato "timestamp,yaw,pitch,roll"
-        """
-        try:
-            # line = self.ser.readline().decode('utf-8', errors='ignore').strip()
-            # if not line:
-            #     return None
-
-            parts = line.split(',')
-            if len(parts) != 4:  # Modificar en caso de cambio de formato de envío de datos el ESP32
-                return None
-            
-            timestamp, yaw, pitch, roll = map(float, parts)
-            
-            return {
-                'sensor_id': self.id,
-                'timestamp': timestamp,
-                'yaw': yaw,
-                'pitch': pitch,
-                'roll': roll
-            }
-        
-        except (ValueError, serial.SerialException):
-            return None
+        """
+        return block_to_readings(self.id, self.read_now_array())
+
+    def framing_stats(self) -> dict:
+        """
+        Modo detectado ('text' | 'binary') y contadores del separador:
+        líneas completas/parciales/basura o tramas/CRC/perdidas.
+        """
+        return self._framer.stats()
+
+    def queue_stats(self) -> dict:
+        """
+        Estado del buffer de muestras: capacidad, política, profundidad
+        actual, máximo alcanzado (high_water), descartadas y total recibido.
+        """
+        return self._ring.stats()
+
+    def telemetry(self) -> dict:
+        """
+        Salud del flujo: Hz efectivos, bytes/s, percentiles de intervalo y
+        jitter (ms), huecos y muestras perdidas, errores de parseo, reinicios
+        del reloj, errores de framing (basura/CRC) y estado del buffer
+        (profundidad, máximo, descartes).
+        """
+        stats = self._telemetry.stats(time.monotonic())
+        framing = self._framer.stats()
+        stats['mode'] = framing.get('mode')
+        stats['framing_errors'] = framing.get('garbage', 0) + framing.get('crc_errors', 0)
+        stats['device_dropped'] = framing.get('dropped', 0)
+        queue = self._ring.stats()
+        stats['queue_depth'] = queue['depth']
+        stats['queue_high_water'] = queue['high_water']
+        stats['queue_dropped'] = queue['dropped']
+        return stats
 
     def close(self):
         """
         Detiene el hilo lector y cierra el puerto serie.
         """
         self._stop_event.set()
-        self._thread.join()
+        self._ring.close()
+        if self._thread:
+            self._thread.join()
         if self.ser.is_open:
             self.ser.close()
\ No newline at end of file
@@ -1,28 +1,309 @@
 # core/imu/manager.py
 
+import os
+import time
+import asyncio
+import selectors
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
+import numpy as np
+import serial
+from core.imu.alignment import StreamAligner
 from core.imu.imu import IMUSensor
+from core.imu.replay import ReplaySerial
+
+IO_MODES = ('auto', 'threads', 'selector', 'async')
+
+
+class SensorStartupError(RuntimeError):
+    """
+    Algún sensor no se pudo abrir o no envió datos válidos a tiempo.
+    `failures` = {sensor_id: motivo}.
+    """
+
+    def __init__(self, failures: Dict[str, str]):
+        self.failures = failures
+        detail = "; ".join(f"{sid}: {msg}" for sid, msg in failures.items())
+        super().__init__(f"No se pudieron iniciar los sensores ({detail})")
+
 
 class SensorManager:
     """
     Agrupa varios IMUSensor y permite leerlos de forma unificada.
+
+    Modos de E/S:
+      - 'threads': cada IMUSensor tiene su propio hilo lector (sondeo cada 1 ms).
+      - 'selector': un único hilo registra los descriptores de todos los
+        puertos en un selector y sólo despierta cuando hay datos.
+      - 'async': sin hilos; los datos se consumen con `async for` sobre
+        stream(), que registra los puertos en el event loop (sólo POSIX).
+      - 'auto': 'selector' en POSIX y 'threads' en Windows (los COM no son
+        seleccionables).
     """
 
-    def __init__(self, sensor_configs: List[Dict[str, Any]]):
+    def __init__(self, sensor_configs: List[Dict[str, Any]], io_mode: str = 'auto',
+                 alignment: Dict[str, Any] = None, ready_timeout: float = 5.0):
         """
         :param sensor_configs: lista de dicts con claves:
             - 'id': identificador del sensor (str)
             - 'port': puerto serie (str)
             - 'baud_rate': velocidad de comunicación (int)
+            - 'queue_capacity': muestras pendientes máximas (opcional, 4096)
+            - 'overflow_policy': 'drop_oldest' | 'drop_newest' | 'block'
+              (opcional, por defecto 'drop_oldest'). 'block' sólo con
+              io_mode='threads': en 'selector' un sensor con el buffer lleno
+              bloquearía el hilo único de E/S y pararía a todos los demás
+            - 'ready_timeout': espera máxima a este sensor en s (opcional)
+          o, para reproducir una sesión grabada en lugar de un puerto:
+            - 'replay': ruta del CSV grabado
+            - 'speed': factor de velocidad (1 = tiempo real, 0 = sin límite)
+            - 'source_id': sensor_id del CSV a reproducir (opcional)
+            - 'loop': repetir indefinidamente (opcional)
+        :param io_mode: 'auto' | 'threads' | 'selector' | 'async'
+        :param alignment: parámetros de StreamAligner para read_aligned()
+            (period, latency, max_gap...); None = valores por defecto
+        :param ready_timeout: segundos que se espera, por defecto, a que cada
+            ESP32 envíe su cabecera o primera muestra válida
+
+        Los puertos se abren y se esperan en paralelo, así que el arranque
+        dura lo que el dispositivo más lento. Si alguno falla se cierran los
+        demás y se lanza SensorStartupError con el motivo de cada sensor.
         """
+        if io_mode not in IO_MODES:
+            raise ValueError(f"io_mode debe ser uno de {IO_MODES}, no {io_mode!r}")
+        if io_mode == 'auto':
+            io_mode = 'threads' if os.name == 'nt' else 'selector'
+        self.io_mode = io_mode
+        blocking = [cfg['id'] for cfg in sensor_configs
+                    if cfg.get('overflow_policy') == 'block']
+        if blocking and io_mode != 'threads':
+            raise ValueError(f"overflow_policy='block' requiere io_mode='threads' "
+                             f"(sensores {blocking}, io_mode={io_mode!r})")
+
+        # Se activa cada vez que algún sensor encola datos nuevos
+        self.data_event = threading.Event()
+
         self.sensors: List[IMUSensor] = []
-        for cfg in sensor_configs:
-            sensor = IMUSensor(
-                sensor_id=cfg['id'],
-                port=cfg['port'],
-                baud_rate=cfg.get('baud_rate', 115200)
-            )
-            self.sensors.append(sensor)
+        self._io_thread = None
+        self._streaming = False
+        # Segundos hasta que cada sensor estuvo listo
+        self.startup_times: Dict[str, float] = {}
+        self._start_sensors(sensor_configs, ready_timeout)
+
+        self.aligner = StreamAligner([s.id for s in self.sensors], **(alignment or {}))
+
+    def _open_sensor(self, cfg: Dict[str, Any]) -> IMUSensor:
+        return IMUSensor(
+            sensor_id=cfg['id'],
+            port=cfg.get('port', cfg.get('replay')),
+            baud_rate=cfg.get('baud_rate', 115200),
+            start_reader=(self.io_mode == 'threads'),
+            data_event=self.data_event,
+            ser=self._replay_source(cfg),
+            queue_capacity=cfg.get('queue_capacity', 4096),
+            overflow_policy=cfg.get('overflow_policy', 'drop_oldest'),
+        )
+
+    def _start_sensors(self, sensor_configs: List[Dict[str, Any]], ready_timeout: float):
+        """Abre todos los puertos a la vez y espera a que cada ESP32 esté enviando."""
+        if not sensor_configs:
+            return
+        t0 = time.monotonic()
+        failures = {}
+        with ThreadPoolExecutor(max_workers=len(sensor_configs)) as pool:
+            # 1) Apertura concurrente
+            opening = [(cfg, pool.submit(self._open_sensor, cfg)) for cfg in sensor_configs]
+            for cfg, future in opening:
+                try:
+                    self.sensors.append(future.result())
+                except (serial.SerialException, OSError, ValueError) as e:
+                    failures[cfg['id']] = f"error al abrir: {e}"
+
+            if not failures:
+                if self.io_mode == 'selector':
+                    self._start_selector()
+                # 2) Espera concurrente de la primera muestra/cabecera; en modo
+                #    'async' aún no lee nadie, así que cada espera sondea su puerto
+                poll = self.io_mode == 'async'
+                timeouts = {cfg['id']: cfg.get('ready_timeout', ready_timeout)
+                            for cfg in sensor_configs}
+
+                def wait(sensor):
+                    ok = sensor.wait_ready(timeouts[sensor.id], poll=poll)
+                    return ok, time.monotonic() - t0
+
+                for sensor, (ok, elapsed) in zip(self.sensors, pool.map(wait, self.sensors)):
+                    if ok:
+                        self.startup_times[sensor.id] = elapsed
+                        print(f"{sensor.id} listo en {elapsed:.2f} s")
+                    else:
+                        failures[sensor.id] = (f"sin datos válidos en {timeouts[sensor.id]:.1f} s "
+                                               f"({sensor.framing_stats()})")
+
+        if failures:
+            for sid, msg in failures.items():
+                print(f"Error iniciando {sid}: {msg}")
+            self.close_all()
+            raise SensorStartupError(failures)
+
+    @staticmethod
+    def _replay_source(cfg: Dict[str, Any]):
+        """ReplaySerial si la entrada es de reproducción ('replay'), si no None."""
+        if 'replay' not in cfg:
+            return None
+        return ReplaySerial(
+            cfg['replay'],
+            speed=cfg.get('speed', 1.0),
+            source_id=cfg.get('source_id'),
+            loop=cfg.get('loop', False),
+        )
+
+    def _start_selector(self):
+        """Registra todos los puertos en un selector y lanza el hilo de E/S."""
+        self._selector = selectors.DefaultSelector()
+        for sensor in self.sensors:
+            self._selector.register(sensor.fileno(), selectors.EVENT_READ, sensor)
+        # Tubería para despertar al select() al cerrar
+        self._wake_r, self._wake_w = os.pipe()
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._io_stop = threading.Event()
+        self._io_thread = threading.Thread(target=self._selector_loop, daemon=True)
+        self._io_thread.start()
+
+    def _selector_loop(self):
+        """Hilo único que atiende a todos los puertos según van teniendo datos."""
+        while not self._io_stop.is_set():
+            for key, _ in self._selector.select():
+                sensor = key.data
+                if sensor is None:
+                    continue  # despertador de close_all()
+                try:
+                    sensor.read_available(at_least_one=True)
+                except (serial.SerialException, OSError) as e:
+                    print(f"Error leyendo {sensor.id}: {e}")
+                    self._selector.unregister(key.fileobj)
+
+    async def stream(self, max_batch: int = 256, max_wait: float = 0.05, max_pending: int = None):
+        """
+        Generador asíncrono de lotes {sensor_id: array (n, 4)} (modo 'async'):
+
+            async for batch in manager.stream(max_batch=128, max_wait=0.02):
+                ...
+
+        Los puertos se leen con loop.add_reader al llegar datos, sin hilos ni
+        colas. Un lote se entrega cuando reúne `max_batch` muestras o cuando
+        han pasado `max_wait` segundos desde su primera muestra; nunca supera
+        `max_batch` muestras (el resto pasa al lote siguiente).
+
+        Contrapresión: si el consumidor no pide lotes y se acumulan
+        `max_pending` muestras (por defecto 4 × max_batch) se dejan de leer los
+        puertos hasta que consuma; el exceso se queda en el buffer del SO.
+
+        Si todos los puertos fallan al leerse, el generador entrega lo que
+        quede pendiente y termina.
+
+        Sólo puede haber un stream activo: si se sale del bucle con `break`,
+        cerrarlo explícitamente (contextlib.aclosing o `await gen.aclose()`).
+        """
+        if self.io_mode != 'async':
+            raise RuntimeError("stream() requiere SensorManager(..., io_mode='async')")
+        if self._streaming:
+            raise RuntimeError("Ya hay un stream() activo sobre este SensorManager")
+        self._streaming = True
+        loop = asyncio.get_running_loop()
+        max_pending = max_pending or 4 * max_batch
+
+        pending = {sensor.id: [] for sensor in self.sensors}
+        state = {'count': 0, 'first': None, 'paused': False, 'start': 0}
+        data_evt, full_evt = asyncio.Event(), asyncio.Event()
+        active = {sensor.fileno(): sensor for sensor in self.sensors}
+
+        def on_readable(sensor):
+            try:
+                block = sensor.read_block()
+            except (serial.SerialException, OSError) as e:
+                print(f"Error leyendo {sensor.id}: {e}")
+                loop.remove_reader(sensor.fileno())
+                active.pop(sensor.fileno(), None)
+                if not active:
+                    # Sin puertos que leer: se entrega lo pendiente y se termina
+                    data_evt.set()
+                    full_evt.set()
+                return
+            if not len(block):
+                return
+            pending[sensor.id].append(block)
+            if state['first'] is None:
+                state['first'] = loop.time()
+            state['count'] += len(block)
+            data_evt.set()
+            if state['count'] >= max_batch:
+                full_evt.set()
+            if state['count'] >= max_pending and not state['paused']:
+                state['paused'] = True
+                for fd in active:
+                    loop.remove_reader(fd)
+
+        def add_readers():
+            for fd, sensor in active.items():
+                loop.add_reader(fd, on_readable, sensor)
+
+        def take() -> Dict[str, np.ndarray]:
+            # Reparto round-robin para no favorecer siempre al primer sensor
+            ids = list(pending)
+            start = state['start'] = (state['start'] + 1) % len(ids)
+            batch, room = {}, max_batch
+            for sid in ids[start:] + ids[:start]:
+                blocks = pending[sid]
+                if not blocks or room <= 0:
+                    continue
+                arr = blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+                batch[sid], rest = arr[:room], arr[room:]
+                pending[sid] = [rest] if len(rest) else []
+                room -= len(batch[sid])
+            state['count'] -= max_batch - room
+            state['first'] = loop.time() if state['count'] else None
+            return batch
+
+        add_readers()
+        try:
+            while True:
+                if state['count'] == 0:
+                    if not active:
+                        return
+                    data_evt.clear()
+                    await data_evt.wait()
+                    if state['count'] == 0:
+                        continue
+                if state['count'] < max_batch and active:
+                    full_evt.clear()
+                    remaining = state['first'] + max_wait - loop.time()
+                    if remaining > 0:
+                        try:
+                            await asyncio.wait_for(full_evt.wait(), remaining)
+                        except asyncio.TimeoutError:
+                            pass
+                batch = take()
+                if state['paused'] and state['count'] < max_pending:
+                    state['paused'] = False
+                    add_readers()
+                yield batch
+        finally:
+            if not state['paused']:
+                for fd in active:
+                    loop.remove_reader(fd)
+            self._streaming = False
+
+    def wait_data(self, timeout: float = None) -> bool:
+        """
+        Bloquea hasta que algún sensor tenga datos nuevos (o venza `timeout`)
+        y rearma la señal. Sustituye al `time.sleep(0.001)` de los bucles
+        consumidores: tras volver, llamar a read_all()/read_all_arrays().
+        """
+        ready = self.data_event.wait(timeout)
+        self.data_event.clear()
+        return ready
 
     def read_all(self) -> List[Dict[str, Any]]:
         """
@@ -36,9 +317,49 @@ class SensorManager:
             readings.extend(sensor_data)
         return readings
 
+    def read_all_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Versión en bloque de read_all: devuelve {sensor_id: array (n, 4)}
+        con columnas SAMPLE_COLUMNS (timestamp, yaw, pitch, roll),
+        sin crear un dict por muestra. Los sensores sin datos nuevos
+        devuelven un array vacío (0, 4).
+        """
+        return {sensor.id: sensor.read_now_array() for sensor in self.sensors}
+
+    def read_aligned(self, now: float = None):
+        """
+        Lee todos los sensores y devuelve las tramas alineadas en la rejilla
+        común del StreamAligner: (tiempos (m,) en reloj del host,
+        valores (m, n_sensores, 3) [yaw, pitch, roll]). Los tiempos se
+        corrigen de offset y deriva de cada ESP32 y la latencia es fija.
+        No combinar con read_all() (ambos vacían las colas).
+        """
+        for sensor in self.sensors:
+            block, host_times = sensor.read_now_timed()
+            self.aligner.push(sensor.id, block, host_times)
+        return self.aligner.pop_frames(time.monotonic() if now is None else now)
+
+    def telemetry(self) -> Dict[str, dict]:
+        """Telemetría de cada sensor (ver IMUSensor.telemetry)."""
+        return {sensor.id: sensor.telemetry() for sensor in self.sensors}
+
+    def queue_stats(self) -> Dict[str, dict]:
+        """Estado del buffer de cada sensor (profundidad, high_water, descartes...)."""
+        return {sensor.id: sensor.queue_stats() for sensor in self.sensors}
+
     def close_all(self):
         """
         Detiene y cierra todos los hilos/puertos de los sensores.
         """
+        if self._io_thread:
+            self._io_stop.set()
+            os.write(self._wake_w, b"\0")
+            self._io_thread.join()
+            self._selector.close()
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._io_thread = None
         for sensor in self.sensors:
             sensor.close()
+        # Despierta a cualquier consumidor bloqueado en wait_data()
+        self.data_event.set()
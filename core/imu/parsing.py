@@ -0,0 +1,58 @@
+# core/imu/parsing.py
+
+import numpy as np
+
+# Columnas de cada muestra en los bloques numéricos devueltos por los sensores
+SAMPLE_COLUMNS = ('timestamp', 'yaw', 'pitch', 'roll')
+N_COLUMNS = len(SAMPLE_COLUMNS)
+
+
+def empty_block() -> np.ndarray:
+    """Bloque vacío con la forma (0, 4) de SAMPLE_COLUMNS."""
+    return np.empty((0, N_COLUMNS), dtype=np.float64)
+
+
+def _parse_line(line: bytes):
+    """Parsea una línea "timestamp,yaw,pitch,roll"; None si está mal formada."""
+    parts = line.split(b',')
+    if len(parts) != N_COLUMNS:
+        return None
+    try:
+        return [float(p) for p in parts]
+    except ValueError:
+        return None
+
+
+def parse_text_block(lines: list) -> np.ndarray:
+    """
+    Parsea de una vez una lista de líneas (bytes) "timestamp,yaw,pitch,roll"
+    y devuelve un array float64 de forma (n, 4) con columnas SAMPLE_COLUMNS.
+
+    El bloque completo se convierte con np.loadtxt, que valida que todas las
+    filas tengan 4 campos numéricos. Si alguna no lo cumple (cabecera del
+    ESP32, línea cortada...) se recurre al parseo línea a línea sólo para
+    ese bloque, descartando las inválidas igual que antes.
+    """
+    if not lines:
+        return empty_block()
+
+    # Para 1-2 líneas (flujo estable) el coste fijo de loadtxt no compensa
+    if len(lines) > 2:
+        try:
+            block = np.loadtxt(lines, delimiter=',', ndmin=2, comments=None)
+            if block.shape[1] == N_COLUMNS:
+                return block
+        except ValueError:
+            pass
+
+    # Línea a línea: bloques pequeños o con alguna línea mal formada
+    rows = [row for row in map(_parse_line, lines) if row is not None]
+    return np.array(rows, dtype=np.float64) if rows else empty_block()
+
+
+def block_to_readings(sensor_id: str, block: np.ndarray) -> list:
+    """Convierte un bloque (n, 4) en la lista de dicts de read_now()."""
+    return [
+        {'sensor_id': sensor_id, 'timestamp': t, 'yaw': y, 'pitch': p, 'roll': r}
+        for t, y, p, r in block.tolist()
+    ]
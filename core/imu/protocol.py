@@ -0,0 +1,264 @@
+# core/imu/protocol.py
+
+import struct
+import numpy as np
+
+from core.imu.framing import LineFramer
+from core.imu.parsing import N_COLUMNS, empty_block
+
+# Trama binaria (little-endian, 16 bytes):
+#   sync   uint16  0x5AA5 (bytes A5 5A)
+#   seq    uint16  contador de secuencia (módulo 65536)
+#   ts     uint32  millis() del ESP32
+#   yaw    int16   centésimas de grado
+#   pitch  int16   centésimas de grado
+#   roll   int16   centésimas de grado
+#   crc    uint16  CRC-16/CCITT-FALSE de seq..roll (bytes 2 a 13)
+SYNC = b"\xA5\x5A"
+SYNC_WORD = 0x5AA5
+ANGLE_SCALE = 100.0
+FRAME_DTYPE = np.dtype([
+    ('sync', '<u2'), ('seq', '<u2'), ('ts', '<u4'),
+    ('yaw', '<i2'), ('pitch', '<i2'), ('roll', '<i2'),
+    ('crc', '<u2'),
+])
+FRAME_SIZE = FRAME_DTYPE.itemsize
+_PAYLOAD = slice(2, FRAME_SIZE - 2)
+_STRUCT = struct.Struct('<HIhhh')  # seq..roll (sin sync ni crc)
+
+
+def _make_crc_table() -> np.ndarray:
+    table = np.zeros(256, dtype=np.uint16)
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table[i] = crc & 0xFFFF
+    return table
+
+
+_CRC_TABLE = _make_crc_table()
+_CRC_TABLE_PY = _CRC_TABLE.tolist()
+
+
+def crc16(data: bytes) -> int:
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF) en Python puro."""
+    crc = 0xFFFF
+    for b in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC_TABLE_PY[((crc >> 8) ^ b) & 0xFF]
+    return crc
+
+
+def _crc16_rows(payload: np.ndarray) -> np.ndarray:
+    """CRC-16 vectorizado de cada fila de `payload` (k, n) uint8."""
+    crc = np.full(payload.shape[0], 0xFFFF, dtype=np.uint16)
+    for j in range(payload.shape[1]):
+        crc = (crc << 8) ^ _CRC_TABLE[(crc >> 8) ^ payload[:, j]]
+    return crc
+
+
+def encode_frame(seq: int, timestamp_ms: int, yaw: float, pitch: float, roll: float) -> bytes:
+    """
+    Codifica una muestra como trama binaria (equivalente a lo que envía el
+    sketch con BINARY_OUTPUT). Útil para probar el decodificador sin hardware.
+    """
+    payload = _STRUCT.pack(
+        seq & 0xFFFF, int(timestamp_ms) & 0xFFFFFFFF,
+        int(round(yaw * ANGLE_SCALE)), int(round(pitch * ANGLE_SCALE)), int(round(roll * ANGLE_SCALE)),
+    )
+    return SYNC + payload + struct.pack('<H', crc16(payload))
+
+
+def encode_frames(samples, first_seq: int = 0) -> bytes:
+    """Codifica una secuencia de (timestamp, yaw, pitch, roll) con seq consecutivos."""
+    return b"".join(
+        encode_frame(first_seq + i, *sample) for i, sample in enumerate(samples)
+    )
+
+
+class BinaryFramer:
+    """
+    Decodificador incremental de tramas binarias.
+
+    feed() recibe bytes y devuelve un array (n, 4) con columnas SAMPLE_COLUMNS.
+    Las tramas alineadas se decodifican en bloque con np.frombuffer y el CRC
+    se comprueba vectorizado; sólo ante basura o CRC erróneo se busca el
+    siguiente byte de sincronismo.
+
+    Un CRC erróneo cuenta como trama corrupta (crc_errors) si la trama
+    empieza donde acabó la anterior válida o le sigue otra válida; si no,
+    el sync era un patrón casual dentro de datos o basura (resyncs).
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._last_seq = None
+        self._aligned = False   # el buffer empieza justo tras una trama válida
+
+        # Contadores
+        self.frames = 0         # tramas válidas
+        self.crc_errors = 0     # tramas alineadas con CRC erróneo (corruptas)
+        self.resyncs = 0        # syncs falsos dentro de datos o basura
+        self.dropped = 0        # tramas perdidas según el contador de secuencia
+        self.skipped_bytes = 0  # bytes descartados al resincronizar
+
+    def feed(self, data: bytes) -> np.ndarray:
+        self._buffer += data
+        # Trabajamos sobre una copia inmutable: las vistas de np.frombuffer
+        # impedirían recortar el bytearray
+        buf = bytes(self._buffer)
+        blocks = []
+        pos = 0
+        end = len(buf)
+
+        while True:
+            i = buf.find(SYNC, pos)
+            if i < 0:
+                # Conservamos un posible primer byte de sync al final
+                keep = end - 1 if end > pos and buf[end - 1] == SYNC[0] else end
+                if keep > pos:
+                    self.skipped_bytes += keep - pos
+                    self._aligned = False
+                pos = keep
+                break
+            if i > pos:
+                self.skipped_bytes += i - pos
+                self._aligned = False
+            k = (end - i) // FRAME_SIZE
+            if k == 0:
+                pos = i
+                break
+
+            raw = np.frombuffer(buf, dtype=np.uint8, count=k * FRAME_SIZE, offset=i)
+            raw = raw.reshape(k, FRAME_SIZE)
+            recs = raw.view(FRAME_DTYPE).reshape(k)
+            ok = (recs['sync'] == SYNC_WORD) & (_crc16_rows(raw[:, _PAYLOAD]) == recs['crc'])
+            n = k if ok.all() else int(np.argmin(ok))
+            if n == 0:
+                # Trama corrupta o sync falso: avanzamos un byte y resincronizamos
+                if self._aligned or (k > 1 and ok[1]):
+                    self.crc_errors += 1
+                elif k == 1:
+                    # Sin la trama siguiente no se sabe: se espera a más datos
+                    pos = i
+                    break
+                else:
+                    self.resyncs += 1
+                self._aligned = False
+                self.skipped_bytes += 1
+                pos = i + 1
+                continue
+
+            blocks.append(self._to_samples(recs[:n]))
+            pos = i + n * FRAME_SIZE
+            self._aligned = True
+
+        del self._buffer[:pos]
+        if not blocks:
+            return empty_block()
+        return blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+
+    def _to_samples(self, recs: np.ndarray) -> np.ndarray:
+        """Convierte tramas válidas a (n, 4) float64 y contabiliza pérdidas."""
+        seq = recs['seq'].astype(np.int64)
+        prev = seq[0] - 1 if self._last_seq is None else self._last_seq
+        gaps = (np.diff(seq, prepend=prev) - 1) % 65536
+        self.dropped += int(gaps.sum())
+        self._last_seq = int(seq[-1])
+        self.frames += len(recs)
+
+        out = np.empty((len(recs), N_COLUMNS), dtype=np.float64)
+        out[:, 0] = recs['ts']
+        out[:, 1] = recs['yaw']
+        out[:, 2] = recs['pitch']
+        out[:, 3] = recs['roll']
+        out[:, 1:] /= ANGLE_SCALE
+        return out
+
+    def reset(self):
+        """Descarta el contenido pendiente."""
+        self._buffer.clear()
+        self._last_seq = None
+        self._aligned = False
+
+    def stats(self) -> dict:
+        return {
+            'frames': self.frames,
+            'crc_errors': self.crc_errors,
+            'resyncs': self.resyncs,
+            'dropped': self.dropped,
+            'skipped_bytes': self.skipped_bytes,
+            'pending_bytes': len(self._buffer),
+        }
+
+
+def _is_csv_text(line: bytes) -> bool:
+    """Línea ASCII imprimible con al menos un separador (datos o cabecera)."""
+    line = line.strip()
+    return b"," in line and line.isascii() and all(32 <= b < 127 for b in line)
+
+
+class AutoFramer:
+    """
+    Detecta si el ESP32 envía texto CSV o tramas binarias y delega en
+    LineFramer o BinaryFramer.
+
+    feed() devuelve una lista de líneas (modo texto) o un array (n, 4)
+    (modo binario). Mientras no se ha decidido devuelve una lista vacía.
+    """
+
+    def __init__(self, detect_bytes: int = 256):
+        """
+        :param detect_bytes: bytes máximos a observar antes de decidir; si no
+            aparece ninguna trama binaria válida se asume texto.
+        """
+        self.detect_bytes = detect_bytes
+        self.mode = None  # 'text' | 'binary'
+        self._framer = None
+        self._pending = bytearray()
+
+    def feed(self, data: bytes):
+        if self._framer is not None:
+            return self._framer.feed(data)
+
+        self._pending += data
+        mode = self._detect(self._pending)
+        if mode is None:
+            return []
+        self.mode = mode
+        self._framer = BinaryFramer() if mode == 'binary' else LineFramer()
+        pending = bytes(self._pending)
+        self._pending.clear()
+        return self._framer.feed(pending)
+
+    def _detect(self, buf: bytearray):
+        # Binario si hay una trama con sync y CRC correctos
+        i = buf.find(SYNC)
+        while 0 <= i <= len(buf) - FRAME_SIZE:
+            frame = buf[i:i + FRAME_SIZE]
+            if crc16(frame[_PAYLOAD]) == int.from_bytes(frame[-2:], 'little'):
+                return 'binary'
+            i = buf.find(SYNC, i + 1)
+        # Texto si hay alguna línea CSV imprimible. Esperamos al menos dos
+        # tramas binarias de datos para que un flujo binario se detecte antes
+        if len(buf) >= 2 * FRAME_SIZE:
+            for line in bytes(buf).split(b"\n")[:-1]:
+                if _is_csv_text(line):
+                    return 'text'
+        if len(buf) >= self.detect_bytes:
+            return 'text'
+        return None
+
+    def reset(self):
+        """Descarta el contenido pendiente (el modo detectado se mantiene)."""
+        self._pending.clear()
+        if self._framer is not None:
+            self._framer.reset()
+
+    def stats(self) -> dict:
+        stats = {'mode': self.mode}
+        if self._framer is not None:
+            stats.update(self._framer.stats())
+        else:
+            stats['pending_bytes'] = len(self._pending)
+        return stats
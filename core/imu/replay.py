@@ -0,0 +1,213 @@
+# core/imu/replay.py
+
+import os
+import csv
+import time
+import threading
+import numpy as np
+
+# Cabecera que envía el ESP32 al arrancar
+_HEADER = b"timestamp_ms,yaw,pitch,roll\r\n"
+
+
+class ReplaySerial:
+    """
+    Sustituto de serial.Serial que reproduce una sesión grabada en CSV
+    (raw `timestamp,sensor_id,yaw,pitch,roll` o etiquetado `rep_id,timestamp,...`)
+    como si la enviase el ESP32: mismas líneas de texto y mismo espaciado
+    entre timestamps, escalado por `speed`. Si los timestamps vuelven atrás
+    (reinicio del ESP32, sesiones concatenadas) las líneas se envían tal
+    cual, pero el ritmo sigue como si el tramo nuevo empezara 10 ms
+    después del anterior.
+
+    Así IMUSensor, el framing, el parseo y todos los modos de E/S de
+    SensorManager funcionan igual que con hardware real.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, source_id: str = None,
+                 loop: bool = False, max_buffer: int = 1 << 20):
+        """
+        :param path: CSV grabado
+        :param speed: factor de velocidad (1 = tiempo real, 10 = 10×);
+            0 o None = sin límite (tan rápido como se consuma)
+        :param source_id: sensor_id a reproducir; obligatorio si el CSV
+            tiene varios (mezclados no forman un flujo con tiempo creciente)
+        :param loop: volver a empezar al acabar (timestamps siempre crecientes)
+        :param max_buffer: bytes máximos pendientes de leer; en modo sin
+            límite el productor espera a que el consumidor lea
+        """
+        self.name = f"replay:{path}"
+        self.port = path
+        self.speed = float(speed or 0)
+        self.loop = loop
+        self.max_buffer = max_buffer
+        self.is_open = True
+
+        self._ts, self._blob, self._offsets = self._load(path, source_id)
+        self._clock = self._pacing_times(self._ts)
+
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # Tubería "timbre" para que los selectores/asyncio vean datos (POSIX)
+        self._bell_r = self._bell_w = None
+        if os.name != 'nt':
+            self._bell_r, self._bell_w = os.pipe()
+            os.set_blocking(self._bell_r, False)
+            os.set_blocking(self._bell_w, False)
+
+    @staticmethod
+    def _load(path: str, source_id: str):
+        """
+        Lee el CSV una sola vez y preformatea todas las líneas en un único
+        bloque de bytes; reproducir es sólo trocear ese bloque.
+        """
+        with open(path, newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                raise ValueError(f"CSV vacío: {path}")
+            col = {name: i for i, name in enumerate(header)}
+            missing = {'timestamp', 'yaw', 'pitch', 'roll'} - set(col)
+            if missing:
+                raise ValueError(f"Faltan columnas en {path}: {missing}")
+            i_ts, i_y, i_p, i_r = col['timestamp'], col['yaw'], col['pitch'], col['roll']
+            i_sid = col.get('sensor_id')
+
+            ts, lines, sids = [], [], set()
+            for row in reader:
+                if i_sid is not None:
+                    if source_id is None:
+                        sids.add(row[i_sid])
+                    elif row[i_sid] != source_id:
+                        continue
+                ts.append(float(row[i_ts]))
+                lines.append(f"{row[i_ts]},{row[i_y]},{row[i_p]},{row[i_r]}\r\n".encode())
+
+        if len(sids) > 1:
+            raise ValueError(f"{path} tiene varios sensores {sorted(sids)}: "
+                             f"indica cuál reproducir con source_id")
+        if not lines:
+            raise ValueError(f"No hay muestras que reproducir en {path}")
+        offsets = np.zeros(len(lines) + 1, dtype=np.int64)
+        np.cumsum([len(line) for line in lines], out=offsets[1:])
+        return np.asarray(ts), b"".join(lines), offsets
+
+    @staticmethod
+    def _pacing_times(ts: np.ndarray) -> np.ndarray:
+        """
+        Timestamps (ms) no decrecientes para marcar el ritmo: cada tramo
+        tras un salto atrás se desplaza para empezar 10 ms tras el anterior
+        (igual que las vueltas de `loop`).
+        """
+        jumps = np.zeros(len(ts))
+        drops = np.flatnonzero(np.diff(ts) < 0) + 1
+        jumps[drops] = ts[drops - 1] - ts[drops] + 10.0
+        return ts + np.cumsum(jumps)
+
+    # — Productor —
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._producer_loop, daemon=True)
+            self._thread.start()
+
+    def _push(self, data: bytes):
+        with self._lock:
+            # Sin límite de velocidad: contrapresión si el consumidor se retrasa
+            while (not self.speed and len(self._buffer) >= self.max_buffer
+                   and not self._stop_event.is_set()):
+                self._space.wait(0.1)
+            self._buffer += data
+        if self._bell_w is not None:
+            try:
+                os.write(self._bell_w, b"\0")
+            except BlockingIOError:
+                pass  # el timbre ya está sonando
+
+    def _producer_loop(self):
+        self._push(_HEADER)
+        rel = (self._clock - self._clock[0]) / 1000.0   # segundos desde el inicio
+        n = len(rel)
+        ts_offset = 0.0
+        while not self._stop_event.is_set():
+            t0 = time.monotonic()
+            i = 0
+            while i < n and not self._stop_event.is_set():
+                if self.speed:
+                    # Todas las filas ya vencidas de una vez
+                    elapsed = (time.monotonic() - t0) * self.speed
+                    j = int(np.searchsorted(rel, elapsed, side='right'))
+                    if j <= i:
+                        wait = (rel[i] - elapsed) / self.speed
+                        self._stop_event.wait(min(wait, 0.05))
+                        continue
+                else:
+                    j = min(n, i + 1024)
+                self._push(self._rows(i, j, ts_offset))
+                i = j
+            if not self.loop:
+                return
+            ts_offset += self._ts[-1] - self._ts[0] + 10.0
+
+    def _rows(self, i: int, j: int, ts_offset: float) -> bytes:
+        chunk = self._blob[self._offsets[i]:self._offsets[j]]
+        if not ts_offset:
+            return chunk
+        # Vueltas sucesivas: desplazamos los timestamps para que sigan creciendo
+        ts = self._ts[i:j] + ts_offset
+        return b"".join(
+            b"%.1f," % t + line.split(b",", 1)[1] for t, line in zip(ts, chunk.splitlines(True))
+        )
+
+    # — Interfaz compatible con serial.Serial —
+
+    @property
+    def in_waiting(self) -> int:
+        self._start()
+        return len(self._buffer)
+
+    def read(self, size: int = 1) -> bytes:
+        self._start()
+        with self._lock:
+            if self._bell_r is not None:
+                try:
+                    os.read(self._bell_r, 4096)
+                except BlockingIOError:
+                    pass
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            self._space.notify()
+            if self._buffer and self._bell_w is not None:
+                # Queda algo sin leer (llegó tras consultar in_waiting): el
+                # timbre vuelve a sonar para que el selector no se duerma
+                try:
+                    os.write(self._bell_w, b"\0")
+                except BlockingIOError:
+                    pass
+        return data
+
+    def fileno(self) -> int:
+        if self._bell_r is None:
+            raise OSError("ReplaySerial.fileno() no disponible en Windows")
+        self._start()
+        return self._bell_r
+
+    def reset_input_buffer(self):
+        with self._lock:
+            self._buffer.clear()
+
+    def close(self):
+        self._stop_event.set()
+        with self._lock:
+            self._space.notify_all()
+        if self._thread:
+            self._thread.join()
+        if self._bell_r is not None:
+            os.close(self._bell_r)
+            os.close(self._bell_w)
+            self._bell_r = self._bell_w = None
+        self.is_open = False
@@ -0,0 +1,163 @@
+# core/imu/ring.py
+
+import threading
+import numpy as np
+
+from core.imu.parsing import N_COLUMNS
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+
+class SampleRing:
+    """
+    Buffer circular de capacidad fija y memoria preasignada para las
+    muestras de un sensor: un productor (hilo lector) y un consumidor.
+
+    Cada fila guarda [timestamp, yaw, pitch, roll, llegada al host]. Si el
+    consumidor se retrasa y el buffer se llena se aplica `policy`:
+      - 'drop_oldest': se sobrescriben las más antiguas (prioriza lo reciente,
+        recomendado para vista/predicción en vivo)
+      - 'drop_newest': se descartan las que llegan
+      - 'block': el productor espera a que haya hueco (mientras tanto el
+        exceso se queda en el buffer del puerto/SO); sólo descarta al cerrar.
+        Bloquea el hilo que llama a put(), así que sólo sirve si ese hilo es
+        exclusivo del sensor (SensorManager con io_mode='threads')
+    """
+
+    def __init__(self, capacity: int = 4096, policy: str = 'drop_oldest',
+                 data_event: threading.Event = None, block_timeout: float = 0.1):
+        """
+        :param capacity: número máximo de muestras pendientes
+        :param policy: 'drop_oldest' | 'drop_newest' | 'block'
+        :param data_event: Event que se activa tras cada escritura (en modo
+            'block' también entre trozos, para despertar al consumidor)
+        :param block_timeout: intervalo de espera en modo 'block' (s) entre
+            comprobaciones de cierre
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"policy debe ser una de {OVERFLOW_POLICIES}, no {policy!r}")
+        self.capacity = capacity
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self._data_event = data_event
+        self._data = np.empty((capacity, N_COLUMNS + 1), dtype=np.float64)
+        self._head = 0   # total escrito (posición = head % capacity)
+        self._tail = 0   # total leído
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._closed = False
+
+        # Contadores
+        self.high_water = 0
+        self.dropped = 0
+        self.total = 0
+
+    def __len__(self) -> int:
+        return self._head - self._tail
+
+    @property
+    def depth(self) -> int:
+        return self._head - self._tail
+
+    def put(self, block: np.ndarray, host_times) -> int:
+        """
+        Añade un bloque (n, 4) con sus instantes de llegada (escalar o (n,)).
+        Devuelve cuántas muestras se han descartado.
+        """
+        n = len(block)
+        if not n:
+            return 0
+        host_times = np.broadcast_to(host_times, (n,))
+        if self.policy == 'block':
+            return self._put_blocking(block, host_times)
+        with self._lock:
+            self.total += n
+            dropped = 0
+            cap = self.capacity
+            free = cap - (self._head - self._tail)
+            if n > free:
+                if self.policy == 'drop_oldest':
+                    # Si el bloque no cabe entero sólo interesan sus últimas `cap`
+                    if n > cap:
+                        dropped += n - cap
+                        block = block[-cap:]
+                        host_times = host_times[-cap:]
+                        n = cap
+                    over = n - free
+                    self._tail += over
+                    dropped += over
+                else:
+                    dropped += n - free
+                    block = block[:free]
+                    host_times = host_times[:free]
+            self._write(block, host_times)
+            self.dropped += dropped
+            return dropped
+
+    def _put_blocking(self, block: np.ndarray, host_times: np.ndarray) -> int:
+        """Política 'block': escribe por trozos según el consumidor libera hueco."""
+        n = len(block)
+        with self._lock:
+            self.total += n
+            done = 0
+            while done < n and not self._closed:
+                free = self.capacity - (self._head - self._tail)
+                if not free:
+                    self._space.wait(self.block_timeout)
+                    continue
+                k = min(free, n - done)
+                self._write(block[done:done + k], host_times[done:done + k])
+                done += k
+            self.dropped += n - done
+            return n - done
+
+    def _write(self, block: np.ndarray, host_times: np.ndarray):
+        """Copia el bloque (ya recortado al hueco libre) tras la cabeza. Con el lock tomado."""
+        n = len(block)
+        if not n:
+            return
+        cap = self.capacity
+        start = self._head % cap
+        first = min(n, cap - start)
+        data = self._data
+        data[start:start + first, :N_COLUMNS] = block[:first]
+        data[start:start + first, N_COLUMNS] = host_times[:first]
+        if first < n:
+            data[:n - first, :N_COLUMNS] = block[first:]
+            data[:n - first, N_COLUMNS] = host_times[first:]
+        self._head += n
+        if self._data_event is not None:
+            self._data_event.set()
+        self.high_water = max(self.high_water, self._head - self._tail)
+
+    def drain(self, max_items: int = None) -> np.ndarray:
+        """Extrae (copia) todas las muestras pendientes como array (n, 5)."""
+        with self._lock:
+            n = self._head - self._tail
+            if max_items is not None:
+                n = min(n, max_items)
+            cap = self.capacity
+            start = self._tail % cap
+            if start + n <= cap:
+                out = self._data[start:start + n].copy()
+            else:
+                out = np.concatenate((self._data[start:], self._data[:start + n - cap]))
+            self._tail += n
+            self._space.notify()
+            return out
+
+    def close(self):
+        """Libera a un productor bloqueado."""
+        with self._lock:
+            self._closed = True
+            self._space.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            'capacity': self.capacity,
+            'policy': self.policy,
+            'depth': self.depth,
+            'high_water': self.high_water,
+            'dropped': self.dropped,
+            'total': self.total,
+        }
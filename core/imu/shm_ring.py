@@ -0,0 +1,151 @@
+# core/imu/shm_ring.py
+
+from multiprocessing import shared_memory
+import numpy as np
+
+# Cabecera int64: [escritas en total (head), capacidad, columnas, cerrado]
+_HEAD, _CAPACITY, _COLUMNS, _CLOSED = range(4)
+_HEADER_BYTES = 64
+
+
+def attach_segment(name: str) -> shared_memory.SharedMemory:
+    """Abre un segmento de memoria compartida creado por otro proceso."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)   # Python >= 3.13
+    except TypeError:
+        # Antes de 3.13 se registra en el resource_tracker, que es el mismo
+        # del proceso creador si éste nos lanzó (multiprocessing): el
+        # registro duplicado no tiene efecto y el creador lo libera
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedSampleRing:
+    """
+    Buffer circular de muestras float64 (capacidad, columnas) en memoria
+    compartida entre procesos: un único escritor y cualquier número de
+    lectores, sin locks.
+
+    El escritor copia las filas y *después* publica el nuevo `head`
+    (entero de 64 bits alineado, escritura atómica). Cada lector lleva su
+    propio cursor (RingReader): lee `head`, toma vistas del rango nuevo sin
+    copiarlo y, si el escritor le ha dado una vuelta entera, salta a lo más
+    reciente contando lo perdido. El escritor nunca espera a los lectores.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self._header = np.ndarray((_HEADER_BYTES // 8,), dtype=np.int64, buffer=shm.buf)
+        self.capacity = int(self._header[_CAPACITY])
+        self.n_columns = int(self._header[_COLUMNS])
+        self._data = np.ndarray((self.capacity, self.n_columns), dtype=np.float64,
+                                buffer=shm.buf, offset=_HEADER_BYTES)
+
+    @classmethod
+    def create(cls, capacity: int = 1 << 16, n_columns: int = 5, name: str = None):
+        """Reserva el segmento compartido (proceso que lo posee y lo libera)."""
+        size = _HEADER_BYTES + capacity * n_columns * 8
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER_BYTES // 8,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[_CAPACITY] = capacity
+        header[_COLUMNS] = n_columns
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str):
+        """Abre un segmento ya creado por otro proceso."""
+        return cls(attach_segment(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def head(self) -> int:
+        """Número total de filas escritas desde el inicio."""
+        return int(self._header[_HEAD])
+
+    @property
+    def closed(self) -> bool:
+        return bool(self._header[_CLOSED])
+
+    def write(self, rows: np.ndarray):
+        """Añade filas (n, columnas). Sólo debe llamarlo el proceso escritor."""
+        n = len(rows)
+        if not n:
+            return
+        cap = self.capacity
+        if n > cap:
+            rows = rows[-cap:]
+            head = int(self._header[_HEAD]) + n - cap
+            n = cap
+        else:
+            head = int(self._header[_HEAD])
+        start = head % cap
+        first = min(n, cap - start)
+        self._data[start:start + first] = rows[:first]
+        if first < n:
+            self._data[:n - first] = rows[first:]
+        # Publicación: los lectores sólo ven las filas tras actualizar head
+        self._header[_HEAD] = head + n
+
+    def mark_closed(self):
+        """El escritor indica que no habrá más datos."""
+        self._header[_CLOSED] = 1
+
+    def reader(self, from_start: bool = False) -> "RingReader":
+        """Nuevo lector; por defecto sólo verá lo escrito a partir de ahora."""
+        return RingReader(self, 0 if from_start else self.head)
+
+    def close(self):
+        """Suelta el mapeo y, si este proceso lo creó, libera el segmento."""
+        self._header = self._data = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class RingReader:
+    """Cursor de lectura independiente sobre un SharedSampleRing."""
+
+    def __init__(self, ring: SharedSampleRing, cursor: int = 0):
+        self.ring = ring
+        self.cursor = cursor
+        self.lost = 0          # filas sobrescritas antes de poder leerlas
+        self._start = cursor   # inicio del último rango devuelto
+
+    def read(self) -> list:
+        """
+        Devuelve las filas nuevas como lista de 0, 1 o 2 vistas (2 si el rango
+        da la vuelta al buffer), sin copiar. Las vistas apuntan a la memoria
+        compartida: consumirlas antes de que el escritor complete otra vuelta
+        (ver still_valid) o copiarlas si se van a guardar.
+        """
+        ring = self.ring
+        head = ring.head
+        cap = ring.capacity
+        if head - self.cursor > cap:
+            self.lost += head - cap - self.cursor
+            self.cursor = head - cap
+        start, n = self.cursor, head - self.cursor
+        self._start = start
+        self.cursor = head
+        if not n:
+            return []
+        i = start % cap
+        if i + n <= cap:
+            return [ring._data[i:i + n]]
+        return [ring._data[i:], ring._data[:i + n - cap]]
+
+    def read_array(self) -> np.ndarray:
+        """Como read() pero en un único array (copia sólo si da la vuelta)."""
+        views = self.read()
+        if not views:
+            return np.empty((0, self.ring.n_columns))
+        return views[0] if len(views) == 1 else np.concatenate(views)
+
+    def still_valid(self) -> bool:
+        """True si el último rango leído no ha sido sobrescrito todavía."""
+        return self.ring.head - self._start <= self.ring.capacity
@@ -0,0 +1,126 @@
+# core/imu/telemetry.py
+
+import threading
+from collections import deque
+import numpy as np
+
+
+class StreamTelemetry:
+    """
+    Salud del flujo de un sensor, con coste bajo y memoria fija: se
+    actualiza una vez por lectura del puerto (no por muestra) y los
+    percentiles sólo se calculan al pedir stats().
+
+    - Hz efectivos y bytes/s sobre una ventana deslizante de tiempo de host
+    - intervalo entre muestras (timestamps del ESP32) y su jitter en percentiles
+    - huecos: saltos de timestamp mayores que `gap_factor` × periodo nominal
+      (p.ej. reinicios de la FIFO del DMP) y muestras perdidas estimadas
+    - líneas que no se pudieron parsear y saltos atrás del reloj (reinicios)
+    """
+
+    def __init__(self, window: float = 2.0, history: int = 1024, gap_factor: float = 1.8):
+        """
+        :param window: segundos usados para Hz y bytes/s
+        :param history: intervalos recientes guardados para los percentiles
+        :param gap_factor: múltiplo del periodo nominal a partir del cual un
+            salto de timestamp cuenta como hueco
+        """
+        self.window = window
+        self.gap_factor = gap_factor
+        self._lock = threading.Lock()
+        self._reads = deque()                         # (instante, muestras, bytes)
+        self._intervals = np.zeros(history)           # buffer circular, ms
+        self._n_intervals = 0
+        self._last_ts = None
+        self._period = None                           # periodo nominal estimado (ms)
+
+        # Contadores acumulados
+        self.samples = 0
+        self.bytes = 0
+        self.parse_errors = 0
+        self.gaps = 0
+        self.lost_samples = 0
+        self.clock_resets = 0
+
+    def update(self, now: float, n_bytes: int, timestamps: np.ndarray = None,
+               parse_errors: int = 0):
+        """
+        Registra una lectura del puerto.
+
+        :param now: instante de la lectura (time.monotonic())
+        :param n_bytes: bytes leídos
+        :param timestamps: timestamps (ms) de las muestras válidas de la lectura
+        :param parse_errors: líneas/tramas descartadas en esta lectura
+        """
+        n = 0 if timestamps is None else len(timestamps)
+        with self._lock:
+            self.bytes += n_bytes
+            self.samples += n
+            self.parse_errors += parse_errors
+            reads = self._reads
+            reads.append((now, n, n_bytes))
+            while now - reads[0][0] > self.window:
+                reads.popleft()
+            if not n:
+                return
+
+            # Bucle Python: en régimen cada lectura trae 1-2 muestras y así
+            # sale más barato que operar con arrays
+            intervals, h = self._intervals, len(self._intervals)
+            k, last, period = self._n_intervals, self._last_ts, self._period
+            limit = self.gap_factor * period if period else None
+            for ts in timestamps.tolist():
+                if last is not None:
+                    dt = ts - last
+                    if dt < 0:
+                        # El ESP32 se ha reiniciado (millis() vuelve a empezar)
+                        self.clock_resets += 1
+                        period = limit = None
+                    else:
+                        if limit is not None and dt > limit:
+                            self.gaps += 1
+                            self.lost_samples += round(dt / period) - 1
+                        intervals[k % h] = dt
+                        k += 1
+                        if period is None and k >= 8 and k % 8 == 0:
+                            # Periodo nominal: mediana de los primeros intervalos.
+                            # Si el ESP32 vacía la FIFO a ráfagas repite
+                            # timestamps y la mediana puede ser 0: se reintenta
+                            # cada 8 intervalos hasta que sea positiva
+                            median = float(np.median(intervals[:min(k, h)]))
+                            if median > 0:
+                                period, limit = median, self.gap_factor * median
+                last = ts
+            self._n_intervals, self._last_ts, self._period = k, last, period
+
+    def _recent(self) -> np.ndarray:
+        return self._intervals[:min(self._n_intervals, len(self._intervals))]
+
+    def stats(self, now: float) -> dict:
+        """Instantánea de la telemetría en `now` (time.monotonic())."""
+        with self._lock:
+            reads = [r for r in self._reads if now - r[0] <= self.window]
+            intervals = self._recent().copy()
+            stats = {
+                'samples': self.samples,
+                'bytes': self.bytes,
+                'parse_errors': self.parse_errors,
+                'gaps': self.gaps,
+                'lost_samples': self.lost_samples,
+                'clock_resets': self.clock_resets,
+            }
+        if len(reads) >= 2:
+            span = max(now - reads[0][0], 1e-3)
+            stats['hz'] = sum(r[1] for r in reads[1:]) / span
+            stats['bytes_per_s'] = sum(r[2] for r in reads[1:]) / span
+        else:
+            stats['hz'] = stats['bytes_per_s'] = 0.0
+        if len(intervals):
+            keys = ('p50', 'p95', 'p99')
+            interval = np.percentile(intervals, (50, 95, 99))
+            jitter = np.percentile(np.abs(intervals - interval[0]), (50, 95, 99))
+            stats['interval_ms'] = dict(zip(keys, interval.tolist()))
+            stats['jitter_ms'] = dict(zip(keys, jitter.tolist()))
+        else:
+            stats['interval_ms'] = stats['jitter_ms'] = None
+        return stats
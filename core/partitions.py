@@ -0,0 +1,397 @@
+# core/partitions.py
+
+"""
+Grabaciones raw particionadas por sesión y ventana de tiempo.
+
+En vez de un único fichero que crece para siempre, cada sesión de captura
+escribe en su carpeta ficheros de `window_s` segundos:
+
+    <raíz>/manifest.json
+    <raíz>/20261018-101500/part-0000.csv      (o .imub)
+    <raíz>/20261018-101500/part-0001.csv
+    ...
+
+El manifiesto guarda por partición su sesión, la hora de apertura y
+cierre (reloj del host), las filas y, por sensor, filas y rango de
+timestamps (ms del ESP32). load_range() sólo abre las particiones que
+solapan con lo pedido, así que analizar una sesión entre meses de datos no
+recorre todo el histórico:
+
+    python -m core.partitions data/datos_ejercicio_raw [sesión]
+
+Puede haber varios escritores sobre la misma raíz (p.ej. la adquisición en
+otro proceso y una grabación desde la GUI): el manifiesto se reescribe con
+un lock entre procesos y cada sesión en curso mantiene bloqueado su
+fichero `.writing`.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+from core.csv_writer import ColumnBatch
+from core.recording import open_writer, load_table
+
+MANIFEST = "manifest.json"
+SESSION_LOCK = ".writing"
+
+
+def manifest_path(root: str) -> str:
+    return os.path.join(root, MANIFEST)
+
+
+def load_manifest(root: str) -> list:
+    """Entradas del manifiesto de `root` ([] si todavía no hay)."""
+    try:
+        with open(manifest_path(root)) as f:
+            return json.load(f)['partitions']
+    except FileNotFoundError:
+        return []
+
+
+def _lock_file(path: str, blocking: bool = False):
+    """
+    Abre `path` y lo bloquea en exclusiva entre procesos. Devuelve el
+    fichero (el lock dura hasta _unlock_file o hasta que muera el proceso)
+    o None si, sin `blocking`, otro lo tiene.
+    """
+    f = open(path, 'a+')
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def _unlock_file(f):
+    if fcntl is None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    f.close()
+
+
+def session_live(root: str, session: str) -> bool:
+    """True si algún escritor (de este u otro proceso) sigue grabando `session`."""
+    path = os.path.join(root, session, SESSION_LOCK)
+    if not os.path.exists(path):
+        return False
+    f = _lock_file(path)
+    if f is None:
+        return True
+    _unlock_file(f)
+    return False
+
+
+def _save_manifest(root: str, entries: list):
+    """Reescribe el manifiesto de forma atómica (nunca queda a medias)."""
+    tmp = manifest_path(root) + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump({'partitions': entries}, f, indent=1)
+    os.replace(tmp, manifest_path(root))
+
+
+def _merge_manifest(root: str, entries: list):
+    """
+    Guarda `entries` en el manifiesto (sustituyendo las de igual 'path')
+    sin tocar las que hayan escrito otros escritores de la misma raíz.
+    """
+    lock = _lock_file(manifest_path(root) + ".lock", blocking=True)
+    try:
+        own = {entry['path']: entry for entry in entries}
+        merged = [own.pop(entry['path'], entry) for entry in load_manifest(root)]
+        _save_manifest(root, merged + list(own.values()))
+    finally:
+        if lock is not None:
+            _unlock_file(lock)
+
+
+def scan_partition(path: str) -> dict:
+    """Filas y rango de timestamps por sensor leyendo el fichero entero."""
+    df = load_table(path)
+    sensors = {}
+    if len(df):
+        stats = df.groupby(df['sensor_id'].astype(str), observed=True)['timestamp'] \
+                  .agg(['size', 'min', 'max'])
+        for sid, (rows, t_min, t_max) in stats.iterrows():
+            sensors[sid] = {'rows': int(rows), 't_min': float(t_min), 't_max': float(t_max)}
+    return sensors
+
+
+def _update_stats(sensors: dict, sensor_id: str, n: int, t_min: float, t_max: float):
+    stats = sensors.get(sensor_id)
+    if stats is None:
+        sensors[sensor_id] = {'rows': n, 't_min': t_min, 't_max': t_max}
+    else:
+        stats['rows'] += n
+        stats['t_min'] = min(stats['t_min'], t_min)
+        stats['t_max'] = max(stats['t_max'], t_max)
+
+
+class PartitionedWriter:
+    """
+    Escritor raw con la interfaz de BatchedWriter (write_row, write_rows,
+    write_columns, close) que rota a un fichero nuevo cada `window_s`
+    segundos y mantiene el manifiesto.
+
+    Cada partición es un escritor de open_writer (CSV o .imub según
+    `extension`), con su propio hilo. Las estadísticas del manifiesto se
+    llevan al encolar, sin releer nada. La sesión y cada partición se crean
+    con la primera fila (grabar sin raw no deja ficheros vacíos). Una
+    partición se da de alta en el manifiesto al abrirse (sin estadísticas:
+    las consultas la abren siempre) y se completa al cerrarse; si el
+    programa se corta queda marcada como abierta y el siguiente
+    PartitionedWriter sobre la misma raíz la recorre para completarla,
+    salvo que su sesión siga viva en otro escritor (ver session_live).
+    """
+
+    def __init__(self, root: str, header: list, window_s: float = 300.0,
+                 extension: str = ".csv", fsync: str = 'close', codec: str = 'raw'):
+        """
+        :param root: carpeta de la grabación (manifiesto y una carpeta por sesión)
+        :param header: columnas; deben incluir 'timestamp' y 'sensor_id'
+        :param window_s: segundos (reloj del host) de cada partición
+        :param extension: '.csv' o '.imub'
+        """
+        self.root = root
+        self.columns = list(header)
+        self.window_s = window_s
+        self.extension = extension
+        self.fsync = fsync
+        self.codec = codec
+        self._i_ts = self.columns.index('timestamp')
+        self._i_sid = self.columns.index('sensor_id')
+
+        os.makedirs(root, exist_ok=True)
+        # Sólo las entradas de este escritor: las demás las lleva su dueño
+        self._manifest = self._recover()
+        self.session = None    # se fija con la primera partición
+        self._session_lock = None
+
+        # El cierre de una partición (vaciar su cola, fsync) va en otro hilo
+        # para no parar la adquisición; el manifiesto se toca con el lock
+        self._lock = threading.Lock()
+        self._closers = []
+        self._writer = None
+        self._entry = None
+        self._part = 0
+        self._closed = False
+
+    def _new_session_id(self) -> str:
+        session = time.strftime('%Y%m%d-%H%M%S')
+        suffix, candidate = 1, session
+        while os.path.exists(os.path.join(self.root, candidate)):
+            suffix += 1
+            candidate = f"{session}-{suffix}"
+        return candidate
+
+    def _recover(self) -> list:
+        """
+        Completa las particiones que quedaron abiertas por un corte (las de
+        sesiones que ningún escritor mantiene vivas) y devuelve sus entradas.
+        """
+        recovered = []
+        for entry in load_manifest(self.root):
+            if entry['closed'] is None and not session_live(self.root, entry['session']):
+                path = os.path.join(self.root, entry['path'])
+                try:
+                    entry['sensors'] = scan_partition(path) if os.path.exists(path) else {}
+                except (OSError, ValueError) as e:
+                    print(f"No se pudo recorrer {path}: {e}")
+                    entry['sensors'] = {}
+                entry['rows'] = sum(s['rows'] for s in entry['sensors'].values())
+                entry['closed'] = os.path.getmtime(path) if os.path.exists(path) else entry['opened']
+                recovered.append(entry)
+        if recovered:
+            _merge_manifest(self.root, recovered)
+        return recovered
+
+    def _open_partition(self):
+        if self._part == 0:
+            self.session = self._new_session_id()
+            os.makedirs(os.path.join(self.root, self.session))
+            self._session_lock = _lock_file(os.path.join(self.root, self.session, SESSION_LOCK))
+        rel = f"{self.session}/part-{self._part:04d}{self.extension}"
+        self._part += 1
+        self._writer = open_writer(os.path.join(self.root, rel), self.columns,
+                                   fsync=self.fsync, codec=self.codec)
+        self._entry = {'path': rel, 'session': self.session, 'opened': time.time(),
+                       'closed': None, 'rows': 0, 'sensors': {}}
+        # Estadísticas en curso: pasan a la entrada al cerrar la partición
+        self._rows = 0
+        self._sensors = {}
+        self._deadline = time.monotonic() + self.window_s
+        with self._lock:
+            self._manifest.append(self._entry)
+            _merge_manifest(self.root, self._manifest)
+
+    def _finish_stats(self):
+        with self._lock:
+            self._entry['rows'] = self._rows
+            self._entry['sensors'] = self._sensors
+
+    def _close_partition(self, writer, entry):
+        writer.close()
+        with self._lock:
+            entry['closed'] = time.time()
+            _merge_manifest(self.root, self._manifest)
+
+    def _rotate(self):
+        if self._writer is None:
+            if self._closed:
+                raise ValueError("PartitionedWriter cerrado")
+            self._open_partition()
+            return
+        if time.monotonic() < self._deadline:
+            return
+        self._finish_stats()
+        closer = threading.Thread(target=self._close_partition,
+                                  args=(self._writer, self._entry), daemon=True)
+        closer.start()
+        self._closers = [t for t in self._closers if t.is_alive()] + [closer]
+        self._open_partition()
+
+    def write_row(self, row: list):
+        self._rotate()
+        self._writer.write_row(row)
+        self._rows += 1
+        t = float(row[self._i_ts])
+        _update_stats(self._sensors, str(row[self._i_sid]), 1, t, t)
+
+    def write_rows(self, rows: list):
+        for row in rows:
+            self.write_row(row)
+
+    def write_columns(self, columns: dict):
+        """Como BatchedWriter.write_columns; sensor_id puede ser escalar o array."""
+        batch = ColumnBatch(columns)
+        if not len(batch):
+            return
+        self._rotate()
+        self._writer.write_columns(columns)
+        self._rows += len(batch)
+        ts, sid = np.asarray(columns['timestamp']), columns['sensor_id']
+        if not np.ndim(sid):
+            _update_stats(self._sensors, str(sid), len(batch), float(ts.min()), float(ts.max()))
+        else:
+            sid = np.asarray(sid)
+            for s in np.unique(sid):
+                t = ts[sid == s]
+                _update_stats(self._sensors, str(s), len(t), float(t.min()), float(t.max()))
+
+    def close(self):
+        """Cierra la partición actual y espera a las que se estaban cerrando."""
+        self._closed = True
+        if self._writer is not None:
+            self._finish_stats()
+            self._close_partition(self._writer, self._entry)
+            self._writer = None
+        for closer in self._closers:
+            closer.join()
+        if self._session_lock is not None:
+            _unlock_file(self._session_lock)
+            self._session_lock = None
+
+
+def select_partitions(root: str, sensor_id: str = None, t0: float = None, t1: float = None,
+                      session: str = None) -> list:
+    """
+    Entradas del manifiesto que pueden contener filas de `sensor_id` con
+    timestamp en [t0, t1] de la sesión `session` (None = cualquiera). Las
+    particiones todavía abiertas no tienen estadísticas y se incluyen siempre.
+    """
+    out = []
+    for entry in load_manifest(root):
+        if session is not None and entry['session'] != session:
+            continue
+        if entry['closed'] is None:
+            out.append(entry)
+            continue
+        sensors = entry['sensors'] if sensor_id is None else \
+            {sensor_id: entry['sensors'][sensor_id]} if sensor_id in entry['sensors'] else {}
+        if any((t0 is None or s['t_max'] >= t0) and (t1 is None or s['t_min'] <= t1)
+               for s in sensors.values()):
+            out.append(entry)
+    return out
+
+
+def load_range(root: str, sensor_id: str = None, t0: float = None, t1: float = None,
+               session: str = None) -> pd.DataFrame:
+    """
+    Filas raw de `sensor_id` (None = todos) con timestamp en [t0, t1]
+    (ms del ESP32; None = sin límite), abriendo sólo las particiones que
+    solapan. Los timestamps del ESP32 vuelven a 0 en cada arranque, así
+    que para un rango dentro de una sesión conviene indicar `session`.
+    """
+    parts = []
+    for entry in select_partitions(root, sensor_id, t0, t1, session):
+        df = load_table(os.path.join(root, entry['path']))
+        mask = np.ones(len(df), dtype=bool)
+        if sensor_id is not None:
+            mask &= (df['sensor_id'].astype(str) == sensor_id).to_numpy()
+        if t0 is not None:
+            mask &= (df['timestamp'] >= t0).to_numpy()
+        if t1 is not None:
+            mask &= (df['timestamp'] <= t1).to_numpy()
+        parts.append(df[mask])
+    if not parts:
+        return pd.DataFrame(columns=['timestamp', 'sensor_id', 'yaw', 'pitch', 'roll'])
+    df = pd.concat(parts, ignore_index=True)
+    if isinstance(df['sensor_id'].dtype, pd.CategoricalDtype):
+        df['sensor_id'] = df['sensor_id'].astype(str)
+    return df
+
+
+def sessions(root: str) -> dict:
+    """{sesión: {'partitions', 'rows', 'sensors', 'opened', 'closed'}} según el manifiesto."""
+    out = {}
+    for entry in load_manifest(root):
+        s = out.setdefault(entry['session'], {'partitions': 0, 'rows': 0, 'sensors': set(),
+                                              'opened': entry['opened'], 'closed': None})
+        s['partitions'] += 1
+        s['rows'] += entry['rows']
+        s['sensors'].update(entry['sensors'])
+        s['closed'] = entry['closed']
+    return out
+
+
+def main(argv=None):
+    """
+    Resumen de una grabación particionada:
+        python -m core.partitions data/datos_ejercicio_raw          (sesiones)
+        python -m core.partitions data/datos_ejercicio_raw <sesión> (particiones)
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not 1 <= len(argv) <= 2:
+        print(main.__doc__)
+        return 1
+    root = argv[0]
+    if len(argv) == 1:
+        for session, s in sessions(root).items():
+            opened = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(s['opened']))
+            print(f"{session}  {opened}  {s['partitions']:4d} particiones  {s['rows']:9d} filas  "
+                  f"{', '.join(sorted(s['sensors']))}")
+        return 0
+    for entry in select_partitions(root, session=argv[1]):
+        ranges = ', '.join(f"{sid} {s['rows']} filas [{s['t_min']:.0f}, {s['t_max']:.0f}] ms"
+                           for sid, s in sorted(entry['sensors'].items()))
+        print(f"{entry['path']}  {ranges}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,86 +1,142 @@
 # core/predictor.py
 
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-import time
 from joblib import load
 import numpy as np
 from PyQt5.QtCore import QObject, pyqtSignal
 
-from core.features import extract_features
-from core.imu.manager import SensorManager
+from core.features import FEATURE_NAMES
+from core.imu.manager import SensorManager, SensorStartupError
+from core.imu.parsing import block_to_readings
+from core.segment_buffer import SegmentBuffer, SegmentCapture
+from core.segmentation import RepSegmenter, segment_actions
+from core.ui_batch import SampleBatcher
 import config
 
 class PredictorController(QObject):
     """
     Controlador para predicción en vivo:
     - Lee IMUs sólo tras start()
-    - Segmenta repeticiones y lanza predicción
+    - Segmenta repeticiones (a mano o con un RepSegmenter) y lanza predicción
     """
-    data_ready        = pyqtSignal(dict)          # cada lectura {'sensor_id',...}
+    data_batch_ready  = pyqtSignal(dict)          # lote {sensor_id: {columna: array}}
+    data_ready        = pyqtSignal(dict)          # cada lectura (compatibilidad, sólo si hay conexiones)
     recording_started = pyqtSignal()
     recording_stopped = pyqtSignal()
     segment_started   = pyqtSignal()
     segment_stopped   = pyqtSignal()
     prediction_ready  = pyqtSignal(str, float)    # (label, probabilidad)
-
-    def __init__(self, sensor_configs, model_path):
+    start_failed      = pyqtSignal(str)           # algún sensor no arrancó
+
+    def __init__(self, sensor_configs, model_path, io_mode='auto', ui_rate_hz: float = 30,
+                 pre_roll: float = 0.0, post_roll: float = 0.0,
+                 segmenter: RepSegmenter = None, segment_sensor: str = None):
+        """
+        :param pre_roll: segundos previos incluidos en cada repetición (ver SegmentCapture)
+        :param post_roll: segundos posteriores incluidos en cada repetición
+        :param segmenter: detector para el reconocimiento automático (ver set_auto_segment)
+        :param segment_sensor: sensor que lo alimenta (por defecto el primero)
+        """
         super().__init__()
         # Sólo guardamos configs; NO abrimos nada aún
         self.sensor_configs = sensor_configs
+        self.io_mode        = io_mode
         self.sm             = None
         self.model          = load(model_path)
 
         self._thread     = None
         self._stop_event = threading.Event()
 
-        self._seg_active = False
-        self._buffer     = []
+        # El modelo guarda las columnas con que se entrenó (feature_names_in_
+        # de sklearn, el subconjunto elegido al entrenar): sólo se calculan ésas
+        self._feature_names = list(getattr(self.model, "feature_names_in_", FEATURE_NAMES))
+
+        # La predicción se lanza al cerrarse cada repetición (tras el post-roll)
+        # en un hilo propio, para no frenar la adquisición ni la GUI; las
+        # features se acumulan mientras llegan las muestras
+        self._predict_pool = ThreadPoolExecutor(max_workers=1)
+        self._capture = SegmentCapture(self._submit_prediction, pre_roll, post_roll,
+                                       features=self._feature_names)
+        self._segmenter      = segmenter
+        self._segment_sensor = segment_sensor or sensor_configs[0]['id']
+        self._auto_segment   = False
+
+        self._batcher = SampleBatcher(ui_rate_hz, self)
+        self._batcher.data_batch_ready.connect(self.data_batch_ready)
+        # Se emite desde el hilo de lectura: el QTimer arranca en el de la GUI
+        self.recording_started.connect(self._start_batcher)
 
     def start(self):
-        """Arranca la lectura continua (y abre los sensores en este momento)."""
-        # 1) Si aún no hay SensorManager, lo creamos ahora
-        if self.sm is None:
-            self.sm = SensorManager(self.sensor_configs)
-
-        # 2) Si el hilo ya corre, no hacemos nada
+        """
+        Arranca la lectura continua. Los sensores se abren (y se espera a
+        que respondan) en el hilo de lectura, no en el de la GUI: el
+        resultado llega por recording_started o start_failed.
+        """
+        # Si el hilo ya corre (o está abriendo los sensores), no hacemos nada
         if self._thread and self._thread.is_alive():
             return
-
         self._stop_event.clear()
         self._thread = threading.Thread(target=self._loop, daemon=True)
         self._thread.start()
-        self.recording_started.emit()
+
+    def _start_batcher(self):
+        # Si se paró mientras se abrían los sensores, el timer no debe arrancar
+        if not self._stop_event.is_set():
+            self._batcher.start()
+
+    def telemetry(self) -> dict:
+        """Telemetría por sensor mientras está activo ({} si está parado)."""
+        sm = self.sm
+        return sm.telemetry() if sm else {}
 
     def stop(self):
         """Para la lectura y cierra los sensores."""
         self._stop_event.set()
         if self._thread:
             self._thread.join()
+        self._batcher.stop()
+        self._capture.flush()
         if self.sm:
             self.sm.close_all()
             self.sm = None
         self.recording_stopped.emit()
 
-    def start_segment(self):
+    def set_auto_segment(self, enabled: bool):
+        """Activa/desactiva el reconocimiento automático de repeticiones."""
+        if enabled and self._segmenter is None:
+            raise ValueError("PredictorController creado sin segmenter")
+        if enabled and not self._auto_segment:
+            self._segmenter.reset()
+        self._auto_segment = enabled
+
+    def start_segment(self, pre_roll: float = None):
         """Marca el inicio de una repetición."""
-        if not self._seg_active:
-            self._seg_active = True
-            self._buffer = []
+        if self._capture.start(pre_roll=pre_roll):
             self.segment_started.emit()
 
-    def stop_segment(self):
-        """Marca el fin de la repetición y emite la predicción."""
-        if not self._seg_active:
+    def stop_segment(self, post_roll: float = None):
+        """Marca el fin de la repetición; la predicción llega al cerrarse."""
+        if not self._capture.active:
             return
-        self._seg_active = False
         self.segment_stopped.emit()
-
-        # 1) Convertir buffer a DataFrame ordenado y extraer features
-        # Ordena por timestamp y lo convierte en DataFrame
-        df_rep = pd.DataFrame(sorted(self._buffer, key=lambda d: d['timestamp']))
-        feat = extract_features(df_rep)
-        df_feat = pd.DataFrame([feat])
+        self._capture.stop(post_roll)
+
+    def _submit_prediction(self, buffer: SegmentBuffer, tag):
+        """on_finish de SegmentCapture: encola la predicción (en orden)."""
+        future = self._predict_pool.submit(self._predict, buffer, tag)
+        future.add_done_callback(
+            lambda f: f.exception() and print(f"Error en la predicción: {f.exception()}"))
+
+    def _predict(self, buffer: SegmentBuffer, tag):
+        """Predice una repetición terminada y emite prediction_ready (hilo de predicción)."""
+        # 1) Features ya acumuladas durante la repetición (con varios
+        # sensores se calculan sobre las columnas intercaladas por timestamp)
+        if len(buffer) < 2:
+            print("Repetición demasiado corta: no se predice")
+            return
+        df_feat = pd.DataFrame([buffer.features()], columns=self._feature_names)
 
         # 2) Predecir con el modelo
         y_pred = self.model.predict(df_feat)[0]
@@ -92,12 +148,47 @@ class PredictorController(QObject):
         label = getattr(config, "LABEL_NAME_MAP", {}).get(y_pred, str(y_pred))
         self.prediction_ready.emit(label, float(proba))
 
+    def _open_sensors(self) -> bool:
+        """Abre los sensores (hilo de lectura); False si alguno no arrancó."""
+        try:
+            self.sm = SensorManager(self.sensor_configs, io_mode=self.io_mode)
+        except SensorStartupError as e:
+            self.start_failed.emit(str(e))
+            return False
+        if self._segmenter is not None:
+            self._segmenter.reset()
+        return True
+
     def _loop(self):
-        """Bucle que lee datos y emite señales."""
+        """Abre los sensores y lee datos emitiendo señales hasta stop()."""
+        if not self._open_sensors():
+            return
+        self.recording_started.emit()
         while not self._stop_event.is_set():
-            readings = self.sm.read_all()
-            for rd in readings:
-                self.data_ready.emit(rd)
-                if self._seg_active:
-                    self._buffer.append(rd)
-            time.sleep(0.001)
+            # Bloquea hasta que haya datos nuevos (sin sondeo activo)
+            if not self.sm.wait_data(timeout=0.1):
+                continue
+            per_sample = self.receivers(self.data_ready) > 0
+            for sensor_id, block in self.sm.read_all_arrays().items():
+                if not len(block):
+                    continue
+                self._capture.add_block(sensor_id, block)
+                if self._auto_segment and sensor_id == self._segment_sensor:
+                    self._auto_segment_block(block)
+                self._batcher.push(sensor_id, block)
+                if per_sample:
+                    for rd in block_to_readings(sensor_id, block):
+                        self.data_ready.emit(rd)
+
+    def _auto_segment_block(self, block):
+        """Pasa un bloque del sensor guía por el segmenter y aplica sus eventos."""
+        events = self._segmenter.update(block)
+        if not events:
+            return
+        for action in segment_actions(events, block[-1, 0]):
+            if action[0] == 'start':
+                self.start_segment(pre_roll=action[1])
+            elif action[0] == 'stop':
+                self.stop_segment(post_roll=action[1])
+            elif self._capture.cancel():
+                self.segment_stopped.emit()
@@ -0,0 +1,461 @@
+# core/recording.py
+
+"""
+Formato binario de grabación (.imub): columnar, por bloques y sólo-añadir.
+
+    cabecera   b"IMUREC01" | u32 longitud | JSON {"columns": [...]} (alineado a 8)
+    bloque*    b"CHNK" | u32 filas | u32 longitud meta | u32 bytes de columnas
+               meta JSON {"cats": {...}, "rep": id|null, "label": str|null}
+               columnas contiguas, cada una alineada a 8 bytes
+               (o, en bloques comprimidos, el paquete de core.codec)
+    índice     JSON {"chunks": [[offset, filas, rep, label], ...]}
+    cola       u64 offset del índice | b"IMUIDX01"
+
+Tipos por columna: rep_id → int32, timestamp → float64, sensor_id/label/
+etiqueta → int16 (códigos sobre el diccionario del propio bloque), el
+resto → float32. Cada bloque se describe a sí mismo, así que si el programa
+se corta antes de escribir el índice el lector lo reconstruye recorriendo
+los bloques; al volver a abrir para añadir se descarta el índice y se
+reescribe al cerrar.
+
+Con un códec distinto de 'raw' (ver core.codec) cada bloque guarda sus
+columnas como diferencias en varint, con los ángulos en centésimas de
+grado, y opcionalmente comprimidas con zlib/lzma; la meta del bloque lo
+indica ("codec", "enc", "packed"), así que en un mismo fichero
+pueden convivir bloques de ambos tipos. Estos bloques se decodifican al
+leerlos (uno a uno: el acceso aleatorio por bloque se mantiene) en vez de
+mapearse sin copia.
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import numpy as np
+import pandas as pd
+
+from core.csv_writer import BatchedWriter, BatchedCSVWriter, ColumnBatch
+from core.codec import CODECS, encode_columns, decode_columns, compress, decompress
+
+BINARY_EXTENSION = ".imub"
+
+_MAGIC = b"IMUREC01"
+_CHUNK = struct.Struct('<4sIII')
+_CHUNK_MAGIC = b"CHNK"
+_TRAILER = struct.Struct('<Q8s')
+_TRAILER_MAGIC = b"IMUIDX01"
+
+CATEGORICAL_COLUMNS = ('sensor_id', 'label', 'etiqueta')
+LABEL_COLUMNS = ('label', 'etiqueta')
+
+
+def column_dtype(name: str):
+    """Tipo de almacenamiento de una columna según su nombre."""
+    if name == 'rep_id':
+        return np.dtype('<i4')
+    if name == 'timestamp':
+        return np.dtype('<f8')
+    if name in CATEGORICAL_COLUMNS:
+        return np.dtype('<i2')
+    return np.dtype('<f4')
+
+
+def _pad8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _padded_json(obj) -> bytes:
+    raw = json.dumps(obj, separators=(',', ':')).encode()
+    return raw + b" " * (_pad8(len(raw)) - len(raw))
+
+
+def encode_chunk(columns: list, data: dict, codec: str = 'raw') -> tuple:
+    """
+    Codifica un bloque. `data` = {columna: secuencia de n valores}; `codec`
+    uno de core.codec.CODECS. Devuelve (bytes, filas, rep, label) para el índice.
+    """
+    n = len(data[columns[0]])
+    meta = {'cats': {}, 'rep': None, 'label': None}
+    stored = {}
+    for name in columns:
+        dtype = column_dtype(name)
+        if name in CATEGORICAL_COLUMNS:
+            cats, codes = np.unique(np.asarray(data[name], dtype=object).astype(str),
+                                    return_inverse=True)
+            meta['cats'][name] = cats.tolist()
+            values = codes.astype(dtype)
+            if name in LABEL_COLUMNS and len(cats) == 1:
+                meta['label'] = str(cats[0])
+        else:
+            values = np.asarray(data[name]).astype(dtype, copy=False)
+            if name == 'rep_id' and n and values[0] == values[-1] and (values == values[0]).all():
+                meta['rep'] = int(values[0])
+        stored[name] = values
+    if codec == 'raw':
+        parts = [stored[name].tobytes() for name in columns]
+        body = b"".join(raw + b"\0" * (_pad8(len(raw)) - len(raw)) for raw in parts)
+    else:
+        group_column = _group_column(columns, meta)
+        groups = stored['sensor_id'] if group_column is not None else None
+        encs, payload = encode_columns([stored[name] for name in columns], groups, group_column)
+        body = compress(payload, codec)
+        meta.update(codec=codec, enc=encs, packed=len(body))
+        body += b"\0" * (_pad8(len(body)) - len(body))
+    meta_raw = _padded_json(meta)
+    header = _CHUNK.pack(_CHUNK_MAGIC, n, len(meta_raw), len(body))
+    return header + b"\0" * (_pad8(_CHUNK.size) - _CHUNK.size) + meta_raw + body, n, meta['rep'], meta['label']
+
+
+def _group_column(columns: list, meta: dict):
+    """
+    Posición de sensor_id si el bloque intercala varios sensores (las
+    diferencias del resto de columnas se calculan dentro de cada uno); si no, None.
+    """
+    if len(meta['cats'].get('sensor_id', ())) > 1:
+        return columns.index('sensor_id')
+    return None
+
+
+def decode_chunk_body(columns: list, meta: dict, body, n: int) -> dict:
+    """Columnas {nombre: array} de un bloque comprimido (inversa de encode_chunk)."""
+    payload = decompress(bytes(body[:meta['packed']]), meta['codec'])
+    arrays = decode_columns(meta['enc'], payload, n, [column_dtype(c) for c in columns],
+                            _group_column(columns, meta))
+    return dict(zip(columns, arrays))
+
+
+def _rep_runs(values) -> list:
+    """Tramos [i, j) de rep_id consecutivos iguales."""
+    values = np.asarray(values)
+    if not len(values):
+        return []
+    cuts = np.flatnonzero(values[1:] != values[:-1]) + 1
+    bounds = np.concatenate(([0], cuts, [len(values)]))
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def _read_header(f) -> tuple:
+    """Lee la cabecera; devuelve (columnas, offset del primer bloque)."""
+    head = f.read(12)
+    if len(head) < 12 or head[:8] != _MAGIC:
+        raise ValueError(f"{getattr(f, 'name', '')} no es una grabación {BINARY_EXTENSION}")
+    (length,) = struct.unpack('<I', head[8:])
+    info = json.loads(f.read(length))
+    return info['columns'], 12 + length
+
+
+def _scan_chunks(buf, start: int, end: int) -> tuple:
+    """
+    Recorre los bloques desde `start` y reconstruye el índice. Devuelve
+    (lista de [offset, filas, rep, label], offset tras el último bloque completo).
+    """
+    chunks = []
+    pos = start
+    head = _pad8(_CHUNK.size)
+    while pos + head <= end:
+        magic, n, meta_len, body_len = _CHUNK.unpack_from(buf, pos)
+        if magic != _CHUNK_MAGIC or pos + head + meta_len + body_len > end:
+            break
+        meta = json.loads(bytes(buf[pos + head:pos + head + meta_len]))
+        chunks.append([pos, n, meta['rep'], meta['label']])
+        pos += head + meta_len + body_len
+    return chunks, pos
+
+
+def _read_index(buf, size: int):
+    """Índice del pie si el fichero se cerró bien; si no, None."""
+    if size < _TRAILER.size:
+        return None, size
+    offset, magic = _TRAILER.unpack_from(buf, size - _TRAILER.size)
+    if magic != _TRAILER_MAGIC or offset > size - _TRAILER.size:
+        return None, size
+    index = json.loads(bytes(buf[offset:size - _TRAILER.size]))
+    return index['chunks'], offset
+
+
+def _header_bytes(columns: list) -> bytes:
+    info = json.dumps({'columns': list(columns)}).encode()
+    length = _pad8(12 + len(info)) - 12
+    return _MAGIC + struct.pack('<I', length) + info + b" " * (length - len(info))
+
+
+def _footer_bytes(chunks: list, offset: int) -> bytes:
+    return json.dumps({'chunks': chunks}).encode() + _TRAILER.pack(offset, _TRAILER_MAGIC)
+
+
+class BinaryRecordingWriter(BatchedWriter):
+    """
+    BatchedWriter que escribe el formato .imub: cada lote se convierte en
+    uno o varios bloques columnar (uno por tramo de rep_id) y el índice se
+    escribe al cerrar. Misma interfaz que BatchedCSVWriter.
+
+    Con un códec comprimido cada bloque tiene una sobrecarga fija (cabecera
+    y meta, ~200 B) que sólo se amortiza con bloques grandes, así que por
+    defecto se agrupan hasta `COMPRESSED_FLUSH_INTERVAL` s en vez de 0.25 s:
+    a cambio, un corte de luz puede perder ese último tramo.
+    """
+    COMPRESSED_FLUSH_INTERVAL = 2.0
+
+    def __init__(self, path: str, header: list, flush_interval: float = None,
+                 flush_bytes: int = 64 * 1024, fsync: str = 'close', codec: str = 'raw'):
+        """
+        :param path: fichero .imub (se crea o se abre para añadir)
+        :param header: nombres de columna, en el orden de las filas
+        :param flush_interval: espera máxima (s) antes de escribir un bloque
+            (por defecto 0.25 s, o COMPRESSED_FLUSH_INTERVAL con códec)
+        :param codec: códec de los bloques nuevos (core.codec.CODECS)
+        """
+        if codec not in CODECS:
+            raise ValueError(f"codec debe ser uno de {CODECS}, no {codec!r}")
+        if flush_interval is None:
+            flush_interval = 0.25 if codec == 'raw' else self.COMPRESSED_FLUSH_INTERVAL
+        super().__init__(path, flush_interval, flush_bytes, fsync)
+        self.codec = codec
+        self.columns = list(header)
+        self._row_bytes = sum(column_dtype(c).itemsize for c in self.columns)
+        self._pending = []      # listas de filas o ColumnBatch, en orden
+        self._pending_rows = 0
+        self._chunks = []
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        file = open(path, 'r+b' if exists else 'wb')
+        if exists:
+            columns, start = _read_header(file)
+            if columns != self.columns:
+                file.close()
+                raise ValueError(f"{path} tiene columnas {columns}, no {self.columns}")
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                chunks, end = _read_index(buf, len(buf))
+                if chunks is None:
+                    # Cierre incompleto: nos quedamos con los bloques íntegros
+                    chunks, end = _scan_chunks(buf, start, len(buf))
+            self._chunks = chunks
+            file.truncate(end)
+            file.seek(end)
+        else:
+            file.write(_header_bytes(self.columns))
+            file.flush()
+        self._start(file)
+
+    def _add(self, rows) -> int:
+        if isinstance(rows, ColumnBatch) or not self._pending \
+                or isinstance(self._pending[-1], ColumnBatch):
+            self._pending.append(rows if isinstance(rows, ColumnBatch) else list(rows))
+        else:
+            self._pending[-1].extend(rows)
+        self._pending_rows += len(rows)
+        return self._pending_rows * self._row_bytes
+
+    def _write_batch(self):
+        parts, self._pending, self._pending_rows = self._pending, [], 0
+        for part in parts:
+            n = len(part)
+            start = self._file.tell()
+            if isinstance(part, ColumnBatch):
+                # Columnas ya en arrays (p.ej. una repetición de SegmentBuffer)
+                data = {name: part.column(name) for name in self.columns}
+            else:
+                data = dict(zip(self.columns, zip(*part)))
+            runs = _rep_runs(data['rep_id']) if 'rep_id' in data else [(0, n)]
+            for i, j in runs:
+                chunk, n_rows, rep, label = encode_chunk(
+                    self.columns, {name: values[i:j] for name, values in data.items()},
+                    self.codec)
+                self._chunks.append([self._file.tell(), n_rows, rep, label])
+                self._file.write(chunk)
+            if isinstance(part, ColumnBatch) and part.on_written is not None:
+                self._written.append((part.on_written, start, self._file.tell()))
+
+    def _write_footer(self):
+        self._file.write(_footer_bytes(self._chunks, self._file.tell()))
+
+
+class RecordingReader:
+    """
+    Lector de grabaciones .imub mapeado en memoria: las columnas de cada
+    bloque son vistas sobre el fichero, sin parsear ni copiar (salvo en
+    los bloques comprimidos, que se decodifican al pedirlos).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.columns, start = _read_header(f)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mm = np.frombuffer(self._mmap, dtype=np.uint8)
+        chunks, _ = _read_index(self._mm, len(self._mm))
+        if chunks is None:
+            chunks, _ = _scan_chunks(self._mm, start, len(self._mm))
+        self.chunks = chunks
+        self.n_rows = sum(c[1] for c in chunks)
+
+        # rep_id → índices de bloque (en orden de escritura)
+        self.reps = {}
+        for i, (_, _, rep, _) in enumerate(chunks):
+            if rep is not None:
+                self.reps.setdefault(rep, []).append(i)
+
+    def rep_label(self, rep_id: int):
+        """Etiqueta de una repetición (la del primer bloque que la contiene)."""
+        return self.chunks[self.reps[rep_id][0]][3]
+
+    def chunk_end(self, i: int) -> int:
+        """Offset del primer byte tras el bloque i."""
+        offset = self.chunks[i][0]
+        _, _, meta_len, body_len = _CHUNK.unpack_from(self._mm, offset)
+        return offset + _pad8(_CHUNK.size) + meta_len + body_len
+
+    def chunk(self, i: int) -> tuple:
+        """
+        Columnas del bloque i como vistas: ({columna: array}, {columna: categorías});
+        las categóricas se devuelven como códigos int16 sobre sus categorías.
+        """
+        offset, n = self.chunks[i][0], self.chunks[i][1]
+        _, _, meta_len, _ = _CHUNK.unpack_from(self._mm, offset)
+        pos = offset + _pad8(_CHUNK.size)
+        meta = json.loads(bytes(self._mm[pos:pos + meta_len]))
+        pos += meta_len
+        if meta.get('codec', 'raw') != 'raw':
+            body = self._mm[pos:pos + meta['packed']]
+            return decode_chunk_body(self.columns, meta, body, n), meta['cats']
+        arrays = {}
+        for name in self.columns:
+            dtype = column_dtype(name)
+            arrays[name] = np.frombuffer(self._mm, dtype=dtype, count=n, offset=pos)
+            pos += _pad8(n * dtype.itemsize)
+        return arrays, meta['cats']
+
+    def to_dataframe(self, chunk_ids=None) -> pd.DataFrame:
+        """
+        DataFrame con las mismas columnas que el CSV equivalente (numéricas en
+        float64/int, categóricas como pandas.Categorical). Por defecto todo el
+        fichero; `chunk_ids` limita a esos bloques (p.ej. self.reps[rep_id]).
+        """
+        ids = range(len(self.chunks)) if chunk_ids is None else chunk_ids
+        parts = [self.chunk(i) for i in ids]
+        out = {}
+        for name in self.columns:
+            if name in CATEGORICAL_COLUMNS:
+                cats = sorted({c for _, chunk_cats in parts for c in chunk_cats[name]})
+                lookup = {c: k for k, c in enumerate(cats)}
+                codes = [np.array([lookup[c] for c in chunk_cats[name]], dtype=np.int16)[arrays[name]]
+                         for arrays, chunk_cats in parts]
+                codes = np.concatenate(codes) if codes else np.empty(0, dtype=np.int16)
+                out[name] = pd.Categorical.from_codes(codes, categories=cats)
+            else:
+                dtype = np.int64 if name == 'rep_id' else np.float64
+                arrays = [arrays[name] for arrays, _ in parts]
+                out[name] = np.concatenate(arrays, dtype=dtype) if arrays else np.empty(0, dtype)
+        return pd.DataFrame(out, columns=self.columns)
+
+    def close(self):
+        self._mm = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Quedan vistas de chunk() vivas: el mapeo se libera con la última
+            pass
+
+
+def is_binary(path: str) -> bool:
+    return path.endswith(BINARY_EXTENSION)
+
+
+def recording_path(path: str, fmt: str) -> str:
+    """Ruta de una grabación según el formato: 'csv' (tal cual) o 'binary' (.imub)."""
+    if fmt == 'binary':
+        return os.path.splitext(path)[0] + BINARY_EXTENSION
+    if fmt != 'csv':
+        raise ValueError(f"Formato de grabación desconocido: {fmt!r}")
+    return path
+
+
+def open_writer(path: str, header: list, fsync: str = 'close', codec: str = 'raw') -> BatchedWriter:
+    """
+    Escritor en segundo plano adecuado a la extensión de `path`; `codec`
+    sólo se aplica a .imub.
+    """
+    if is_binary(path):
+        return BinaryRecordingWriter(path, header, fsync=fsync, codec=codec)
+    return BatchedCSVWriter(path, header, fsync=fsync)
+
+
+def load_table(path: str) -> pd.DataFrame:
+    """Carga una grabación completa (CSV o .imub) como DataFrame."""
+    if is_binary(path):
+        reader = RecordingReader(path)
+        try:
+            return reader.to_dataframe()
+        finally:
+            reader.close()
+    return pd.read_csv(path)
+
+
+def write_recording(path: str, df: pd.DataFrame, chunk_rows: int = 4096, codec: str = 'raw'):
+    """
+    Escribe un DataFrame completo como .imub (sobrescribe): un bloque por
+    tramo de rep_id o, si no hay rep_id, bloques de `chunk_rows` filas.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"codec debe ser uno de {CODECS}, no {codec!r}")
+    columns = [str(c) for c in df.columns]
+    data = {name: df[name].to_numpy() for name in columns}
+    if 'rep_id' in data:
+        runs = _rep_runs(data['rep_id'])
+    else:
+        runs = [(i, min(i + chunk_rows, len(df))) for i in range(0, len(df), chunk_rows)]
+    chunks = []
+    with open(path, 'wb') as f:
+        f.write(_header_bytes(columns))
+        for i, j in runs:
+            chunk, n, rep, label = encode_chunk(columns, {k: v[i:j] for k, v in data.items()}, codec)
+            chunks.append([f.tell(), n, rep, label])
+            f.write(chunk)
+        f.write(_footer_bytes(chunks, f.tell()))
+
+
+def csv_to_binary(csv_path: str, out_path: str, chunk_rows: int = 4096, codec: str = 'raw'):
+    """Convierte un CSV existente (raw o etiquetado) a .imub."""
+    write_recording(out_path, pd.read_csv(csv_path), chunk_rows, codec)
+
+
+def binary_to_csv(in_path: str, csv_path: str):
+    """
+    Convierte un .imub a CSV con las columnas originales. Los float32 se
+    escriben con su representación más corta (153.28, no 153.27999877929688).
+    """
+    reader = RecordingReader(in_path)
+    try:
+        df = reader.to_dataframe()
+        for name in reader.columns:
+            if column_dtype(name) == np.float32:
+                df[name] = df[name].astype(np.float32)
+        df.to_csv(csv_path, index=False)
+    finally:
+        reader.close()
+
+
+def main(argv=None):
+    """
+    Conversión de datasets existentes:
+        python -m core.recording csv2bin data/datos_ejercicio.csv data/datos_ejercicio.imub [códec]
+        python -m core.recording bin2csv data/datos_ejercicio.imub salida.csv
+    con `códec` uno de raw (por defecto), delta, delta+zlib o delta+lzma.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not (len(argv) == 3 or (len(argv) == 4 and argv[0] == 'csv2bin')) \
+            or argv[0] not in ('csv2bin', 'bin2csv') or argv[3:] and argv[3] not in CODECS:
+        print(main.__doc__)
+        return 1
+    command, src, dst = argv[:3]
+    if command == 'csv2bin':
+        csv_to_binary(src, dst, codec=argv[3] if len(argv) == 4 else 'raw')
+    else:
+        binary_to_csv(src, dst)
+    print(f"{src} ({os.path.getsize(src)} B) → {dst} ({os.path.getsize(dst)} B)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
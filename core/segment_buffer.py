@@ -0,0 +1,425 @@
+# core/segment_buffer.py
+
+import time
+import threading
+from collections import deque
+import numpy as np
+
+from core.imu.parsing import SAMPLE_COLUMNS, N_COLUMNS
+from core.features import FeatureAccumulator, extract_features
+
+# Cada cuántas muestras se guarda una copia del FeatureAccumulator para
+# poder recortar el final de una repetición sin recorrerla entera
+CHECKPOINT_SAMPLES = 256
+
+
+class SegmentBuffer:
+    """
+    Muestras de una repetición en arrays NumPy por sensor, en vez de un
+    dict por muestra.
+
+    Cada sensor tiene un array columnar (4, capacidad) preasignado que
+    dobla su tamaño al llenarse, así que añadir es O(1) amortizado y un
+    bloque entero se copia de una vez. Al acabar la repetición columns()
+    devuelve vistas sin copia (con un único sensor) listas para
+    extract_features y para el escritor de etiquetas.
+
+    clear() no reutiliza la memoria: deja la actual a quien tenga las
+    vistas (p.ej. el hilo escritor) y la siguiente repetición reserva
+    otra de la misma capacidad.
+
+    Con `features` y un único sensor se lleva además un FeatureAccumulator
+    al día, así que features() no depende de la longitud de la repetición.
+    Con varios sensores las muestras no llegan en orden de timestamp
+    global: al aparecer el segundo se deja de acumular y features() las
+    calcula sobre las columnas intercaladas (O(longitud)).
+    """
+
+    def __init__(self, initial_capacity: int = 1024, features=False):
+        """
+        :param initial_capacity: muestras por sensor reservadas al empezar
+        :param features: acumular features al añadir (ver features()): True
+            para todas o la lista de nombres que necesita el modelo
+        """
+        self.initial_capacity = initial_capacity
+        self.track_features = bool(features)
+        self.feature_names = None if features is True or not features else tuple(features)
+        self._data = {}      # sensor_id → array (N_COLUMNS, capacidad)
+        self._size = {}      # sensor_id → muestras válidas
+        self._capacity = {}  # sensor_id → capacidad aprendida de repeticiones anteriores
+        self._acc = {}       # sensor_id → FeatureAccumulator
+        self._checkpoints = {}  # sensor_id → [(muestras, copia del acumulador)]
+        self._multi = False     # hay (o hubo) más de un sensor en la repetición
+
+    def __len__(self) -> int:
+        return sum(self._size.values())
+
+    def _reserve(self, sensor_id: str, n: int) -> np.ndarray:
+        """Array del sensor con hueco para n muestras más."""
+        data = self._data.get(sensor_id)
+        size = self._size.get(sensor_id, 0)
+        if data is None:
+            capacity = max(self._capacity.get(sensor_id, self.initial_capacity), n)
+            data = np.empty((N_COLUMNS, capacity), dtype=np.float64)
+            self._data[sensor_id] = data
+            self._size[sensor_id] = 0
+        elif size + n > data.shape[1]:
+            capacity = data.shape[1]
+            while capacity < size + n:
+                capacity *= 2
+            grown = np.empty((N_COLUMNS, capacity), dtype=np.float64)
+            grown[:, :size] = data[:, :size]
+            self._data[sensor_id] = data = grown
+        return data
+
+    def append_block(self, sensor_id: str, block: np.ndarray):
+        """Añade un bloque (n, 4) con columnas SAMPLE_COLUMNS."""
+        n = len(block)
+        if not n:
+            return
+        data = self._reserve(sensor_id, n)
+        size = self._size[sensor_id]
+        data[:, size:size + n] = block.T
+        self._size[sensor_id] = size + n
+        if self.track_features and not self._multi:
+            if len(self._size) > 1:
+                # Segundo sensor: los acumuladores por sensor no sirven
+                self._multi = True
+                self._acc = {}
+                self._checkpoints = {}
+            else:
+                self._accumulate(sensor_id, size, block)
+
+    def append(self, reading: dict):
+        """Añade una lectura suelta en formato dict (como read_all())."""
+        self.append_block(reading['sensor_id'],
+                          np.array([[reading[name] for name in SAMPLE_COLUMNS]], dtype=np.float64))
+
+    def _accumulate(self, sensor_id: str, size: int, block: np.ndarray):
+        acc = self._acc.get(sensor_id)
+        if acc is None:
+            acc = self._acc[sensor_id] = FeatureAccumulator(self.feature_names)
+            self._checkpoints[sensor_id] = [(0, acc.copy())]
+        elif size - self._checkpoints[sensor_id][-1][0] >= CHECKPOINT_SAMPLES:
+            self._checkpoints[sensor_id].append((size, acc.copy()))
+        acc.update(block)
+
+    def features(self) -> dict:
+        """
+        Features de la repetición como extract_features(self.columns(),
+        feature_names). Con un único sensor y `features` salen del
+        acumulador en tiempo constante; si no, se calculan sobre las columnas.
+        """
+        sizes = {sid: size for sid, size in self._size.items() if size}
+        if len(sizes) == 1:
+            acc = self._acc.get(next(iter(sizes)))
+            if acc is not None:
+                return acc.features()
+        return extract_features(self.columns(), self.feature_names)
+
+    def take(self) -> 'SegmentBuffer':
+        """
+        Entrega la repetición actual en otro SegmentBuffer (sin copiar las
+        muestras) y deja éste vacío, como clear(). Así se puede procesar
+        fuera del lock mientras éste ya recibe la siguiente.
+        """
+        taken = SegmentBuffer(self.initial_capacity)
+        taken.track_features, taken.feature_names = self.track_features, self.feature_names
+        taken._data, taken._size = self._data, self._size
+        taken._acc, taken._checkpoints, taken._multi = self._acc, self._checkpoints, self._multi
+        self.clear()
+        return taken
+
+    def arrays(self) -> dict:
+        """{sensor_id: vista (4, n)} con filas SAMPLE_COLUMNS, sin copia."""
+        return {sid: data[:, :self._size[sid]] for sid, data in self._data.items()}
+
+    def columns(self) -> dict:
+        """
+        Columnas de la repetición {'timestamp', 'sensor_id', 'yaw', 'pitch',
+        'roll'}. Con un único sensor son vistas sin copia en orden de
+        llegada y 'sensor_id' es un escalar; con varios se intercalan por
+        timestamp (orden estable) y 'sensor_id' es un array por muestra.
+        """
+        arrays = {sid: data for sid, data in self.arrays().items() if data.shape[1]}
+        if len(arrays) == 1:
+            (sensor_id, data), = arrays.items()
+            columns = dict(zip(SAMPLE_COLUMNS, data))
+            columns['sensor_id'] = sensor_id
+            return columns
+        if not arrays:
+            data = np.empty((N_COLUMNS, 0))
+            ids = np.empty(0, dtype=object)
+        else:
+            data = np.concatenate(list(arrays.values()), axis=1)
+            ids = np.repeat(np.array(list(arrays), dtype=object),
+                            [d.shape[1] for d in arrays.values()])
+            order = np.argsort(data[0], kind='stable')
+            data, ids = data[:, order], ids[order]
+        columns = dict(zip(SAMPLE_COLUMNS, data))
+        columns['sensor_id'] = ids
+        return columns
+
+    def truncate_after(self, sensor_id: str, t: float):
+        """Descarta las muestras del sensor con timestamp > t."""
+        size = self._size.get(sensor_id)
+        if size:
+            data = self._data[sensor_id]
+            new_size = int(np.searchsorted(data[0, :size], t, side='right'))
+            self._size[sensor_id] = new_size
+            if sensor_id in self._acc and new_size < size:
+                # Se vuelve a la última copia anterior al corte y se rehace
+                # lo que falta (como mucho CHECKPOINT_SAMPLES + un bloque)
+                checkpoints = self._checkpoints[sensor_id]
+                while checkpoints[-1][0] > new_size:
+                    checkpoints.pop()
+                start, acc = checkpoints[-1]
+                acc = acc.copy()
+                acc.update(data[:, start:new_size].T)
+                self._acc[sensor_id] = acc
+
+    def clear(self):
+        """Empieza una repetición nueva (ver nota de la clase sobre las vistas)."""
+        for sensor_id, data in self._data.items():
+            self._capacity[sensor_id] = data.shape[1]
+        self._data = {}
+        self._size = {}
+        self._acc = {}
+        self._checkpoints = {}
+        self._multi = False
+
+
+class HistoryRing:
+    """
+    Últimas `capacity` muestras de un sensor en memoria fija (capacity, 4):
+    lo nuevo sobrescribe lo más antiguo, así que ocupa lo mismo en una
+    sesión de un minuto que en una de horas. Sirve para el pre-roll: al
+    empezar una repetición se copian de aquí los instantes previos.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self._data = np.empty((capacity, N_COLUMNS), dtype=np.float64)
+        self._head = 0   # total escrito (posición = head % capacity)
+
+    def __len__(self) -> int:
+        return min(self._head, self.capacity)
+
+    def push(self, block: np.ndarray):
+        """Añade un bloque (n, 4); si no cabe entero se queda con el final."""
+        n = len(block)
+        if not n:
+            return
+        cap = self.capacity
+        if n > cap:
+            self._head += n - cap
+            block, n = block[-cap:], cap
+        start = self._head % cap
+        first = min(n, cap - start)
+        self._data[start:start + first] = block[:first]
+        self._data[:n - first] = block[first:]
+        self._head += n
+
+    @property
+    def last_timestamp(self):
+        """Timestamp de la muestra más reciente (None si está vacío)."""
+        return self._data[(self._head - 1) % self.capacity, 0] if self._head else None
+
+    def views(self) -> list:
+        """Contenido en orden de llegada como 0-2 vistas (n, 4), sin copia."""
+        n, cap = len(self), self.capacity
+        start = (self._head - n) % cap
+        if not n:
+            return []
+        if start + n <= cap:
+            return [self._data[start:start + n]]
+        return [self._data[start:], self._data[:start + n - cap]]
+
+    def since(self, t0: float, after: float = None) -> list:
+        """
+        Vistas de las muestras con timestamp >= t0 (y > `after` si se da),
+        suponiendo timestamps crecientes dentro del ring.
+        """
+        out = []
+        for view in self.views():
+            ts = view[:, 0]
+            i = np.searchsorted(ts, t0, side='left')
+            if after is not None:
+                i = max(i, np.searchsorted(ts, after, side='right'))
+            if i < len(view):
+                out.append(view[i:])
+        return out
+
+
+class SegmentCapture:
+    """
+    Repetición en curso con pre-roll y post-roll, compartida por
+    DataRecorder y PredictorController.
+
+    Todas las muestras pasan por add_block, que guarda los últimos
+    `history_samples` de cada sensor en un HistoryRing de memoria fija.
+    Así una repetición puede empezar `pre_roll` segundos antes de pedirlo
+    (el operador siempre reacciona tarde) y seguir `post_roll` segundos
+    después de pararla; un post_roll negativo recorta el final. Los tiempos
+    se miden con el timestamp (ms) de cada ESP32.
+
+    Al acabar, on_finish(buffer, tag) recibe un SegmentBuffer propio con la
+    repetición (ver SegmentBuffer.take) y el `tag` de start(). Se llama
+    sin el lock, desde el hilo que cierra la repetición (GUI o
+    adquisición), y en el orden en que se cerraron: un on_finish lento
+    retrasa a ese hilo pero no a add_block/start/stop de los demás.
+    """
+
+    def __init__(self, on_finish, pre_roll: float = 0.0, post_roll: float = 0.0,
+                 history_samples: int = 1024, features=False):
+        """
+        :param on_finish: función (SegmentBuffer, tag) al cerrar cada repetición
+        :param pre_roll: segundos previos a start() que se incluyen por defecto
+        :param post_roll: segundos posteriores a stop() que se incluyen por defecto
+        :param history_samples: muestras por sensor del ring de pre-roll
+            (limita el pre-roll máximo: 1024 son ~10 s a 100 Hz)
+        :param features: acumular features mientras llegan las muestras
+            (True o lista de nombres, ver SegmentBuffer)
+        """
+        self.on_finish = on_finish
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.history_samples = history_samples
+        self.buffer = SegmentBuffer(features=features)
+        self.active = False
+        self.tag = None
+        self._history = {}      # sensor_id → HistoryRing
+        self._last_end = {}     # sensor_id → último timestamp de la repetición anterior
+        self._closing = None    # post-roll pendiente: ({sensor_id: timestamp límite}, plazo host)
+        # start/stop llegan del hilo de la GUI y add_block del de adquisición
+        self._lock = threading.Lock()
+        # Repeticiones cerradas pendientes de on_finish, en orden
+        self._finished = deque()
+        self._deliver_lock = threading.Lock()
+
+    @property
+    def closing(self) -> bool:
+        """True mientras se completa el post-roll de una repetición ya parada."""
+        return self._closing is not None
+
+    def last_timestamp(self, sensor_id: str):
+        """Timestamp de la última muestra recibida del sensor (None si ninguna)."""
+        ring = self._history.get(sensor_id)
+        return ring.last_timestamp if ring is not None else None
+
+    def start(self, tag=None, pre_roll: float = None) -> bool:
+        """
+        Abre una repetición con los `pre_roll` segundos anteriores de cada
+        sensor (por defecto self.pre_roll) sin solaparse con la anterior.
+        Devuelve False si ya había una abierta.
+        """
+        pre_roll = self.pre_roll if pre_roll is None else pre_roll
+        with self._lock:
+            if self.active:
+                return False
+            if self._closing is not None:
+                # Se empieza otra antes de acabar el post-roll de la anterior
+                self._finish()
+            self.active = True
+            self.tag = tag
+            self.buffer.clear()
+            if pre_roll > 0:
+                for sensor_id, ring in self._history.items():
+                    t0 = ring.last_timestamp - pre_roll * 1000
+                    after = self._last_end.get(sensor_id)
+                    if after is not None and after > ring.last_timestamp:
+                        after = None   # el ESP32 se ha reiniciado desde entonces
+                    for view in ring.since(t0, after=after):
+                        self.buffer.append_block(sensor_id, view)
+        self._deliver()
+        return True
+
+    def add_block(self, sensor_id: str, block: np.ndarray):
+        """
+        Entrada de todas las muestras (n, 4) del sensor: las guarda en su
+        ring de pre-roll y, si hay repetición abierta o en post-roll, en ella.
+        """
+        if not len(block):
+            return
+        with self._lock:
+            ring = self._history.get(sensor_id)
+            if ring is None:
+                ring = self._history[sensor_id] = HistoryRing(self.history_samples)
+            ring.push(block)
+            if self.active:
+                self.buffer.append_block(sensor_id, block)
+            elif self._closing is not None:
+                limits, deadline = self._closing
+                limit = limits.get(sensor_id)
+                if limit is not None:
+                    self.buffer.append_block(sensor_id, block[block[:, 0] <= limit])
+                    if block[-1, 0] >= limit:
+                        del limits[sensor_id]
+                if not limits or time.monotonic() > deadline:
+                    self._finish()
+        self._deliver()
+
+    def stop(self, post_roll: float = None) -> bool:
+        """
+        Cierra la repetición. Con `post_roll` > 0 (por defecto self.post_roll)
+        sigue acumulando hasta que cada sensor llega a ese tiempo tras la
+        parada; con post_roll < 0 descarta ese final. Devuelve False si no
+        había repetición abierta.
+        """
+        post_roll = self.post_roll if post_roll is None else post_roll
+        with self._lock:
+            if not self.active:
+                return False
+            self.active = False
+            if post_roll > 0 and self._history:
+                limits = {sensor_id: ring.last_timestamp + post_roll * 1000
+                          for sensor_id, ring in self._history.items()}
+                # Si algún sensor deja de enviar, se cierra igualmente
+                self._closing = (limits, time.monotonic() + post_roll + 0.5)
+            else:
+                if post_roll < 0:
+                    for sensor_id, ring in self._history.items():
+                        self.buffer.truncate_after(sensor_id, ring.last_timestamp + post_roll * 1000)
+                self._finish()
+        self._deliver()
+        return True
+
+    def cancel(self) -> bool:
+        """Descarta la repetición abierta sin llamar a on_finish."""
+        with self._lock:
+            if not self.active:
+                return False
+            self.active = False
+            self.tag = None
+            self.buffer.clear()
+            return True
+
+    def flush(self):
+        """Cierra ya una repetición pendiente de post-roll (p.ej. al parar la captura)."""
+        with self._lock:
+            if self._closing is not None:
+                self._finish()
+        self._deliver()
+
+    def _finish(self):
+        """Cierra la repetición acumulada (llamar con self._lock tomado)."""
+        self._closing = None
+        for sensor_id, data in self.buffer.arrays().items():
+            if data.shape[1]:
+                self._last_end[sensor_id] = data[0, -1]
+        tag, self.tag = self.tag, None
+        self._finished.append((self.buffer.take(), tag))
+
+    def _deliver(self):
+        """
+        Llama a on_finish con las repeticiones cerradas, ya sin self._lock.
+        Si otro hilo está entregando, él se encarga también de éstas.
+        """
+        while self._finished:
+            if not self._deliver_lock.acquire(blocking=False):
+                return
+            try:
+                while self._finished:
+                    self.on_finish(*self._finished.popleft())
+            finally:
+                self._deliver_lock.release()
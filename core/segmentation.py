@@ -0,0 +1,239 @@
+# core/segmentation.py
+
+"""
+Segmentación automática de repeticiones en streaming.
+
+RepSegmenter recibe los bloques (n, 4) de un sensor y detecta inicio y fin
+de cada repetición con un umbral con histéresis sobre la velocidad angular
+suavizada. Trabajo y memoria O(1) por muestra, así que puede ir en el hilo
+de adquisición. Validación offline contra las repeticiones segmentadas a
+mano:
+
+    python -m core.segmentation data/datos_ejercicio.csv [perfil]
+"""
+
+import sys
+import math
+import numpy as np
+import pandas as pd
+
+
+class RepSegmenter:
+    """
+    Máquina de estados sobre la velocidad angular |d(yaw, pitch, roll)/dt|
+    (°/s, con el salto de ±180° del yaw corregido) suavizada con una media
+    exponencial de constante `tau`:
+
+    - reposo → activo cuando supera `on_threshold` durante `min_active` s.
+      El evento de inicio se fecha cuando dejó de estar por debajo de
+      `off_threshold` (el arranque real del movimiento), así que llega con
+      algo de retraso: DataRecorder lo cubre con su pre-roll.
+    - activo → reposo cuando queda por debajo de `off_threshold` durante
+      `min_quiet` s; el fin se fecha al empezar ese reposo. Las
+      repeticiones de menos de `min_duration` s se descartan.
+
+    update() devuelve los eventos del bloque, con timestamps del ESP32 (ms):
+        ('start', t_inicio, t_detección)
+        ('stop', t_inicio, t_fin, t_detección)     repetición válida
+        ('cancel', t_inicio, t_fin, t_detección)   más corta que min_duration
+    """
+
+    def __init__(self, on_threshold: float = 45.0, off_threshold: float = 15.0,
+                 tau: float = 0.05, min_active: float = 0.15, min_quiet: float = 0.2,
+                 min_duration: float = 1.0):
+        """
+        :param on_threshold: velocidad (°/s) que dispara el inicio
+        :param off_threshold: velocidad (°/s) por debajo de la cual hay reposo
+        :param tau: constante de tiempo (s) del suavizado
+        :param min_active: segundos por encima de on_threshold para confirmar el inicio
+        :param min_quiet: segundos de reposo para dar la repetición por acabada
+        :param min_duration: duración mínima (s) de una repetición válida
+        """
+        if off_threshold > on_threshold:
+            raise ValueError("off_threshold debe ser <= on_threshold")
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.tau = tau
+        self.min_active = min_active * 1000
+        self.min_quiet = min_quiet * 1000
+        self.min_duration = min_duration * 1000
+        self.reset()
+
+    def reset(self):
+        """Vuelve a reposo y olvida la última muestra."""
+        self.active = False
+        self.speed = 0.0           # velocidad suavizada (°/s)
+        self._last = None          # (t, yaw, pitch, roll)
+        self._rise = None          # última vez en reposo (inicio candidato)
+        self._above_since = None   # desde cuándo supera on_threshold
+        self._start = None         # inicio de la repetición activa
+        self._quiet_since = None   # desde cuándo está en reposo (activo)
+
+    def update(self, block: np.ndarray) -> list:
+        """Procesa un bloque (n, 4) [timestamp, yaw, pitch, roll]; devuelve sus eventos."""
+        events = []
+        on, off = self.on_threshold, self.off_threshold
+        for t, y, p, r in block.tolist():
+            last = self._last
+            self._last = (t, y, p, r)
+            if last is None:
+                self._rise = t
+                continue
+            dt = (t - last[0]) / 1000
+            if dt <= 0:
+                # Timestamp repetido o reinicio del ESP32
+                if dt < 0:
+                    self.speed = 0.0
+                    self._rise = t
+                continue
+            dy = (y - last[1] + 180) % 360 - 180
+            speed = math.sqrt(dy * dy + (p - last[2]) ** 2 + (r - last[3]) ** 2) / dt
+            self.speed += (1 - math.exp(-dt / self.tau)) * (speed - self.speed)
+            speed = self.speed
+
+            if not self.active:
+                if speed < off:
+                    self._rise = t
+                    self._above_since = None
+                elif speed >= on:
+                    if self._above_since is None:
+                        self._above_since = t
+                    if t - self._above_since >= self.min_active:
+                        self.active = True
+                        self._start = self._rise
+                        self._quiet_since = None
+                        events.append(('start', self._start, t))
+                else:
+                    self._above_since = None
+            elif speed < off:
+                if self._quiet_since is None:
+                    self._quiet_since = t
+                if t - self._quiet_since >= self.min_quiet:
+                    self.active = False
+                    self._above_since = None
+                    self._rise = t
+                    end = self._quiet_since
+                    if end - self._start >= self.min_duration:
+                        events.append(('stop', self._start, end, t))
+                    else:
+                        events.append(('cancel', self._start, end, t))
+            else:
+                self._quiet_since = None
+        return events
+
+
+def segment_actions(events: list, last_timestamp: float) -> list:
+    """
+    Traduce eventos de RepSegmenter a órdenes para SegmentCapture/DataRecorder,
+    con el pre/post-roll en segundos relativos a la última muestra recibida
+    (`last_timestamp`, ms): [('start', pre_roll), ('stop', post_roll), ('cancel',)].
+    El post_roll es negativo: recorta el reposo que hizo falta para detectar el fin.
+    """
+    actions = []
+    for event in events:
+        if event[0] == 'start':
+            actions.append(('start', max(0.0, (last_timestamp - event[1]) / 1000)))
+        elif event[0] == 'stop':
+            actions.append(('stop', min(0.0, (event[2] - last_timestamp) / 1000)))
+        else:
+            actions.append(('cancel',))
+    return actions
+
+
+def continuous_stream(df: pd.DataFrame, period_ms: float = 10.0,
+                      rest_ms: float = 1000.0) -> np.ndarray:
+    """
+    Reconstruye un flujo continuo (n, 4) a partir de las repeticiones
+    etiquetadas: entre una y otra no se grabó nada, así que el hueco se
+    rellena interpolando linealmente (a `period_ms`) de la última muestra
+    de una a la primera de la siguiente, lo que equivale a un reposo lento.
+    Tras la última se añaden `rest_ms` de reposo.
+    """
+    parts = []
+    prev = None
+    for _, group in df.groupby('rep_id', sort=True):
+        block = group[['timestamp', 'yaw', 'pitch', 'roll']].to_numpy(dtype=np.float64)
+        if prev is not None:
+            t_fill = np.arange(prev[0] + period_ms, block[0, 0], period_ms)
+            if len(t_fill):
+                delta = block[0, 1:] - prev[1:]
+                delta[0] = (delta[0] + 180) % 360 - 180
+                frac = ((t_fill - prev[0]) / (block[0, 0] - prev[0]))[:, None]
+                fill = prev[1:] + frac * delta
+                fill[:, 0] = (fill[:, 0] + 180) % 360 - 180
+                parts.append(np.column_stack((t_fill, fill)))
+        parts.append(block)
+        prev = block[-1]
+    if prev is not None:
+        t_rest = prev[0] + np.arange(1, int(rest_ms / period_ms) + 1) * period_ms
+        parts.append(np.column_stack((t_rest, np.tile(prev[1:], (len(t_rest), 1)))))
+    return np.concatenate(parts) if parts else np.empty((0, 4))
+
+
+def validate(df: pd.DataFrame, read_size: int = 2, **params) -> dict:
+    """
+    Pasa el flujo continuo por RepSegmenter(**params) en lecturas de
+    `read_size` muestras y compara con las repeticiones manuales: una
+    detectada acierta si solapa (IoU >= 0.5) con una manual.
+    """
+    stream = continuous_stream(df)
+    seg = RepSegmenter(**params)
+    detected, latencies = [], []
+    for i in range(0, len(stream), read_size):
+        for event in seg.update(stream[i:i + read_size]):
+            if event[0] == 'stop':
+                detected.append((event[1], event[2]))
+                latencies.append(event[3] - event[2])
+
+    manual = df.groupby('rep_id')['timestamp'].agg(['first', 'last']).to_numpy()
+    matched, start_err, end_err = set(), [], []
+    for s, e in detected:
+        inter = np.minimum(manual[:, 1], e) - np.maximum(manual[:, 0], s)
+        union = np.maximum(manual[:, 1], e) - np.minimum(manual[:, 0], s)
+        iou = np.where(inter > 0, inter / union, 0.0)
+        k = int(np.argmax(iou))
+        if iou[k] >= 0.5 and k not in matched:
+            matched.add(k)
+            start_err.append(s - manual[k, 0])
+            end_err.append(e - manual[k, 1])
+    hits = len(matched)
+    return {
+        'manual': len(manual),
+        'detected': len(detected),
+        'hits': hits,
+        'recall': hits / len(manual) if len(manual) else 0.0,
+        'precision': hits / len(detected) if detected else 0.0,
+        'start_err_ms': float(np.median(np.abs(start_err))) if start_err else None,
+        'end_err_ms': float(np.median(np.abs(end_err))) if end_err else None,
+        'stop_latency_ms': float(np.median(latencies)) if latencies else None,
+    }
+
+
+def main(argv=None):
+    """
+    Validación offline:
+        python -m core.segmentation data/datos_ejercicio.csv [perfil]
+    con `perfil` una clave de config.SEGMENTER_PROFILES (por defecto
+    config.SEGMENTER_PROFILE).
+    """
+    import config
+    argv = sys.argv[1:] if argv is None else argv
+    if not 1 <= len(argv) <= 2:
+        print(main.__doc__)
+        return 1
+    from core.recording import load_table
+    df = load_table(argv[0])
+    profile = argv[1] if len(argv) == 2 else config.SEGMENTER_PROFILE
+    result = validate(df, **config.SEGMENTER_PROFILES[profile])
+    print(f"Perfil {profile!r}: {result['hits']}/{result['manual']} repeticiones encontradas, "
+          f"{result['detected']} detectadas (precisión {result['precision']:.0%}, "
+          f"exhaustividad {result['recall']:.0%})")
+    if result['hits']:
+        print(f"Error mediano de inicio {result['start_err_ms']:.0f} ms, de fin "
+              f"{result['end_err_ms']:.0f} ms; fin detectado {result['stop_latency_ms']:.0f} ms "
+              f"después del reposo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
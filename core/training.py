@@ -5,15 +5,71 @@ import pandas as pd
 import numpy as np
 import threading
 from joblib import dump
+from sklearn.base import BaseEstimator, TransformerMixin, clone
+from sklearn.feature_selection import mutual_info_classif
+from sklearn.inspection import permutation_importance
 from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import accuracy_score, confusion_matrix, classification_report
 from PyQt5.QtCore import QObject, pyqtSignal
 
-from core.features import extract_features
+from core.features import FEATURES, features_cost
+from core.feature_pool import extract_features_parallel
+from core.feature_store import FeatureStore, bytes_keys
+from core.catalog import RepCatalog, load_reps_table, read_rep_bytes
 import config
 
+SELECTION_METHODS = ('mutual_info', 'permutation')
+
+
+def select_features(X: pd.DataFrame, y: pd.Series, n_features: int,
+                    method: str = 'mutual_info', estimator=None,
+                    random_state: int = 42) -> list:
+    """
+    Las `n_features` columnas de X más informativas sobre y, en el orden del
+    registro de features; a igual puntuación, la de menor coste.
+
+    :param method: 'mutual_info' (información mutua con la etiqueta) o
+        'permutation' (caída de acierto de `estimator` al barajar cada columna)
+    """
+    if method not in SELECTION_METHODS:
+        raise ValueError(f"Método de selección desconocido: {method!r}")
+    X = X.fillna(0.0)
+    if method == 'mutual_info':
+        scores = mutual_info_classif(X, y, random_state=random_state)
+    else:
+        pipe = Pipeline([("scaler", StandardScaler()), ("clf", clone(estimator))]).fit(X, y)
+        scores = permutation_importance(pipe, X, y, n_repeats=5,
+                                        random_state=random_state).importances_mean
+    ranked = sorted(zip(X.columns, scores), key=lambda c: (-c[1], FEATURES[c[0]].cost))
+    chosen = {name for name, _ in ranked[:n_features]}
+    return [name for name in X.columns if name in chosen]
+
+
+class FeatureSelector(BaseEstimator, TransformerMixin):
+    """
+    select_features como paso de un Pipeline: elige las columnas al
+    ajustar, así cross_val_score repite la selección dentro de cada fold
+    sin ver las etiquetas del fold de validación.
+    """
+
+    def __init__(self, n_features: int, method: str = 'mutual_info', estimator=None,
+                 random_state: int = 42):
+        self.n_features = n_features
+        self.method = method
+        self.estimator = estimator
+        self.random_state = random_state
+
+    def fit(self, X: pd.DataFrame, y):
+        self.features_ = select_features(X, y, self.n_features, self.method,
+                                         self.estimator, self.random_state)
+        return self
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        return X[self.features_]
+
+
 class TrainingController(QObject):
     """
     Controller Qt que entrena modelos en un hilo aparte,
@@ -28,48 +84,90 @@ class TrainingController(QObject):
         model_output_path: str,
         algorithms: dict,
         test_size: float = 0.3,
-        random_state: int = 42
+        random_state: int = 42,
+        feature_cache: str = None,
+        feature_cache_size: int = 100000,
+        feature_workers: int = 1,
+        feature_selection: str = None,
+        n_features: int = None
     ):
+        """
+        :param feature_cache: .npz con las features ya calculadas por
+            repetición (core.feature_store); None = calcularlas siempre
+        :param feature_cache_size: repeticiones guardadas como máximo en la caché
+        :param feature_workers: procesos para calcular features
+            (core.feature_pool); None o 0 = todos los núcleos
+        :param feature_selection: 'mutual_info' o 'permutation' para entrenar
+            sólo con las `n_features` mejores (ver select_features); None = todas.
+            El modelo guardado recuerda el subconjunto (feature_names_in_) y
+            PredictorController sólo calcula ésas
+        """
         super().__init__()
         self.csv_path = csv_path
         self.model_output_path = model_output_path
         self.algorithms = algorithms
         self.test_size = test_size
         self.random_state = random_state
+        self.feature_cache = feature_cache
+        self.feature_cache_size = feature_cache_size
+        self.feature_workers = feature_workers
+        self.feature_selection = feature_selection
+        self.n_features = n_features
+        self.cache_stats = None   # (en caché, calculadas) de la última carga
 
     def start_training(self):
         """Arranca el hilo de entrenamiento."""
         t = threading.Thread(target=self._run, daemon=True)
         t.start()
 
+    def load_dataset(self, label: str = None) -> tuple:
+        """
+        Features y etiquetas (X, y) de las repeticiones del catálogo (todas
+        o sólo las de `label`). Lanza ValueError si no hay datos válidos.
+        """
+        catalog = RepCatalog.open(self.csv_path)
+        try:
+            entries = catalog.reps(label=label)
+        finally:
+            catalog.close()
+        if not entries:
+            raise ValueError(f"No hay repeticiones catalogadas en {self.csv_path}")
+        y = pd.Series([entry['label'] for entry in entries])
+        if not self.feature_cache:
+            self.cache_stats = (0, len(entries))
+            return self._extract(entries), y
+
+        # Con caché sólo se leen y calculan las repeticiones que no estén;
+        # la clave sale de sus bytes en el fichero, sin parsearlas
+        store = FeatureStore(self.feature_cache, self.feature_cache_size)
+        keys = bytes_keys(read_rep_bytes(self.csv_path, entries))
+        missing = store.missing(keys)
+        if missing:
+            store.add([keys[i] for i in missing], self._extract([entries[i] for i in missing]))
+        X = store.take(keys)
+        store.save()
+        self.cache_stats = (store.hits, store.misses)
+        return X, y
+
+    def _extract(self, entries: list) -> pd.DataFrame:
+        """Features de todas las repeticiones `entries` de una pasada."""
+        df, starts = load_reps_table(self.csv_path, entries)
+        required = {'timestamp', 'yaw', 'pitch', 'roll'}
+        if not required.issubset(df.columns):
+            raise ValueError(f"Faltan columnas en CSV: {required - set(df.columns)}")
+        return extract_features_parallel(df, starts, self.feature_workers)
+
     def _run(self):
         # 1) Carga de datos
         self.log.emit("⏳ Cargando datos...")
         try:
-            df = pd.read_csv(self.csv_path)
+            X, y = self.load_dataset()
         except Exception as e:
             self.log.emit(f"✖ Error leyendo CSV: {e}")
             return
-
-        # Renombrar si existe 'etiqueta'
-        if 'etiqueta' in df.columns and 'label' not in df.columns:
-            df = df.rename(columns={'etiqueta': 'label'})
-
-        # Validación mínima
-        required = {'rep_id','timestamp','yaw','pitch','roll','label'}
-        if not required.issubset(df.columns):
-            self.log.emit(f"✖ Faltan columnas en CSV: {required - set(df.columns)}")
-            return
-
-        # Extraer features
-        feats, labels = [], []
-        for rid, group in df.groupby('rep_id'):
-            feats.append(extract_features(group))
-            labels.append(group['label'].iloc[0])
-        X = pd.DataFrame(feats)
-        y = pd.Series(labels)
         n_reps, n_feat = X.shape
-        self.log.emit(f"✅ Datos: {n_reps} repeticiones, {n_feat} features.")
+        self.log.emit(f"✅ Datos: {n_reps} repeticiones, {n_feat} features "
+                      f"({self.cache_stats[1]} calculadas, {self.cache_stats[0]} de la caché).")
 
         # 2) Split train/test
         X_train, X_test, y_train, y_test = train_test_split(
@@ -79,7 +177,19 @@ class TrainingController(QObject):
             stratify=y
         )
 
-        # 3) Recorrer algoritmos
+        # 3) Selección de features (sólo con los datos de entrenamiento)
+        features = list(X.columns)
+        selecting = (self.feature_selection and self.n_features
+                     and self.n_features < len(features))
+        if selecting:
+            first = next(iter(self.algorithms.values()), None)
+            features = select_features(X_train, y_train, self.n_features,
+                                       self.feature_selection, first, self.random_state)
+            self.log.emit(f"🔎 Selección ({self.feature_selection}): {len(features)} de "
+                          f"{X.shape[1]} features, coste {features_cost(features):.0f}/"
+                          f"{features_cost(X.columns):.0f} → {', '.join(features)}")
+
+        # 4) Recorrer algoritmos
         self.log.emit("⏳ Entrenando modelos...")
         results = {}
         best_name, best_acc = None, -np.inf
@@ -90,15 +200,21 @@ class TrainingController(QObject):
                 ("scaler", StandardScaler()),
                 ("clf",  estimator)
             ])
-            pipe.fit(X_train, y_train)
-            y_pred = pipe.predict(X_test)
+            pipe.fit(X_train[features], y_train)
+            y_pred = pipe.predict(X_test[features])
             acc = accuracy_score(y_test, y_pred)
 
-            # Cross-validation (máx 5 folds o mínimos según clases)
+            # Cross-validation (máx 5 folds o mínimos según clases); con
+            # selección, ésta se rehace en cada fold para no puntuar con
+            # repeticiones cuyas etiquetas eligieron las features
             min_count = y.value_counts().min()
             cv = min(5, int(min_count)) if min_count >= 2 else 2
+            cv_pipe = Pipeline([("scaler", StandardScaler()), ("clf", clone(estimator))])
+            if selecting:
+                cv_pipe.steps.insert(0, ("select", FeatureSelector(
+                    self.n_features, self.feature_selection, first, self.random_state)))
             cv_scores = cross_val_score(
-                pipe, X, y,
+                cv_pipe, X if selecting else X[features], y,
                 cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=self.random_state),
                 scoring="accuracy"
             )
@@ -112,14 +228,18 @@ class TrainingController(QObject):
                 "cv_std":         cv_scores.std(),
                 "confusion":      cm,
                 "report":         cr,
-                "pipeline":       pipe
+                "pipeline":       pipe,
+                "features":       features,
+                # Mismo dataset en todos: la UI lo usa sin recalcular features
+                "X":              X,
+                "y":              y
             }
 
             self.log.emit(f"   → acc={acc:.2f}, cv={cv_scores.mean():.2f}±{cv_scores.std():.2f}")
             if acc > best_acc:
                 best_acc, best_name = acc, name
 
-        # 4) Guardado del mejor pipeline
+        # 5) Guardado del mejor pipeline
         if best_name:
             out_dir = os.path.dirname(self.model_output_path)
             os.makedirs(out_dir, exist_ok=True)
@@ -129,5 +249,5 @@ class TrainingController(QObject):
         else:
             self.log.emit("⚠️ No se encontró modelo válido.")
 
-        # 5) Emitir señal de acabado
+        # 6) Emitir señal de acabado
         self.finished.emit(results, best_name)
@@ -0,0 +1,64 @@
+# core/ui_batch.py
+
+import threading
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from core.imu.parsing import SAMPLE_COLUMNS
+
+
+def columns_of(block: np.ndarray) -> dict:
+    """Bloque (n, 4) → {'timestamp', 'yaw', 'pitch', 'roll'} como vistas."""
+    return dict(zip(SAMPLE_COLUMNS, block.T))
+
+
+class SampleBatcher(QObject):
+    """
+    Agrupa las muestras que llegan del hilo de adquisición y las entrega a
+    la GUI a un ritmo fijo (30-60 Hz) con una única señal por tick:
+
+        data_batch_ready({sensor_id: {'timestamp', 'yaw', 'pitch', 'roll'}})
+
+    con un array por columna. Así la cola de eventos de Qt recibe un evento
+    por refresco de pantalla en vez de uno por muestra y cada gráfica se
+    repinta una vez por lote.
+
+    push() se puede llamar desde cualquier hilo; el QTimer corre en el hilo
+    de la GUI (crear el objeto allí).
+    """
+    data_batch_ready = pyqtSignal(dict)
+
+    def __init__(self, rate_hz: float = 30, parent=None):
+        """
+        :param rate_hz: lotes por segundo hacia la GUI
+        """
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._pending = {}   # sensor_id → lista de bloques (n, 4)
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(1, round(1000 / rate_hz)))
+        self._timer.timeout.connect(self.flush)
+
+    def push(self, sensor_id: str, block: np.ndarray):
+        """Encola un bloque (n, 4) con columnas SAMPLE_COLUMNS."""
+        if len(block):
+            with self._lock:
+                self._pending.setdefault(sensor_id, []).append(block)
+
+    def flush(self):
+        """Emite lo acumulado desde el último tick (si hay algo)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if pending:
+            self.data_batch_ready.emit({
+                sensor_id: columns_of(blocks[0] if len(blocks) == 1 else np.concatenate(blocks))
+                for sensor_id, blocks in pending.items()
+            })
+
+    def start(self):
+        self._timer.start()
+
+    def stop(self):
+        """Para el timer y entrega lo que quedase pendiente."""
+        self._timer.stop()
+        self.flush()
@@ -3,6 +3,10 @@
 
 MPU6050 mpu;
 
+// 0 = CSV "timestamp,yaw,pitch,roll" (texto)
+// 1 = tramas binarias de 16 bytes (ver core/imu/protocol.py)
+#define BINARY_OUTPUT 0
+
 #define INTERRUPT_PIN 25
 volatile bool mpuInterrupt = false;
 
@@ -20,6 +24,40 @@ void dmpDataReady() {
   mpuInterrupt = true;
 }
 
+#if BINARY_OUTPUT
+uint16_t frameSeq = 0;
+
+// CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF)
+uint16_t crc16(const uint8_t *data, size_t len) {
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < len; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+void putLE(uint8_t *dst, uint32_t value, uint8_t bytes) {
+  for (uint8_t i = 0; i < bytes; i++) dst[i] = (value >> (8 * i)) & 0xFF;
+}
+
+// sync(2) seq(2) ts(4) yaw/pitch/roll en centesimas de grado int16 (6) crc(2)
+void sendFrame(unsigned long timestamp, float yaw, float pitch, float roll) {
+  uint8_t frame[16];
+  frame[0] = 0xA5;
+  frame[1] = 0x5A;
+  putLE(frame + 2, frameSeq++, 2);
+  putLE(frame + 4, (uint32_t)timestamp, 4);
+  putLE(frame + 8, (uint16_t)(int16_t)lroundf(yaw * 100.0f), 2);
+  putLE(frame + 10, (uint16_t)(int16_t)lroundf(pitch * 100.0f), 2);
+  putLE(frame + 12, (uint16_t)(int16_t)lroundf(roll * 100.0f), 2);
+  putLE(frame + 14, crc16(frame + 2, 12), 2);
+  Serial.write(frame, sizeof(frame));
+}
+#endif
+
 void setup() {
   Serial.begin(115200);
   Wire.begin(21, 22);  // ESP32 SDA/SCL
@@ -40,7 +78,9 @@ void setup() {
     attachInterrupt(digitalPinToInterrupt(INTERRUPT_PIN), dmpDataReady, RISING);
     mpuIntStatus = mpu.getIntStatus();
     packetSize = mpu.dmpGetFIFOPacketSize();
+#if !BINARY_OUTPUT
     Serial.println("timestamp_ms,yaw,pitch,roll");  // encabezado CSV
+#endif
   } else {
     Serial.print("Error DMP: ");
     Serial.println(devStatus);
@@ -73,9 +113,13 @@ void loop() {
 
     unsigned long timestamp = millis();
 
+#if BINARY_OUTPUT
+    sendFrame(timestamp, ypr[0] * 180.0 / PI, ypr[1] * 180.0 / PI, ypr[2] * 180.0 / PI);
+#else
     Serial.print(timestamp); Serial.print(",");
     Serial.print(ypr[0] * 180.0 / PI, 2); Serial.print(",");
     Serial.print(ypr[1] * 180.0 / PI, 2); Serial.print(",");
     Serial.println(ypr[2] * 180.0 / PI, 2);
+#endif
   }
 }
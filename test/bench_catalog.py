@@ -0,0 +1,59 @@
+# bench_catalog.py
+
+import os
+import time
+import shutil
+import tempfile
+import pandas as pd
+from core.catalog import RepCatalog, load_reps
+
+DATA = 'data/datos_ejercicio.csv'
+COPIES = 50             # el dataset repetido: ~2000 repeticiones
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, 'datos.csv')
+    df = pd.read_csv(DATA)
+    step = df['rep_id'].max()
+    pd.concat([df.assign(rep_id=df['rep_id'] + k * step) for k in range(COPIES)]) \
+      .to_csv(path, index=False)
+    print(f"{COPIES * step} repeticiones, {os.path.getsize(path) / 1e6:.0f} MB")
+
+    t = time.perf_counter()
+    catalog = RepCatalog.open(path)
+    t_index = time.perf_counter() - t
+    catalog.close()
+
+    # Antes: leer todo y agrupar para listar o ver una repetición
+    t = time.perf_counter()
+    full = pd.read_csv(path)
+    groups = dict(list(full.groupby('rep_id')))
+    labels = full.groupby('rep_id')['etiqueta'].first().value_counts()
+    rep = groups[step * COPIES // 2]
+    t_full = time.perf_counter() - t
+
+    t = time.perf_counter()
+    catalog = RepCatalog.open(path)
+    entries = catalog.reps()
+    counts = catalog.labels()
+    frame, = load_reps(path, [entries[len(entries) // 2 - 1]])
+    t_cat = time.perf_counter() - t
+    assert frame['timestamp'].tolist() == rep['timestamp'].tolist()
+    assert sum(counts.values()) == labels.sum()
+
+    t = time.perf_counter()
+    subset = catalog.reps(label='incorrecto')
+    frames = load_reps(path, subset)
+    t_label = time.perf_counter() - t
+    catalog.close()
+    shutil.rmtree(tmp)
+
+    print(f"Indexar una vez: {t_index * 1e3:.0f} ms")
+    print(f"Listar + cargar una repetición: read_csv+groupby {t_full * 1e3:.0f} ms | "
+          f"catálogo {t_cat * 1e3:.1f} ms ({t_full / t_cat:.0f}x)")
+    print(f"Todas las 'incorrecto' ({len(frames)}): {t_label * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
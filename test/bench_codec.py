@@ -0,0 +1,78 @@
+# bench_codec.py
+
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from core.codec import CODECS
+from core.recording import RecordingReader, load_table, write_recording
+
+SENSORS = 3
+SCALE = 30          # ~1 h de registro raw por sensor
+CHUNK_ROWS = 600    # 2 s a 3 × 100 Hz (BinaryRecordingWriter.COMPRESSED_FLUSH_INTERVAL)
+REPEATS = 3
+
+
+def raw_log(path: str) -> pd.DataFrame:
+    """
+    Registro raw (timestamp, sensor_id, yaw, pitch, roll) con SENSORS
+    sensores intercalados, a partir de las repeticiones de `path`.
+    """
+    base = pd.read_csv(path)[['timestamp', 'yaw', 'pitch', 'roll']]
+    span = base['timestamp'].max() - base['timestamp'].min() + 10
+    parts = []
+    for k in range(SCALE):
+        for s in range(SENSORS):
+            part = base.copy()
+            part['timestamp'] += k * span + s
+            part['sensor_id'] = f'imu{s + 1}'
+            parts.append(part)
+    df = pd.concat(parts, ignore_index=True).sort_values('timestamp', kind='stable')
+    return df[['timestamp', 'sensor_id', 'yaw', 'pitch', 'roll']].reset_index(drop=True)
+
+
+def best_of(fn):
+    times = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def one_chunk(path):
+    reader = RecordingReader(path)
+    reader.chunk(len(reader.chunks) // 2)
+    reader.close()
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    df = raw_log('data/datos_ejercicio.csv')
+    csv_path = os.path.join(tmp, 'raw.csv')
+    df.to_csv(csv_path, index=False)
+    csv_size = os.path.getsize(csv_path)
+    n = len(df)
+    print(f"{n} muestras ({SENSORS} sensores), bloques de {CHUNK_ROWS} filas")
+    print(f"CSV: {csv_size / 1e6:6.1f} MB ({csv_size / n:.1f} B/muestra)")
+    print(f"{'códec':<11} {'tamaño':>8} {'B/muestra':>9} {'vs CSV':>7} "
+          f"{'escritura':>10} {'lectura':>9} {'Mmuestras/s':>11} {'un bloque':>9}")
+    for codec in CODECS:
+        path = os.path.join(tmp, f'raw_{codec}.imub')
+        t_write = best_of(lambda: write_recording(path, df, CHUNK_ROWS, codec))
+        size = os.path.getsize(path)
+        t_read = best_of(lambda: load_table(path))
+        t_chunk = best_of(lambda: one_chunk(path))
+        print(f"{codec:<11} {size / 1e6:6.2f} MB {size / n:9.2f} {csv_size / size:6.1f}x "
+              f"{t_write * 1e3:7.0f} ms {t_read * 1e3:6.0f} ms {n / t_read / 1e6:11.1f} "
+              f"{t_chunk * 1e3:6.2f} ms")
+        back = load_table(path)
+        assert np.array_equal(back['timestamp'].to_numpy(), df['timestamp'].to_numpy())
+        assert np.array_equal(back['yaw'].to_numpy(np.float32), df['yaw'].to_numpy(np.float32))
+    t_csv = best_of(lambda: pd.read_csv(csv_path))
+    print(f"pd.read_csv: {t_csv * 1e3:.0f} ms ({n / t_csv / 1e6:.1f} Mmuestras/s)")
+
+
+if __name__ == "__main__":
+    main()
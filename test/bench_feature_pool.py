@@ -0,0 +1,40 @@
+# bench_feature_pool.py
+
+import os
+import time
+import numpy as np
+import pandas as pd
+from core.feature_pool import FeaturePool
+from core.features import group_rows
+
+DATA = 'data/datos_ejercicio.csv'
+SCALE = 400             # el dataset repetido 400 veces: 16000 repeticiones
+WORKERS = (1, 2, 4, 8)
+
+
+def main():
+    df = pd.read_csv(DATA)
+    step = df['rep_id'].max()
+    big = pd.concat([df.assign(rep_id=df['rep_id'] + k * step) for k in range(SCALE)],
+                    ignore_index=True)
+    columns, starts, _ = group_rows(big)
+    print(f"{len(starts)} repeticiones, {len(big)} muestras, {os.cpu_count()} núcleos")
+
+    base = None
+    for workers in WORKERS:
+        with FeaturePool(workers) as pool:
+            t = time.perf_counter()
+            pool.extract(columns, starts)          # arranca los procesos
+            t_first = time.perf_counter() - t
+            t_best = np.inf
+            for _ in range(3):
+                t = time.perf_counter()
+                pool.extract(columns, starts)
+                t_best = min(t_best, time.perf_counter() - t)
+        base = base or t_best
+        print(f"{workers} procesos: {t_best * 1e3:5.0f} ms ({base / t_best:.1f}x), "
+              f"primera llamada con arranque {t_first * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
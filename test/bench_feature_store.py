@@ -0,0 +1,52 @@
+# bench_feature_store.py
+
+import os
+import time
+import shutil
+import tempfile
+import pandas as pd
+from core.catalog import RepCatalog
+from core.training import TrainingController
+
+DATA = 'data/datos_ejercicio.csv'
+REPS = 5000
+ADDED = 10
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, 'datos.csv')
+    cache = os.path.join(tmp, 'feature_cache.npz')
+    df = pd.read_csv(DATA)
+    step = df['rep_id'].max()
+    copies = -(-(REPS + ADDED) // step)
+    # Cada copia desplazada en el tiempo: mismas features, muestras distintas
+    big = pd.concat([df.assign(rep_id=df['rep_id'] + k * step, timestamp=df['timestamp'] + k * 1e6)
+                     for k in range(copies)])
+    big = big[big['rep_id'] <= REPS + ADDED]
+    big[big['rep_id'] <= REPS].to_csv(path, index=False)
+
+    def load(feature_cache):
+        RepCatalog.open(path).close()       # indexar (si hace falta) fuera de la medida
+        ctrl = TrainingController(path, os.path.join(tmp, 'model.joblib'), {},
+                                  feature_cache=feature_cache)
+        t = time.perf_counter()
+        X, _ = ctrl.load_dataset()
+        return time.perf_counter() - t, len(X), ctrl.cache_stats
+
+    t_plain, n, _ = load(None)
+    t_cold, _, _ = load(cache)
+    # Se graban ADDED repeticiones más
+    big[big['rep_id'] > REPS].to_csv(path, mode='a', header=False, index=False)
+    t_add_plain, n_add, _ = load(None)
+    t_warm, _, stats = load(cache)
+    shutil.rmtree(tmp)
+
+    print(f"{n} repeticiones: sin caché {t_plain * 1e3:.0f} ms, "
+          f"llenando la caché {t_cold * 1e3:.0f} ms")
+    print(f"+{n_add - n} repeticiones: sin caché {t_add_plain * 1e3:.0f} ms | con caché "
+          f"{t_warm * 1e3:.0f} ms ({stats[1]} calculadas, {stats[0]} de la caché)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# bench_features.py
+
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from core.features import extract_features, extract_features_batch, FEATURE_NAMES, features_cost
+from core.segment_buffer import SegmentBuffer
+
+DATA = 'data/datos_ejercicio.csv'
+SCALE = 100             # el dataset repetido 100 veces: 4000 repeticiones
+
+
+def main():
+    df = pd.read_csv(DATA)
+    step = df['rep_id'].max()
+    big = pd.concat([df.assign(rep_id=df['rep_id'] + k * step) for k in range(SCALE)],
+                    ignore_index=True)
+    print(f"{big['rep_id'].nunique()} repeticiones, {len(big)} muestras")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        t = time.perf_counter()
+        per_rep = pd.DataFrame([extract_features(group) for _, group in big.groupby('rep_id')])
+        t_loop = time.perf_counter() - t
+
+    # Mejor de 3 (la primera llamada paga reservar la memoria de los temporales)
+    t_batch = np.inf
+    for _ in range(3):
+        t = time.perf_counter()
+        batch = extract_features_batch(big)
+        t_batch = min(t_batch, time.perf_counter() - t)
+
+    np.testing.assert_allclose(batch.to_numpy(), per_rep.to_numpy(), rtol=1e-10, atol=1e-10)
+    print(f"groupby + extract_features {t_loop * 1e3:.0f} ms | "
+          f"extract_features_batch {t_batch * 1e3:.0f} ms ({t_loop / t_batch:.0f}x)")
+
+    # Latencia al cerrar una repetición en vivo (bloques de 4 muestras)
+    samples = big[['timestamp', 'yaw', 'pitch', 'roll']].to_numpy()
+    for seconds in (3, 30, 300):
+        rep = samples[:seconds * 100]
+        plain, tracked = SegmentBuffer(), SegmentBuffer(features=True)
+        t = time.perf_counter()
+        for i in range(0, len(rep), 4):
+            tracked.append_block('imu1', rep[i:i + 4])
+        t_feed = (time.perf_counter() - t) / len(rep)
+        plain.append_block('imu1', rep)
+        t = time.perf_counter()
+        extract_features(plain.columns())
+        t_full = time.perf_counter() - t
+        t = time.perf_counter()
+        tracked.features()
+        t_acc = time.perf_counter() - t
+        print(f"Repetición de {seconds:3d} s: extract_features al parar {t_full * 1e3:6.2f} ms | "
+              f"acumulador {t_acc * 1e3:.2f} ms (+{t_feed * 1e6:.0f} µs por muestra al llegar)")
+
+    # Coste en vivo según el subconjunto que use el modelo
+    rep = samples[:3000]
+    subsets = {
+        'todas': FEATURE_NAMES,
+        'momentos y rango (6)': ('pitch_std', 'roll_std', 'roll_mean', 'pitch_range',
+                                 'roll_range', 'duration'),
+        'con velocidad (8)': ('pitch_std', 'roll_std', 'roll_mean', 'pitch_range',
+                              'roll_range', 'duration', 'pitch_vel_max', 'roll_vel_mean'),
+    }
+    for name, names in subsets.items():
+        buffer = SegmentBuffer(features=names)
+        t = time.perf_counter()
+        for i in range(0, len(rep), 4):
+            buffer.append_block('imu1', rep[i:i + 4])
+        t_feed = (time.perf_counter() - t) / len(rep)
+        plain = SegmentBuffer()
+        plain.append_block('imu1', rep)
+        t = time.perf_counter()
+        extract_features(plain.columns(), names)
+        t_full = time.perf_counter() - t
+        print(f"{name:22s} coste {features_cost(names):4.0f}: acumulador {t_feed * 1e6:4.1f} µs "
+              f"por muestra | extract_features {t_full * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
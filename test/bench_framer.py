@@ -0,0 +1,57 @@
+# bench_framer.py
+
+import time
+from core.imu.framing import LineFramer
+
+LINE = b"123456789,-12.34,56.78,-90.12\r\n"
+
+
+def legacy_feed(state: dict, raw_bytes: bytes, out: list):
+    """Implementación anterior de IMUSensor._reader_loop (str + split)."""
+    state['buf'] += raw_bytes.decode('utf-8', errors='ignore')
+    while "\n" in state['buf']:
+        line, state['buf'] = state['buf'].split("\n", 1)
+        out.append(line.strip())
+
+
+def run(chunks, feed) -> float:
+    t0 = time.perf_counter()
+    n = feed(chunks)
+    dt = time.perf_counter() - t0
+    return n / dt
+
+
+def bench(label: str, chunks: list):
+
+    def legacy(chs):
+        state, out = {'buf': ""}, []
+        for c in chs:
+            legacy_feed(state, c, out)
+        return len(out)
+
+    def framer(chs):
+        f, n = LineFramer(), 0
+        for c in chs:
+            n += len(f.feed(c))
+        return n
+
+    old = run(chunks, legacy)
+    new = run(chunks, framer)
+    print(f"{label:>22}: "
+          f"legacy {old:12,.0f} líneas/s | LineFramer {new:12,.0f} líneas/s | x{new / old:.1f}")
+
+
+def main():
+    # Flujo estable: ~11 bytes por lectura (115200 baudios sondeando cada 1 ms)
+    stream = LINE * 50_000
+    bench("11 B/lectura", [stream[i:i + 11] for i in range(0, len(stream), 11)])
+
+    # Ráfagas tras una pausa, cortadas a mitad de línea
+    for lines_per_chunk, n_chunks in ((10, 10_000), (100, 1_000), (1_000, 100), (10_000, 10)):
+        payload = LINE * lines_per_chunk
+        half = len(payload) // 2 + 3
+        bench(f"{lines_per_chunk} líneas/ráfaga", [payload[:half], payload[half:]] * n_chunks)
+
+
+if __name__ == "__main__":
+    main()
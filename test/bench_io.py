@@ -0,0 +1,80 @@
+# bench_io.py
+
+import os
+import resource
+import time
+import multiprocessing as mp
+import numpy as np
+from core.imu.manager import SensorManager
+
+RATE_HZ = 100
+DURATION = 5.0
+
+
+def _writer(masters, stop):
+    """Proceso aparte que simula N ESP32 a RATE_HZ (timestamp = envío en ms)."""
+    period = 1.0 / RATE_HZ
+    next_t = time.monotonic()
+    while not stop.is_set():
+        line = f"{time.monotonic() * 1000:.3f},1.00,2.00,3.00\r\n".encode()
+        for fd in masters:
+            os.write(fd, line)
+        next_t += period
+        time.sleep(max(0.0, next_t - time.monotonic()))
+
+
+def _cpu() -> float:
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    return ru.ru_utime + ru.ru_stime
+
+
+def run(n_ports: int, io_mode: str):
+    ptys = [os.openpty() for _ in range(n_ports)]
+    configs = [{'id': f"imu{i}", 'port': os.ttyname(s)} for i, (_, s) in enumerate(ptys)]
+
+    stop = mp.Event()
+    writer = mp.Process(target=_writer, args=([m for m, _ in ptys], stop), daemon=True)
+    writer.start()
+    sm = SensorManager(configs, io_mode=io_mode)
+    time.sleep(0.5)
+    sm.read_all_arrays()
+
+    latencies, received = [], 0
+    cpu0, t0 = _cpu(), time.monotonic()
+    while time.monotonic() - t0 < DURATION:
+        if io_mode == 'threads':
+            # Bucle consumidor anterior: sondeo cada 1 ms
+            blocks = sm.read_all_arrays()
+            time.sleep(0.001)
+        else:
+            if not sm.wait_data(timeout=0.1):
+                continue
+            blocks = sm.read_all_arrays()
+        now = time.monotonic() * 1000
+        for block in blocks.values():
+            if len(block):
+                received += len(block)
+                latencies.append(now - block[:, 0])
+    cpu = (_cpu() - cpu0) / (time.monotonic() - t0) * 100
+
+    stop.set()
+    writer.join()
+    sm.close_all()
+    for m, s in ptys:
+        os.close(m)
+        os.close(s)
+
+    lat = np.concatenate(latencies)
+    print(f"{n_ports} puertos | {io_mode:8s} | CPU {cpu:5.1f}% | "
+          f"latencia p50 {np.percentile(lat, 50):5.2f} ms p99 {np.percentile(lat, 99):5.2f} ms | "
+          f"{received / DURATION:6.0f} muestras/s")
+
+
+def main():
+    for n_ports in (1, 4, 8):
+        for io_mode in ('threads', 'selector'):
+            run(n_ports, io_mode)
+
+
+if __name__ == "__main__":
+    main()
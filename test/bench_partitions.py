@@ -0,0 +1,60 @@
+# bench_partitions.py
+
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from core.partitions import PartitionedWriter, load_range, load_manifest
+
+SESSIONS = 40
+PARTITIONS = 3          # ventanas de 5 min por sesión
+ROWS = 30000            # 5 min a 100 Hz
+HEADER = ['timestamp', 'sensor_id', 'yaw', 'pitch', 'roll']
+
+
+def window(k: int) -> dict:
+    ts = (np.arange(ROWS) + k * ROWS) * 10.0
+    angles = np.round(np.sin(ts / 1000)[:, None] * [90, 45, 30], 2)
+    return {'timestamp': ts, 'sensor_id': 'imu1', 'yaw': angles[:, 0],
+            'pitch': angles[:, 1], 'roll': angles[:, 2]}
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    root = os.path.join(tmp, 'raw')
+    single = os.path.join(tmp, 'raw.csv')
+    parts = []
+    for s in range(SESSIONS):
+        # window_s=0: cada bloque de 5 min es una partición
+        writer = PartitionedWriter(root, HEADER, window_s=0)
+        for k in range(PARTITIONS):
+            writer.write_columns(window(k))
+            parts.append(pd.DataFrame(window(k)))
+        writer.close()
+    pd.concat(parts).to_csv(single, index=False)
+    entries = load_manifest(root)
+    session = entries[len(entries) // 2]['session']
+    t0, t1 = 1000 * 60 * 6, 1000 * 60 * 7     # minuto 6-7 de la sesión
+    n = SESSIONS * PARTITIONS * ROWS
+    print(f"{n} filas, {SESSIONS} sesiones × {PARTITIONS} particiones; "
+          f"CSV único {os.path.getsize(single) / 1e6:.0f} MB")
+
+    t = time.perf_counter()
+    df = pd.read_csv(single)
+    whole = df[(df['timestamp'] >= t0) & (df['timestamp'] <= t1)]
+    t_single = time.perf_counter() - t
+    t = time.perf_counter()
+    part = load_range(root, 'imu1', t0, t1, session=session)
+    t_part = time.perf_counter() - t
+    t = time.perf_counter()
+    full = load_range(root, session=session)
+    t_session = time.perf_counter() - t
+    print(f"Un minuto de una sesión: CSV único {t_single * 1e3:.0f} ms "
+          f"(sin límite de sesión: {len(whole)} filas de {SESSIONS} sesiones) | "
+          f"load_range {t_part * 1e3:.0f} ms ({len(part)} filas, {t_single / t_part:.0f}x)")
+    print(f"Una sesión completa: load_range {t_session * 1e3:.0f} ms ({len(full)} filas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# bench_process.py
+
+import os
+import sys
+import time
+import resource
+import tempfile
+import multiprocessing as mp
+import numpy as np
+from PyQt5.QtCore import QCoreApplication, QTimer
+from core.acquisition import CaptureController
+from core.acquisition_process import ProcessCaptureController
+
+N_PORTS = 4
+RATE_HZ = 100
+DURATION = 5.0
+GUI_BUSY_MS = 8      # trabajo Python por fotograma de la GUI (~repintado pesado)
+
+
+def _writer(masters, stop):
+    """Simula N ESP32 a RATE_HZ: cabecera y después muestras."""
+    for fd in masters:
+        os.write(fd, b"timestamp_ms,yaw,pitch,roll\r\n")
+    period = 1.0 / RATE_HZ
+    next_t = time.monotonic()
+    while not stop.is_set():
+        line = f"{time.monotonic() * 1000:.3f},1.00,2.00,3.00\r\n".encode()
+        for fd in masters:
+            os.write(fd, line)
+        next_t += period
+        time.sleep(max(0.0, next_t - time.monotonic()))
+
+
+def _cpu() -> float:
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    return ru.ru_utime + ru.ru_stime
+
+
+def run(app, controller_cls):
+    ptys = [os.openpty() for _ in range(N_PORTS)]
+    configs = [{'id': f"imu{i}", 'port': os.ttyname(s)} for i, (_, s) in enumerate(ptys)]
+    stop = mp.Event()
+    writer = mp.Process(target=_writer, args=([m for m, _ in ptys], stop), daemon=True)
+    writer.start()
+
+    tmp = tempfile.mkdtemp()
+    ctrl = controller_cls(configs, os.path.join(tmp, "raw.csv"), os.path.join(tmp, "lab.csv"),
+                          io_mode='selector')
+    latencies = []
+    ctrl.data_ready.connect(lambda r: latencies.append(time.monotonic() * 1000 - r['timestamp']))
+
+    def busy_frame():
+        t_end = time.perf_counter() + GUI_BUSY_MS / 1000
+        x = 0
+        while time.perf_counter() < t_end:
+            x += 1
+
+    gui = QTimer()
+    gui.timeout.connect(busy_frame)
+    state = {}
+
+    def begin():
+        latencies.clear()
+        state['cpu'], state['t'] = _cpu(), time.monotonic()
+        gui.start(16)
+        QTimer.singleShot(int(DURATION * 1000), app.quit)
+
+    ctrl.recording_started.connect(lambda: QTimer.singleShot(500, begin))
+    ctrl.start_recording()
+    app.exec_()
+    gui.stop()
+    cpu = (_cpu() - state['cpu']) / (time.monotonic() - state['t']) * 100
+
+    ctrl.stop_recording()
+    if hasattr(ctrl, 'close'):
+        ctrl.close()
+    stop.set()
+    writer.join()
+    for m, s in ptys:
+        os.close(m)
+        os.close(s)
+    with open(os.path.join(tmp, "raw.csv")) as f:
+        recorded = sum(1 for _ in f) - 1
+    print(f"{controller_cls.__name__:26s} | CPU proceso GUI {cpu:5.1f}% | "
+          f"{len(latencies) / DURATION:5.0f} muestras/s en la GUI | "
+          f"latencia GUI p50 {np.percentile(latencies, 50):5.1f} ms p99 {np.percentile(latencies, 99):5.1f} ms | "
+          f"grabadas {recorded}")
+
+
+def main():
+    app = QCoreApplication(sys.argv)
+    for controller_cls in (CaptureController, ProcessCaptureController):
+        run(app, controller_cls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# bench_recorder.py
+
+import os
+import csv
+import time
+import tempfile
+import numpy as np
+from core.csv_writer import BatchedCSVWriter
+
+N_ROWS = 50_000
+RATE = 400          # filas/s en la prueba a ritmo real (4 IMUs a 100 Hz)
+PACED_SECONDS = 3.0
+
+
+def _row(i):
+    return [i * 10.0, 'imu1', 12.34, -5.67, 89.01]
+
+
+def per_row_flush(path):
+    """Escritura anterior: writerow + flush en el hilo de adquisición."""
+    with open(path, 'a', newline='') as f:
+        writer = csv.writer(f)
+        times = []
+        for i in range(N_ROWS):
+            t0 = time.perf_counter()
+            writer.writerow(_row(i))
+            f.flush()
+            times.append(time.perf_counter() - t0)
+    return np.array(times), N_ROWS
+
+
+def batched(path, fsync='close'):
+    writer = BatchedCSVWriter(path, fsync=fsync)
+    times = []
+    for i in range(N_ROWS):
+        t0 = time.perf_counter()
+        writer.write_row(_row(i))
+        times.append(time.perf_counter() - t0)
+    writer.close()
+    return np.array(times), writer.batches
+
+
+def paced(path):
+    """Ritmo real: cuántas escrituras a disco hace cada versión."""
+    writer = BatchedCSVWriter(path)
+    period = 1.0 / RATE
+    t_next = time.monotonic()
+    n = int(RATE * PACED_SECONDS)
+    for i in range(n):
+        writer.write_row(_row(i))
+        t_next += period
+        time.sleep(max(0.0, t_next - time.monotonic()))
+    writer.close()
+    return n, writer.batches
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    for name, fn in (('flush por fila', per_row_flush), ('BatchedCSVWriter', batched)):
+        path = os.path.join(tmp, f"{name}.csv")
+        times, writes = fn(path)
+        print(f"{name:17s} | hilo de adquisición: media {times.mean() * 1e6:5.2f} us "
+              f"p99 {np.percentile(times, 99) * 1e6:6.2f} us por fila | {writes} escrituras")
+    n, batches = paced(os.path.join(tmp, "paced.csv"))
+    print(f"A {RATE} filas/s durante {PACED_SECONDS:.0f} s: {n} flush por fila antes, "
+          f"{batches} lotes ahora ({batches / PACED_SECONDS:.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# bench_recording.py
+
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from core.recording import RecordingReader, load_table, write_recording
+
+SCALE = 100
+REPEATS = 3
+
+
+def scaled_dataset(path: str) -> pd.DataFrame:
+    """data/datos_ejercicio.csv repetido SCALE veces con rep_id consecutivos."""
+    base = pd.read_csv(path)
+    n_reps = int(base['rep_id'].max()) + 1
+    parts = []
+    for k in range(SCALE):
+        part = base.copy()
+        part['rep_id'] += k * n_reps
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+
+def best_of(fn):
+    times = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def one_rep(path, rep_id):
+    reader = RecordingReader(path)
+    reader.to_dataframe(reader.reps[rep_id])
+    reader.close()
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    df = scaled_dataset('data/datos_ejercicio.csv')
+    csv_path = os.path.join(tmp, 'scaled.csv')
+    bin_path = os.path.join(tmp, 'scaled.imub')
+    df.to_csv(csv_path, index=False)
+    write_recording(bin_path, df)
+    csv_size, bin_size = os.path.getsize(csv_path), os.path.getsize(bin_path)
+    print(f"{len(df)} filas, {df['rep_id'].nunique()} repeticiones")
+    print(f"Tamaño: CSV {csv_size / 1e6:.1f} MB | .imub {bin_size / 1e6:.1f} MB "
+          f"({bin_size / csv_size:.0%})")
+
+    t_csv = best_of(lambda: pd.read_csv(csv_path))
+    t_bin = best_of(lambda: load_table(bin_path))
+    rep = int(df['rep_id'].iloc[len(df) // 2])
+    t_csv_rep = best_of(lambda: (lambda d: d[d['rep_id'] == rep])(pd.read_csv(csv_path)))
+    t_bin_rep = best_of(lambda: one_rep(bin_path, rep))
+    print(f"Carga completa:   pd.read_csv {t_csv * 1e3:7.1f} ms | load_table(.imub) "
+          f"{t_bin * 1e3:7.1f} ms ({t_csv / t_bin:.1f}x)")
+    print(f"Una repetición:   pd.read_csv {t_csv_rep * 1e3:7.1f} ms | RecordingReader "
+          f"{t_bin_rep * 1e3:7.1f} ms ({t_csv_rep / t_bin_rep:.0f}x)")
+
+    back = load_table(bin_path)
+    err = np.abs(back[['yaw', 'pitch', 'roll']].to_numpy() - df[['yaw', 'pitch', 'roll']].to_numpy())
+    print(f"Error máximo por float32 en ángulos: {err.max():.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# bench_startup.py
+
+import os
+import time
+import multiprocessing as mp
+from core.imu.manager import SensorManager, SensorStartupError
+
+# Arranque simulado de cada ESP32 (s) antes de mandar la cabecera CSV
+BOOT_DELAYS = (0.8, 1.0, 1.2, 1.4)
+
+
+def _esp32(master, boot_delay, stop):
+    """Simula un ESP32: ruido de arranque, cabecera y muestras a 100 Hz."""
+    time.sleep(boot_delay / 2)
+    os.write(master, b"\xff\x00ets Jun  8 2016 00:22:57\r\nrst:0x1 (POWERON_RESET)\r\n")
+    time.sleep(boot_delay / 2)
+    os.write(master, b"timestamp_ms,yaw,pitch,roll\r\n")
+    k = 0
+    while not stop.is_set():
+        os.write(master, f"{k * 10},1.00,2.00,3.00\r\n".encode())
+        k += 1
+        time.sleep(0.01)
+
+
+def run(io_mode: str, delays=BOOT_DELAYS, ready_timeout=5.0):
+    ptys = [os.openpty() for _ in delays]
+    stop = mp.Event()
+    procs = [mp.Process(target=_esp32, args=(m, d, stop), daemon=True)
+             for (m, _), d in zip(ptys, delays) if d is not None]
+    t0 = time.monotonic()
+    for p in procs:
+        p.start()
+    configs = [{'id': f"imu{i}", 'port': os.ttyname(s)} for i, (_, s) in enumerate(ptys)]
+    try:
+        sm = SensorManager(configs, io_mode=io_mode, ready_timeout=ready_timeout)
+        elapsed = time.monotonic() - t0
+        sm.close_all()
+        print(f"{len(delays)} IMUs | {io_mode:8s} | arranque {elapsed:.2f} s "
+              f"(antes: {2.0 * len(delays):.1f} s fijos + primera muestra)")
+    except SensorStartupError as e:
+        print(f"{io_mode:8s} | fallo tras {time.monotonic() - t0:.2f} s -> {e.failures}")
+    stop.set()
+    for p in procs:
+        p.join()
+    for m, s in ptys:
+        os.close(m)
+        os.close(s)
+
+
+def main():
+    for io_mode in ('threads', 'selector', 'async'):
+        run(io_mode)
+    # Un dispositivo mudo: se informa por sensor en vez de quedarse colgado
+    run('selector', delays=(0.8, None), ready_timeout=2.0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# bench_ui_batch.py
+
+import os
+import sys
+import time
+import tempfile
+import multiprocessing as mp
+import numpy as np
+from PyQt5.QtCore import QCoreApplication, QTimer
+from core.acquisition import CaptureController
+
+N_PORTS = 4
+RATE_HZ = 100
+DURATION = 5.0
+REDRAW_MS = 3.0      # coste de un repintado de gráfica en la GUI
+
+
+def _writer(masters, stop):
+    """Simula N ESP32 a RATE_HZ: cabecera y después muestras."""
+    for fd in masters:
+        os.write(fd, b"timestamp_ms,yaw,pitch,roll\r\n")
+    period = 1.0 / RATE_HZ
+    next_t = time.monotonic()
+    while not stop.is_set():
+        line = f"{time.monotonic() * 1000:.3f},1.00,2.00,3.00\r\n".encode()
+        for fd in masters:
+            os.write(fd, line)
+        next_t += period
+        time.sleep(max(0.0, next_t - time.monotonic()))
+
+
+def _redraw():
+    t_end = time.perf_counter() + REDRAW_MS / 1000
+    while time.perf_counter() < t_end:
+        pass
+
+
+def run(app, batched: bool):
+    ptys = [os.openpty() for _ in range(N_PORTS)]
+    configs = [{'id': f"imu{i}", 'port': os.ttyname(s)} for i, (_, s) in enumerate(ptys)]
+    stop = mp.Event()
+    writer = mp.Process(target=_writer, args=([m for m, _ in ptys], stop), daemon=True)
+    writer.start()
+
+    tmp = tempfile.mkdtemp()
+    ctrl = CaptureController(configs, os.path.join(tmp, "raw.csv"), os.path.join(tmp, "lab.csv"),
+                             io_mode='selector', ui_rate_hz=30)
+    stats = {'calls': 0, 'samples': 0, 'lag': [], 'on': False}
+
+    def on_reading(reading):
+        # Antes: un repintado por muestra
+        _redraw()
+        if stats['on']:
+            stats['calls'] += 1
+            stats['samples'] += 1
+            stats['lag'].append(time.monotonic() * 1000 - reading['timestamp'])
+
+    def on_batch(batch):
+        # Ahora: un repintado por sensor y lote
+        now = time.monotonic() * 1000
+        for columns in batch.values():
+            _redraw()
+            if stats['on']:
+                stats['calls'] += 1
+                stats['samples'] += len(columns['timestamp'])
+                stats['lag'].append(now - columns['timestamp'][-1])
+
+    if batched:
+        ctrl.data_batch_ready.connect(on_batch)
+    else:
+        ctrl.data_ready.connect(on_reading)
+
+    def begin():
+        stats['on'] = True
+        QTimer.singleShot(int(DURATION * 1000), app.quit)
+
+    ctrl.recording_started.connect(lambda: QTimer.singleShot(500, begin))
+    ctrl.start_recording()
+    app.exec_()
+    stats['on'] = False
+    ctrl.stop_recording()
+    stop.set()
+    writer.join()
+    for m, s in ptys:
+        os.close(m)
+        os.close(s)
+    lag = np.array(stats['lag'])
+    name = 'data_batch_ready (30 Hz)' if batched else 'data_ready por muestra'
+    print(f"{name:25s} | {stats['calls'] / DURATION:5.0f} repintados/s | "
+          f"{stats['samples'] / DURATION:5.0f} muestras/s en la GUI | "
+          f"retraso p50 {np.percentile(lag, 50):7.1f} ms, final {lag[-1]:7.1f} ms")
+
+
+def main():
+    app = QCoreApplication(sys.argv)
+    print(f"{N_PORTS} sensores a {RATE_HZ} Hz, repintado de {REDRAW_MS} ms")
+    for batched in (False, True):
+        run(app, batched)
+
+
+if __name__ == "__main__":
+    main()
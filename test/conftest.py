@@ -0,0 +1,13 @@
+# conftest.py
+
+import numpy as np
+
+
+def make_block(start, n, step=10.0, offset=0.0):
+    """
+    Bloque sintético (n, 4) [timestamp, yaw, pitch, roll] con timestamps
+    (start + i) · step + offset (por defecto una muestra cada 10 ms) y
+    ángulos proporcionales al timestamp.
+    """
+    ts = np.arange(start, start + n, dtype=np.float64) * step + offset
+    return np.column_stack((ts, ts / 100, ts / 200, ts / 300))
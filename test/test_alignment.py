@@ -0,0 +1,82 @@
+# test_alignment.py
+
+import math
+import numpy as np
+from core.imu.alignment import ClockSync, StreamAligner
+
+# Dos ESP32 con offset y deriva conocidos: host = offset + (1 + deriva) · device
+CLOCKS = {'imu1': (5.0, 100e-6), 'imu2': (2.0, -50e-6)}
+
+
+def _host(sid, device_s):
+    offset, drift = CLOCKS[sid]
+    return offset + (1 + drift) * device_s
+
+
+def _block(sid, device_s):
+    """Bloque (n, 4) cuyo yaw es una recta conocida del tiempo del host."""
+    host = _host(sid, device_s)
+    scale = 10.0 if sid == 'imu1' else 20.0
+    return np.column_stack((device_s * 1000, scale * host, -host, host + 1)), host
+
+
+def test_clock_sync_estimates_drift():
+    rng = np.random.default_rng(0)
+    for sid, (offset, drift) in CLOCKS.items():
+        device = np.arange(0, 60, 0.01)
+        host = _host(sid, device) + rng.uniform(0.001, 0.004, len(device))  # latencia
+        clock = ClockSync(half_life=30.0)
+        clock.update(device, host)
+        assert abs(clock.drift_ppm - drift * 1e6) < 10
+        # El offset absorbe la latencia media (2.5 ms)
+        assert abs(clock.to_host(30.0) - _host(sid, 30.0) - 0.0025) < 0.001
+
+
+def test_grid_interpolation_and_gaps():
+    aligner = StreamAligner(['imu1', 'imu2'], period=0.01, latency=0.1, max_gap=0.05)
+    # Dispositivos a 100 Hz con fases distintas; imu2 calla 0.3 s
+    dev1 = np.arange(0, 2, 0.01) + 0.003
+    dev2 = np.arange(3, 5, 0.01) + 0.007
+    dev2 = dev2[(dev2 < 4.0) | (dev2 > 4.3)]
+    end = 0.0
+    for sid, dev in (('imu1', dev1), ('imu2', dev2)):
+        block, host = _block(sid, dev)
+        aligner.push(sid, block, host)
+        end = max(end, host[-1])
+    times, values = aligner.pop_frames(end + 1.0)
+    assert len(times) and values.shape == (len(times), 2, 3)
+    assert np.allclose(np.diff(times), 0.01)
+
+    # Entre muestras consecutivas la interpolación reproduce la recta
+    span1 = (times >= _host('imu1', dev1[0])) & (times <= _host('imu1', dev1[-1]))
+    gap_lo, gap_hi = _host('imu2', dev2[dev2 < 4.0][-1]), _host('imu2', dev2[dev2 > 4.3][0])
+    span2 = ((times >= _host('imu2', dev2[0])) & (times <= _host('imu2', dev2[-1]))
+             & ~((times > gap_lo) & (times < gap_hi)))
+    assert span1.sum() > 150 and span2.sum() > 150
+    assert np.allclose(values[span1, 0, 0], 10 * times[span1], atol=1e-6)
+    assert np.allclose(values[span2, 1, 0], 20 * times[span2], atol=1e-6)
+    assert np.allclose(values[span2, 1, 2], times[span2] + 1, atol=1e-6)
+
+    # Dentro del hueco de imu2 (0.3 s > max_gap) sólo hay NaN
+    inside = (times > gap_lo + 0.05) & (times < gap_hi - 0.05)
+    assert inside.sum() > 15 and np.isnan(values[inside, 1]).all()
+    assert not np.isnan(values[inside, 0]).any()
+
+
+def test_long_silence_does_not_flood_frames():
+    aligner = StreamAligner(['imu1', 'imu2'], period=0.01, latency=0.1, max_gap=0.05)
+    dev = np.arange(0, 1, 0.01)
+    for sid in CLOCKS:
+        block, host = _block(sid, dev + (3.0 if sid == 'imu1' else 0.0))
+        aligner.push(sid, block, host)
+    t0 = _host('imu1', 4.0)
+    aligner.pop_frames(t0)
+    # Mil segundos sin datos: no se generan 100 000 tramas NaN
+    times, values = aligner.pop_frames(t0 + 1000)
+    assert len(times) < 50 and aligner.skipped > 99000
+    # Al volver los datos la rejilla sigue desde ahí
+    block, host = _block('imu1', np.arange(1000.0, 1001.0, 0.01) + 3.0)
+    aligner.push('imu1', block, host)
+    times, values = aligner.pop_frames(host[-1] + 1.0)
+    assert len(times) and times[0] >= host[0] - 0.05 - 1e-9
+    assert not math.isnan(values[len(values) // 2, 0, 0])
@@ -0,0 +1,78 @@
+# test_catalog.py
+
+import shutil
+import numpy as np
+import pandas as pd
+from core.acquisition import DataRecorder
+from core.catalog import RepCatalog, load_reps
+from core.recording import csv_to_binary
+from conftest import make_block
+
+DATA = 'data/datos_ejercicio.csv'
+
+
+def _record(tmp_path, labels, start=0):
+    rec = DataRecorder(None, str(tmp_path / 'raw.csv'), str(tmp_path / 'lab.csv'))
+    for k, label in enumerate(labels):
+        rec.start_segment(label)
+        rec.add_block('imu1', make_block(start + 100 * k, 30 + k))
+        rec.stop_segment()
+    rec.close()
+    return rec
+
+
+def test_index_and_load_match_groupby(tmp_path):
+    path = str(tmp_path / 'datos.csv')
+    shutil.copy(DATA, path)
+    catalog = RepCatalog.open(path)
+    reps = catalog.reps()
+    df = pd.read_csv(path)
+    groups = dict(list(df.groupby('rep_id')))
+    assert len(reps) == len(groups) == 40
+    assert sum(catalog.labels().values()) == 40
+
+    subset = catalog.reps(label='incorrecto')[:3] + reps[-1:]
+    for entry, frame in zip(subset, load_reps(path, subset)):
+        expected = groups[entry['rep_id']].reset_index(drop=True)
+        pd.testing.assert_frame_equal(frame, expected)
+        assert entry['n_samples'] == len(expected)
+        assert entry['t_start'] == expected['timestamp'].min()
+    catalog.close()
+
+
+def test_recorder_sessions_keep_unique_ids(tmp_path):
+    _record(tmp_path, ['correcto', 'incorrecto'])
+    _record(tmp_path, ['correcto'], start=1000)
+
+    catalog = RepCatalog.open(str(tmp_path / 'lab.csv'))
+    assert not catalog.is_stale()
+    reps = catalog.reps()
+    assert [e['rep_id'] for e in reps] == [1, 2, 3]
+    assert [e['session_id'] for e in reps] == [1, 1, 2]
+    assert [s['n_reps'] for s in catalog.sessions()] == [2, 1]
+    frames = load_reps(str(tmp_path / 'lab.csv'), catalog.reps(label='correcto'))
+    assert [len(f) for f in frames] == [30, 30]
+    assert frames[1]['timestamp'].iloc[0] == 10000.0
+    catalog.close()
+
+
+def test_stale_catalog_is_rebuilt(tmp_path):
+    _record(tmp_path, ['correcto'])
+    # Alguien añade una repetición al CSV por fuera
+    with open(tmp_path / 'lab.csv', 'a') as f:
+        f.write("7,5000.0,imu1,1.0,2.0,3.0,incorrecto\n")
+    catalog = RepCatalog.open(str(tmp_path / 'lab.csv'))
+    assert catalog.labels() == {'correcto': 1, 'incorrecto': 1}
+    catalog.close()
+
+
+def test_binary_recording(tmp_path):
+    path = str(tmp_path / 'datos.imub')
+    csv_to_binary(DATA, path)
+    catalog = RepCatalog.open(path)
+    reps = catalog.reps()
+    assert len(reps) == 40
+    frame, = load_reps(path, reps[5:6])
+    expected = pd.read_csv(DATA).groupby('rep_id').get_group(reps[5]['rep_id'])
+    assert frame['timestamp'].tolist() == expected['timestamp'].tolist()
+    catalog.close()
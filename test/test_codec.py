@@ -0,0 +1,66 @@
+# test_codec.py
+
+import numpy as np
+import pandas as pd
+from core.codec import encode_varints, decode_varints, delta, undelta, encode_columns, decode_columns
+from core.recording import BinaryRecordingWriter, RecordingReader, load_table, write_recording
+
+
+def test_varints_round_trip():
+    values = np.array([0, -1, 1, 63, -64, 64, 300, -(2 ** 40), 2 ** 62], dtype=np.int64)
+    raw = encode_varints(values)
+    assert len(encode_varints(np.array([0, -1, 63, -64]))) == 4   # 1 byte cada uno
+    decoded, used = decode_varints(raw + b"\xff\x01", len(values))
+    assert decoded.tolist() == values.tolist() and used == len(raw)
+
+
+def test_grouped_delta():
+    # Dos sensores intercalados: las diferencias se calculan dentro de cada uno
+    values = np.array([1000, 5000, 1010, 5010, 1020, 5020])
+    groups = np.array([0, 1, 0, 1, 0, 1])
+    d = delta(values, groups)
+    assert d.tolist() == [1000, 5000, 10, 10, 10, 10]
+    assert undelta(d, groups).tolist() == values.tolist()
+
+
+def test_column_encodings():
+    columns = [
+        np.array([18163.0, 18173.0, 18183.0, 18193.0]),                    # timestamp
+        np.array([-179.97, 153.28, 0.01, 22.07], dtype=np.float32),        # ángulo
+        np.array([0.125, 1.0, 2.0, 3.0], dtype=np.float32),                # 3 decimales
+        np.array([0, 1, 0, 1], dtype=np.int16),                            # sensor
+    ]
+    encs, payload = encode_columns(columns, groups=columns[3], group_column=3)
+    # Más de 2 decimales no admite la cuantización sin pérdida
+    assert encs == ['delta', 'centi', 'raw', 'delta']
+    decoded = decode_columns(encs, payload, 4, [c.dtype for c in columns], group_column=3)
+    for a, b in zip(decoded, columns):
+        assert a.dtype == b.dtype and np.array_equal(a, b)
+
+
+def test_compressed_recording(tmp_path):
+    df = pd.read_csv('data/datos_ejercicio.csv')
+    write_recording(str(tmp_path / 'raw.imub'), df)
+    write_recording(str(tmp_path / 'z.imub'), df, codec='delta+zlib')
+    assert (tmp_path / 'z.imub').stat().st_size * 4 < (tmp_path / 'raw.imub').stat().st_size
+    a, b = load_table(str(tmp_path / 'raw.imub')), load_table(str(tmp_path / 'z.imub'))
+    pd.testing.assert_frame_equal(a, b)
+
+
+def test_append_mixed_codecs(tmp_path):
+    path = str(tmp_path / 'raw_log.imub')
+    header = ['timestamp', 'sensor_id', 'yaw', 'pitch', 'roll']
+    rows = [[10.0 * k + s, f'imu{s}', 0.01 * k, -90.0 + s, 45.5] for k in range(50) for s in (1, 2)]
+    for codec, part in (('raw', rows[:40]), ('delta+lzma', rows[40:])):
+        writer = BinaryRecordingWriter(path, header, codec=codec)
+        writer.write_rows(part)
+        writer.close()
+
+    reader = RecordingReader(path)
+    arrays, cats = reader.chunk(1)          # sólo se decodifica ese bloque
+    assert cats['sensor_id'] == ['imu1', 'imu2'] and len(arrays['timestamp']) == 60
+    reader.close()
+    df = load_table(path)
+    assert df['timestamp'].tolist() == [r[0] for r in rows]
+    assert df['sensor_id'].tolist() == [r[1] for r in rows]
+    assert np.array_equal(df['yaw'].to_numpy(np.float32), np.float32([r[2] for r in rows]))
@@ -0,0 +1,45 @@
+# test_controller_start.py
+
+import threading
+import time
+import pytest
+from PyQt5.QtCore import QCoreApplication
+from core.imu.manager import SensorStartupError
+import core.acquisition
+import core.predictor
+
+app = QCoreApplication.instance() or QCoreApplication([])
+
+CFG = [{'id': 'imu1', 'port': '/dev/null'}]
+
+
+def _slow_failing_manager(*args, **kwargs):
+    # Un puerto que no responde: se agota la espera de arranque
+    time.sleep(0.3)
+    raise SensorStartupError({"imu1": "sin respuesta"})
+
+
+@pytest.mark.parametrize('kind', ['capture', 'predictor'])
+def test_start_does_not_wait_for_sensors(kind, tmp_path, monkeypatch):
+    if kind == 'capture':
+        monkeypatch.setattr(core.acquisition, 'SensorManager', _slow_failing_manager)
+        ctrl = core.acquisition.CaptureController(CFG, str(tmp_path / 'raw.csv'),
+                                                  str(tmp_path / 'lab.csv'))
+        start = ctrl.start_recording
+    else:
+        monkeypatch.setattr(core.predictor, 'SensorManager', _slow_failing_manager)
+        monkeypatch.setattr(core.predictor, 'load', lambda path: object())
+        ctrl = core.predictor.PredictorController(CFG, 'model.joblib')
+        start = ctrl.start
+    failed, started = [], threading.Event()
+    ctrl.start_failed.connect(failed.append)
+    ctrl.recording_started.connect(started.set)
+
+    t0 = time.monotonic()
+    start()
+    assert time.monotonic() - t0 < 0.1
+    start()     # mientras abre, un segundo start no lanza otro hilo
+    ctrl._thread.join(5)
+    app.processEvents()     # las señales del hilo llegan por el bucle de la GUI
+    assert len(failed) == 1 and "imu1: sin respuesta" in failed[0]
+    assert not started.is_set()
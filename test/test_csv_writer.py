@@ -0,0 +1,113 @@
+# test_csv_writer.py
+
+import time
+import numpy as np
+import core.csv_writer as csv_writer
+from core.csv_writer import BatchedCSVWriter
+
+HEADER = ['timestamp', 'sensor_id', 'yaw']
+
+
+def _wait_for(cond, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def _lines(path):
+    return open(path, encoding='utf-8').read().splitlines()
+
+
+def test_flush_by_size_and_by_time(tmp_path):
+    path = str(tmp_path / 'a.csv')
+    # Sólo por tamaño: el plazo no vence durante el test
+    writer = BatchedCSVWriter(path, HEADER, flush_interval=60, flush_bytes=200)
+    writer.write_row([0.0, 'imu1', 1.5])
+    time.sleep(0.1)
+    assert writer.batches == 0 and len(_lines(path)) == 1
+    writer.write_rows([[float(k), 'imu1', 1.5] for k in range(1, 30)])
+    assert _wait_for(lambda: writer.batches == 1)
+    assert len(_lines(path)) == 31
+    writer.close()
+
+    # Sólo por tiempo: una fila sale tras flush_interval
+    path = str(tmp_path / 'b.csv')
+    writer = BatchedCSVWriter(path, HEADER, flush_interval=0.05, flush_bytes=1 << 20)
+    t0 = time.monotonic()
+    writer.write_row([0.0, 'imu1', 1.5])
+    assert _wait_for(lambda: len(_lines(path)) == 2)
+    assert time.monotonic() - t0 >= 0.04
+    writer.close()
+
+
+def test_close_writes_everything_queued(tmp_path):
+    path = str(tmp_path / 'a.csv')
+    writer = BatchedCSVWriter(path, HEADER, flush_interval=60, flush_bytes=1 << 20)
+    for k in range(1000):
+        writer.write_row([float(k), 'imu1', k / 2])
+    writer.write_columns({'timestamp': np.arange(1000.0, 1010.0), 'sensor_id': 'imu2',
+                          'yaw': np.zeros(10)})
+    writer.close()
+    lines = _lines(path)
+    assert lines[0] == ','.join(HEADER) and len(lines) == 1011
+    assert lines[1000] == '999.0,imu1,499.5' and lines[-1] == '1009.0,imu2,0.0'
+    assert writer.rows == 1010 and writer.error is None
+
+
+def test_fsync_policies(tmp_path, monkeypatch):
+    calls = []
+    real_fsync = csv_writer.os.fsync
+    monkeypatch.setattr(csv_writer.os, 'fsync', lambda fd: calls.append(fd) or real_fsync(fd))
+    expected = {}
+    for policy in csv_writer.FSYNC_POLICIES:
+        calls.clear()
+        writer = BatchedCSVWriter(str(tmp_path / f'{policy}.csv'), HEADER,
+                                  flush_interval=60, flush_bytes=50, fsync=policy)
+        for k in range(3):
+            writer.write_rows([[float(k), 'imu1', 0.0]] * 5)
+            assert _wait_for(lambda: writer.batches == k + 1)
+        writer.close()
+        expected[policy] = len(calls)
+    # 'batch': uno por lote más el del cierre
+    assert expected == {'never': 0, 'batch': 4, 'close': 1}
+
+
+def test_write_error_is_reported_and_close_returns(tmp_path, capsys):
+    class Failing(BatchedCSVWriter):
+        def _write_batch(self):
+            raise OSError("disco lleno")
+
+    writer = Failing(str(tmp_path / 'a.csv'), HEADER, flush_interval=0.01)
+    writer.write_row([0.0, 'imu1', 1.5])
+    writer.write_row([1.0, 'imu1', 1.5])
+    t0 = time.monotonic()
+    writer.close()
+    assert time.monotonic() - t0 < 1.0
+    assert isinstance(writer.error, OSError) and writer.rows == 0
+    assert capsys.readouterr().out.count("disco lleno") == 1
+
+
+def test_on_written_byte_ranges(tmp_path):
+    path = str(tmp_path / 'a.csv')
+    header = HEADER + ['label']
+    ranges = []
+    for session in range(2):
+        # La segunda sesión añade al fichero existente, sin repetir cabecera
+        writer = BatchedCSVWriter(path, header, flush_interval=60)
+        writer.write_row([0.0, 'imu1', 0.0, 'suelta'])
+        for label in ('correcto', 'pequeño', 'incorrecto'):
+            writer.write_columns(
+                {'timestamp': np.arange(3.0) + 10 * session, 'sensor_id': 'imu1',
+                 'yaw': np.full(3, 0.5), 'label': label},
+                on_written=lambda start, end, label=label: ranges.append((label, start, end)))
+        writer.close()
+
+    data = open(path, 'rb').read()
+    assert data.count(b'timestamp') == 1
+    assert len(ranges) == 6
+    for (label, start, end), session in zip(ranges, [0, 0, 0, 1, 1, 1]):
+        expected = ''.join(f"{t + 10 * session:.1f},imu1,0.5,{label}\r\n" for t in range(3))
+        assert data[start:end].decode('utf-8') == expected
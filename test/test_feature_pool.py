@@ -0,0 +1,22 @@
+# test_feature_pool.py
+
+import numpy as np
+import pandas as pd
+from core.feature_pool import FeaturePool
+from core.features import extract_features_batch
+
+DATA = 'data/datos_ejercicio.csv'
+
+
+def test_parallel_matches_batch_in_rep_order():
+    df = pd.read_csv(DATA)
+    # Desordenado: el resultado sigue el orden de rep_id, como groupby
+    shuffled = df.sample(frac=1, random_state=0).sort_values('timestamp', kind='stable')
+    expected = extract_features_batch(df)
+    with FeaturePool(2, min_chunk_samples=1000) as pool:
+        keys = df['rep_id'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        assert len(pool._chunks(starts, len(df))) == 9      # 8 tareas
+        pd.testing.assert_frame_equal(pool.extract(shuffled), expected)
+        pd.testing.assert_frame_equal(pool.extract(df, starts),
+                                      expected.reset_index(drop=True))
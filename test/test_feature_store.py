@@ -0,0 +1,74 @@
+# test_feature_store.py
+
+import numpy as np
+import pandas as pd
+import core.feature_store as feature_store
+from core.feature_store import FeatureStore
+from core.features import extract_features_batch
+from core.training import TrainingController
+
+DATA = 'data/datos_ejercicio.csv'
+
+
+def _dataset():
+    df = pd.read_csv(DATA)
+    keys = df['rep_id'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return df, starts
+
+
+def test_only_new_or_changed_reps_are_computed(tmp_path):
+    path = str(tmp_path / 'cache.npz')
+    df, starts = _dataset()
+    store = FeatureStore(path)
+    X = store.features(df, starts)
+    assert (store.hits, store.misses) == (0, 40)
+    store.save()
+    pd.testing.assert_frame_equal(X, extract_features_batch(df, starts))
+
+    # Una repetición modificada: sólo ésa se recalcula
+    changed = df.copy()
+    changed.loc[starts[5] + 3, 'yaw'] += 1.0
+    store = FeatureStore(path)
+    X = store.features(changed, starts)
+    assert (store.hits, store.misses) == (39, 1)
+    pd.testing.assert_frame_equal(X, extract_features_batch(changed, starts))
+
+
+def test_lru_eviction_and_version(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cache.npz')
+    df, starts = _dataset()
+    store = FeatureStore(path, capacity=10)
+    store.features(df, starts)
+    store.save()
+    # Se usan las 5 primeras: son las más recientes y sobreviven
+    sub = df.iloc[:starts[5]]
+    store = FeatureStore(path, capacity=10)
+    assert len(store) == 10
+    store.features(df, starts)
+    store.features(sub, starts[:5])
+    store.save()
+    store = FeatureStore(path, capacity=10)
+    store.features(sub, starts[:5])
+    assert store.hits == 5
+
+    monkeypatch.setattr(feature_store, 'FEATURES_VERSION', 2)
+    store = FeatureStore(path)
+    assert len(store) == 0
+
+
+def test_training_dataset_uses_cache(tmp_path):
+    df = pd.read_csv(DATA)
+    path = str(tmp_path / 'datos.csv')
+    df[df['rep_id'] <= 30].to_csv(path, index=False)
+    cache = str(tmp_path / 'cache.npz')
+    ctrl = TrainingController(path, str(tmp_path / 'model.joblib'), {}, feature_cache=cache)
+    ctrl.load_dataset()
+    assert ctrl.cache_stats == (0, 30)
+
+    df[df['rep_id'] > 30].to_csv(path, mode='a', header=False, index=False)
+    X, y = ctrl.load_dataset()
+    assert ctrl.cache_stats == (30, 10)
+    expected = extract_features_batch(df).reset_index(drop=True)
+    pd.testing.assert_frame_equal(X, expected)
+    assert y.tolist() == df.groupby('rep_id')['etiqueta'].first().tolist()
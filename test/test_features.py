@@ -0,0 +1,133 @@
+# test_features.py
+
+import numpy as np
+import pandas as pd
+from joblib import load
+from sklearn.neighbors import KNeighborsClassifier
+from core.features import (extract_features, extract_features_batch, FeatureAccumulator,
+                           FEATURE_NAMES, required_stats)
+from core.training import TrainingController
+from core.segment_buffer import SegmentCapture
+
+DATA = 'data/datos_ejercicio.csv'
+
+
+def _per_rep(df):
+    return pd.DataFrame([extract_features(group) for _, group in df.groupby('rep_id')])
+
+
+def test_batch_matches_per_rep_on_dataset():
+    df = pd.read_csv(DATA)
+    expected = _per_rep(df)
+    got = extract_features_batch(df)
+    assert got.index.tolist() == sorted(df['rep_id'].unique())
+    got = got.reset_index(drop=True)
+    assert list(got.columns) == list(expected.columns)
+    assert got.dtypes.equals(expected.dtypes)
+    np.testing.assert_allclose(got, expected, rtol=1e-10, atol=1e-10)
+
+
+def test_batch_edge_cases():
+    # Repeticiones desordenadas, de una muestra, con mesetas, timestamps
+    # repetidos y en segundos
+    rng = np.random.default_rng(0)
+    parts = []
+    for r in range(200):
+        n = int(rng.integers(1, 30))
+        ts = np.cumsum(rng.integers(0, 3, n)) * (10.0 if r % 2 else 0.01) + 500
+        angles = rng.integers(-3, 4, (n, 3)).astype(float)
+        if r % 7 == 0:
+            angles[:, 1] = 1.0
+        parts.append(pd.DataFrame({'rep_id': r % 90, 'timestamp': ts, 'yaw': angles[:, 0],
+                                   'pitch': angles[:, 1], 'roll': angles[:, 2]}))
+    df = pd.concat(parts, ignore_index=True)
+    with np.errstate(all='ignore'):
+        expected = _per_rep(df)
+    got = extract_features_batch(df).reset_index(drop=True)
+    np.testing.assert_allclose(got, expected, rtol=1e-9, atol=1e-9)
+
+
+def test_accumulator_matches_recorded_reps():
+    df = pd.read_csv(DATA)
+    rng = np.random.default_rng(1)
+    for _, group in df.groupby('rep_id'):
+        samples = group[['timestamp', 'yaw', 'pitch', 'roll']].to_numpy()
+        acc = FeatureAccumulator()
+        i = 0
+        while i < len(samples):
+            k = int(rng.integers(1, 12))
+            acc.update(samples[i:i + k])
+            i += k
+        expected = extract_features(group)
+        got = acc.features()
+        assert list(got) == list(expected)
+        np.testing.assert_allclose(list(got.values()), list(expected.values()),
+                                   rtol=1e-9, atol=1e-9)
+
+
+def test_capture_features_with_pre_roll_and_trim():
+    df = pd.read_csv(DATA)
+    samples = df[df['rep_id'] == 3][['timestamp', 'yaw', 'pitch', 'roll']].to_numpy()
+    results = []
+
+    def on_finish(buffer, tag):
+        results.append((buffer.features(), extract_features(buffer.columns())))
+
+    capture = SegmentCapture(on_finish, pre_roll=0.5, features=True)
+    capture.add_block('imu1', samples[:100])
+    capture.start()
+    for i in range(100, len(samples), 7):
+        capture.add_block('imu1', samples[i:i + 7])
+    # Recorte de 1.5 s: vuelve a una copia intermedia del acumulador
+    capture.stop(post_roll=-1.5)
+    (got, expected), = results
+    np.testing.assert_allclose(list(got.values()), list(expected.values()),
+                               rtol=1e-9, atol=1e-9)
+
+
+def test_capture_features_with_two_sensors():
+    df = pd.read_csv(DATA)
+    samples = df[df['rep_id'] == 5][['timestamp', 'yaw', 'pitch', 'roll']].to_numpy()
+    results = []
+
+    def on_finish(buffer, tag):
+        # Sin el lock: la captura sigue aceptando muestras mientras tanto
+        capture.add_block('imu1', samples[-1:])
+        results.append((buffer, buffer.features(), extract_features(buffer.columns())))
+
+    capture = SegmentCapture(on_finish, features=True)
+    capture.start()
+    for i in range(0, len(samples), 7):
+        capture.add_block('imu1', samples[i:i + 7])
+        capture.add_block('imu2', samples[i:i + 7] + [3.0, 1.0, 2.0, 3.0])
+    capture.stop()
+    (buffer, got, expected), = results
+    # Con dos sensores no se acumula: se calcula sobre las columnas intercaladas
+    assert not buffer._acc and len(set(buffer.columns()['sensor_id'])) == 2
+    np.testing.assert_allclose(list(got.values()), list(expected.values()),
+                               rtol=1e-9, atol=1e-9)
+
+
+def test_model_subset_drives_live_features(tmp_path):
+    df = pd.read_csv(DATA)
+    path = str(tmp_path / 'datos.csv')
+    df.to_csv(path, index=False)
+    model_path = str(tmp_path / 'model.joblib')
+    ctrl = TrainingController(path, model_path, {'KNN': KNeighborsClassifier(3)},
+                              feature_selection='mutual_info', n_features=5)
+    finished = []
+    ctrl.finished.connect(lambda results, best: finished.append(results[best]))
+    ctrl._run()
+    subset = finished[0]['features']
+    assert len(subset) == 5 and set(subset) < set(FEATURE_NAMES)
+    assert list(load(model_path).feature_names_in_) == subset
+
+    # El acumulador sólo mantiene los estadísticos del subconjunto
+    acc = FeatureAccumulator(subset)
+    assert acc._stats == required_stats(subset)
+    group = df[df['rep_id'] == 7]
+    acc.update(group[['timestamp', 'yaw', 'pitch', 'roll']].to_numpy())
+    expected = extract_features(group, subset)
+    assert list(acc.features()) == subset
+    np.testing.assert_allclose(list(acc.features().values()), list(expected.values()),
+                               rtol=1e-9)
@@ -0,0 +1,34 @@
+# test_framing.py
+
+from core.imu.framing import LineFramer
+
+
+def test_line_split_across_reads_and_trailing_partial():
+    framer = LineFramer()
+    assert framer.feed(b"100,1.0,2.") == []
+    assert framer.feed(b"0,3.0\r\n110,1.5") == [b"100,1.0,2.0,3.0"]
+    # La cola incompleta espera a la siguiente lectura
+    assert framer.stats()['pending_bytes'] == len(b"110,1.5")
+    assert framer.feed(b",2.5,3.5\r\n120,") == [b"110,1.5,2.5,3.5"]
+    assert framer.feed(b"1,2,3\n") == [b"120,1,2,3"]
+    assert framer.stats() == {'frames': 3, 'partial': 0, 'garbage': 0, 'pending_bytes': 0}
+
+
+def test_crlf_and_lf_endings():
+    framer = LineFramer()
+    assert framer.feed(b"1,2,3,4\r\n5,6,7,8\n9,10,11,12\r\n") == [
+        b"1,2,3,4", b"5,6,7,8", b"9,10,11,12"]
+    # Una línea vacía entre saltos cuenta como basura
+    assert framer.feed(b"13,14,15,16\n\n") == [b"13,14,15,16"]
+    assert framer.garbage == 1 and framer.frames == 4
+
+
+def test_oversized_line_is_discarded():
+    framer = LineFramer(max_frame=32)
+    # Sin salto de línea: al pasar de max_frame se tira como parcial
+    assert framer.feed(b"x" * 20) == []
+    assert framer.feed(b"x" * 20) == []
+    assert framer.partial == 1 and framer.stats()['pending_bytes'] == 0
+    # Línea completa pero demasiado larga entre dos válidas: basura
+    assert framer.feed(b"1,2,3,4\n" + b"9" * 40 + b"\n5,6,7,8\n") == [b"1,2,3,4", b"5,6,7,8"]
+    assert framer.garbage == 1 and framer.frames == 2
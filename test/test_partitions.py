@@ -0,0 +1,82 @@
+# test_partitions.py
+
+import json
+import numpy as np
+from core.acquisition import DataRecorder
+from core.partitions import (PartitionedWriter, load_manifest, select_partitions, load_range,
+                             sessions, session_live)
+from conftest import make_block
+
+HEADER = ['timestamp', 'sensor_id', 'yaw', 'pitch', 'roll']
+
+
+def test_rotation_and_range_query(tmp_path):
+    root = str(tmp_path / 'raw')
+    # window_s=0: cada escritura abre partición nueva
+    writer = PartitionedWriter(root, HEADER, window_s=0)
+    for k in range(4):
+        block = make_block(100 * k, 100)
+        for sid in ('imu1', 'imu2'):
+            writer.write_columns({'timestamp': block[:, 0], 'sensor_id': sid, 'yaw': block[:, 1],
+                                  'pitch': block[:, 2], 'roll': block[:, 3]})
+    writer.close()
+
+    entries = load_manifest(root)
+    assert len(entries) == 8 and all(e['closed'] for e in entries)
+    assert entries[2]['sensors'] == {'imu1': {'rows': 100, 't_min': 1000.0, 't_max': 1990.0}}
+    # Sólo se abren las particiones que solapan
+    assert [e['path'][-13:] for e in select_partitions(root, 'imu2', 1500, 2500)] == \
+        ['part-0003.csv', 'part-0005.csv']
+    df = load_range(root, 'imu2', 1500, 2500)
+    assert df['timestamp'].tolist() == [1500.0 + 10 * i for i in range(101)]
+    assert set(df['sensor_id']) == {'imu2'}
+
+
+def test_sessions_and_recovery(tmp_path):
+    raw_path = str(tmp_path / 'raw.csv')
+    rec = DataRecorder(None, raw_path, str(tmp_path / 'lab.csv'), raw_partition_s=300)
+    rec.write_raw_block('imu1', make_block(0, 50))
+    rec.close()
+    root = str(tmp_path / 'raw')
+    first = rec.raw_writer.session
+
+    # Segunda sesión cortada a medias: su partición queda abierta en el manifiesto
+    writer = PartitionedWriter(root, HEADER)
+    writer.write_row([5.0, 'imu1', 1.0, 2.0, 3.0])
+    writer.write_row([15.0, 'imu3', 1.0, 2.0, 3.0])
+    writer._writer.close()
+    writer._session_lock.close()     # el proceso muere: se suelta el lock
+    assert load_manifest(root)[-1]['closed'] is None
+    assert len(load_range(root, 'imu1', session=writer.session)) == 1
+
+    # El siguiente escritor la completa recorriendo el fichero (y, sin
+    # filas, no crea sesión)
+    PartitionedWriter(root, HEADER).close()
+    recovered = load_manifest(root)[1]
+    assert recovered['rows'] == 2 and recovered['sensors']['imu3']['t_min'] == 15.0
+    assert len(load_range(root, 'imu1', session=first)) == 50
+    summary = sessions(root)
+    assert summary[first]['rows'] == 50 and summary[writer.session]['sensors'] == {'imu1', 'imu3'}
+    with open(tmp_path / 'raw' / 'manifest.json') as f:
+        assert len(json.load(f)['partitions']) == 2
+
+
+def test_live_session_is_not_recovered(tmp_path):
+    root = str(tmp_path / 'raw')
+    # Escritor en curso (p.ej. la adquisición en otro proceso)
+    live = PartitionedWriter(root, HEADER)
+    live.write_row([5.0, 'imu1', 1.0, 2.0, 3.0])
+    assert session_live(root, live.session)
+
+    other = PartitionedWriter(root, HEADER)
+    other.write_row([7.0, 'imu2', 1.0, 2.0, 3.0])
+    entry = load_manifest(root)[0]
+    assert entry['session'] == live.session and entry['closed'] is None
+
+    # Cada uno completa sus particiones sin pisar las del otro
+    live.close()
+    other.close()
+    entries = load_manifest(root)
+    assert [e['session'] for e in entries] == [live.session, other.session]
+    assert all(e['closed'] for e in entries) and [e['rows'] for e in entries] == [1, 1]
+    assert not session_live(root, live.session)
@@ -0,0 +1,43 @@
+# test_pre_roll.py
+
+import numpy as np
+import pandas as pd
+from core.acquisition import DataRecorder
+from core.segment_buffer import HistoryRing
+from conftest import make_block
+
+
+def _recorder(tmp_path, **kwargs):
+    return DataRecorder(None, str(tmp_path / 'raw.csv'), str(tmp_path / 'lab.csv'), **kwargs)
+
+
+def test_history_ring_fixed_memory():
+    ring = HistoryRing(8)
+    for k in range(10):
+        ring.push(make_block(3 * k, 3))
+    assert len(ring) == 8 and ring.last_timestamp == 290
+    assert np.concatenate(ring.views())[:, 0].tolist() == [10.0 * i for i in range(22, 30)]
+    assert np.concatenate(ring.since(265))[:, 0].tolist() == [270, 280, 290]
+    assert ring._data.nbytes == 8 * 4 * 8
+
+
+def test_pre_roll_and_post_roll(tmp_path):
+    rec = _recorder(tmp_path, pre_roll=0.05, post_roll=0.03)
+    rec.add_block('imu1', make_block(0, 20))            # 0..190 ms
+    rec.start_segment('correcto')                   # pre-roll: 140..190
+    rec.add_block('imu1', make_block(20, 5))            # 200..240
+    rec.stop_segment()                              # post-roll hasta 270
+    rec.add_block('imu1', make_block(25, 2))            # 250, 260
+    assert rec.current_label == 'correcto'            # sigue en post-roll
+    rec.add_block('imu1', make_block(27, 5))            # 270 entra, 280.. no
+    # La siguiente no repite muestras de la anterior aunque pida 1 s de pre-roll
+    rec.add_block('imu1', make_block(32, 3))            # 320..340
+    rec.start_segment('incorrecto', pre_roll=1.0)
+    rec.stop_segment(post_roll=0)
+    rec.close()
+
+    df = pd.read_csv(tmp_path / 'lab.csv')
+    first = df[df['rep_id'] == 1]['timestamp'].tolist()
+    assert first == [10.0 * i for i in range(14, 28)]
+    second = df[df['rep_id'] == 2]['timestamp'].tolist()
+    assert second == [280.0, 290.0, 300.0, 310.0, 320.0, 330.0, 340.0]
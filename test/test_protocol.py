@@ -0,0 +1,64 @@
+# test_protocol.py
+
+import numpy as np
+from core.imu.protocol import (
+    AutoFramer, BinaryFramer, FRAME_SIZE, crc16, encode_frame, encode_frames
+)
+
+SAMPLES = [(1000 + 10 * i, -179.99 + i, 45.5 - i, 0.01 * i) for i in range(50)]
+
+
+def test_crc16_reference_value():
+    # Valor de referencia de CRC-16/CCITT-FALSE
+    assert crc16(b"123456789") == 0x29B1
+
+
+def test_roundtrip_in_small_chunks():
+    stream = encode_frames(SAMPLES)
+    framer = BinaryFramer()
+    blocks = [framer.feed(stream[i:i + 5]) for i in range(0, len(stream), 5)]
+    out = np.concatenate(blocks)
+    np.testing.assert_allclose(out, np.array(SAMPLES), atol=0.005)
+    assert framer.stats()['frames'] == len(SAMPLES)
+    assert framer.stats()['dropped'] == 0
+
+
+def test_resync_after_garbage_and_corruption():
+    stream = bytearray(b"\x00\xA5garbage" + encode_frames(SAMPLES[:10]))
+    # Corrompemos un byte de la 4ª trama
+    stream[9 + 3 * FRAME_SIZE + 6] ^= 0xFF
+    framer = BinaryFramer()
+    out = framer.feed(bytes(stream))
+    stats = framer.stats()
+    assert len(out) == 9
+    assert stats['crc_errors'] == 1
+    assert stats['dropped'] == 1
+
+
+def test_sync_pattern_in_garbage_is_not_a_crc_error():
+    framer = BinaryFramer()
+    frames = encode_frames(SAMPLES[:4])
+    # Patrones de sync sueltos entre basura, antes y en medio del flujo
+    stream = b"\xA5\x5A" + bytes(40) + frames[:32] + b"xx\xA5\x5Axx" + bytes(20) + frames[32:]
+    out = np.concatenate([framer.feed(stream[i:i + 7]) for i in range(0, len(stream), 7)])
+    stats = framer.stats()
+    assert len(out) == 4
+    assert stats['crc_errors'] == 0 and stats['resyncs'] == 2
+
+
+def test_dropped_frames_from_sequence_counter():
+    stream = encode_frame(65534, 0, 0, 0, 0) + encode_frame(2, 10, 0, 0, 0)
+    framer = BinaryFramer()
+    assert len(framer.feed(stream)) == 2
+    assert framer.dropped == 3  # 65535, 0, 1
+
+
+def test_autodetect_binary_and_text():
+    binary = AutoFramer()
+    out = binary.feed(b"\x13\x37" + encode_frames(SAMPLES[:3]))
+    assert binary.mode == 'binary' and len(out) == 3
+
+    text = AutoFramer()
+    out = text.feed(b"timestamp_ms,yaw,pitch,roll\r\n10,1.00,2.00,3.00\r\n")
+    assert text.mode == 'text'
+    assert out == [b"timestamp_ms,yaw,pitch,roll", b"10,1.00,2.00,3.00"]
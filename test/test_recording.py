@@ -0,0 +1,68 @@
+# test_recording.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from core.recording import (BinaryRecordingWriter, RecordingReader, load_table,
+                            write_recording, binary_to_csv)
+from core.csv_writer import BatchedWriter
+
+HEADER = ['rep_id', 'timestamp', 'sensor_id', 'yaw', 'pitch', 'roll', 'label']
+
+
+def _rep(rep_id, label, n=5):
+    return [[rep_id, 10.0 * k, 'imu1', 1.25 * k, -0.5, 90.0, label] for k in range(n)]
+
+
+def test_csv_round_trip(tmp_path):
+    df = pd.read_csv('data/datos_ejercicio.csv').head(500)
+    write_recording(str(tmp_path / 'a.imub'), df)
+    binary_to_csv(str(tmp_path / 'a.imub'), str(tmp_path / 'a.csv'))
+    assert (tmp_path / 'a.csv').read_text() == df.to_csv(index=False)
+
+
+def test_append_and_reopen(tmp_path):
+    path = str(tmp_path / 'rec.imub')
+    for rep_id, label in ((1, 'correcto'), (2, 'incorrecto')):
+        writer = BinaryRecordingWriter(path, HEADER)
+        writer.write_rows(_rep(rep_id, label))
+        writer.close()
+
+    reader = RecordingReader(path)
+    assert reader.reps == {1: [0], 2: [1]}
+    assert reader.rep_label(2) == 'incorrecto'
+    arrays, cats = reader.chunk(1)
+    assert arrays['rep_id'].tolist() == [2] * 5
+    assert arrays['yaw'].dtype == np.float32 and not arrays['yaw'].flags.owndata
+    assert cats['label'] == ['incorrecto']
+    reader.close()
+
+    df = load_table(path)
+    assert len(df) == 10
+    assert df['label'].tolist() == ['correcto'] * 5 + ['incorrecto'] * 5
+    assert df['yaw'].tolist()[:3] == [0.0, 1.25, 2.5]
+
+
+def test_recovers_without_index(tmp_path):
+    path = str(tmp_path / 'rec.imub')
+    writer = BinaryRecordingWriter(path, HEADER)
+    writer.write_rows(_rep(1, 'correcto'))
+    writer.write_rows(_rep(2, 'correcto'))
+    writer.close()
+    # Simula un corte: sin índice ni cola, y medio bloque al final
+    with open(path, 'r+b') as f:
+        data = f.read()
+    index_at = data.rindex(b'{"chunks"')
+    with open(path, 'wb') as f:
+        f.write(data[:index_at] + data[index_at - 40:index_at - 8])
+
+    assert load_table(path)['rep_id'].tolist() == [1] * 5 + [2] * 5
+
+
+def test_writer_without_hooks_fails_on_construction(tmp_path):
+    class Incomplete(BatchedWriter):
+        def _add(self, rows):
+            return 0
+
+    with pytest.raises(TypeError, match='_write_batch'):
+        Incomplete(str(tmp_path / 'x.csv'))
@@ -0,0 +1,54 @@
+# test_ring.py
+
+import threading
+import numpy as np
+import pytest
+from core.imu.ring import SampleRing
+from conftest import make_block
+
+
+def test_drop_oldest_keeps_latest():
+    ring = SampleRing(8, 'drop_oldest')
+    for k in range(5):
+        ring.put(make_block(3 * k, 3, step=1.0), float(k))
+    rows = ring.drain()
+    assert rows[:, 0].tolist() == list(range(7, 15))
+    assert rows[:, 4].tolist() == [2, 2, 3, 3, 3, 4, 4, 4]
+    stats = ring.stats()
+    assert (stats['dropped'], stats['high_water'], stats['depth']) == (7, 8, 0)
+
+
+def test_drop_newest_and_oversized_block():
+    ring = SampleRing(8, 'drop_newest')
+    assert ring.put(make_block(0, 10, step=1.0), 0.0) == 2
+    assert ring.drain()[:, 0].tolist() == list(range(8))
+
+    ring = SampleRing(8, 'drop_oldest')
+    ring.put(make_block(0, 5, step=1.0), 0.0)
+    ring.drain()
+    # Bloque mayor que la capacidad y que da la vuelta al buffer
+    assert ring.put(make_block(100, 20, step=1.0), np.arange(20.0)) == 12
+    rows = ring.drain()
+    assert rows[:, 0].tolist() == list(range(112, 120))
+    assert rows[:, 4].tolist() == list(range(12, 20))
+
+
+def test_block_waits_for_consumer():
+    ring = SampleRing(16, 'block', block_timeout=0.01)
+    producer = threading.Thread(target=ring.put, args=(make_block(0, 100, step=1.0), 0.0))
+    producer.start()
+    received = []
+    while producer.is_alive() or len(ring):
+        received.append(ring.drain())
+    producer.join()
+    assert np.concatenate(received)[:, 0].tolist() == list(range(100))
+    assert ring.stats()['dropped'] == 0 and ring.stats()['high_water'] == 16
+
+
+def test_block_policy_requires_threads():
+    from core.imu.manager import SensorManager
+    cfg = [{'id': 'imu1', 'port': '/dev/null', 'overflow_policy': 'block'}]
+    # Se rechaza antes de abrir ningún puerto
+    for mode in ('selector', 'async'):
+        with pytest.raises(ValueError, match="requiere io_mode='threads'"):
+            SensorManager(cfg, io_mode=mode)
@@ -0,0 +1,32 @@
+# test_segment_buffer.py
+
+import numpy as np
+from core.segment_buffer import SegmentBuffer
+from conftest import make_block
+
+
+def test_grows_and_returns_views():
+    buf = SegmentBuffer(initial_capacity=4)
+    for k in range(5):
+        buf.append_block('imu1', make_block(3 * k, 3))
+    buf.append({'sensor_id': 'imu1', 'timestamp': 150.0, 'yaw': 1.0, 'pitch': 2.0, 'roll': 3.0})
+    cols = buf.columns()
+    assert len(buf) == 16
+    assert cols['sensor_id'] == 'imu1'
+    assert cols['timestamp'].tolist() == [10.0 * i for i in range(16)]
+    assert cols['roll'][-1] == 3.0 and cols['yaw'][:2].tolist() == [0.0, 0.1]
+    assert not cols['yaw'].flags.owndata          # vista, sin copia
+
+    # clear() no reutiliza la memoria de las vistas ya entregadas
+    buf.clear()
+    buf.append_block('imu1', make_block(100, 2))
+    assert cols['timestamp'][0] == 0.0 and len(buf) == 2
+
+
+def test_several_sensors_interleaved_by_timestamp():
+    buf = SegmentBuffer()
+    buf.append_block('imu1', make_block(0, 3))
+    buf.append_block('imu2', make_block(0, 3, offset=5.0))
+    cols = buf.columns()
+    assert cols['timestamp'].tolist() == [0, 5, 10, 15, 20, 25]
+    assert cols['sensor_id'].tolist() == ['imu1', 'imu2'] * 3
@@ -0,0 +1,57 @@
+# test_segmentation.py
+
+import numpy as np
+import pandas as pd
+from core.acquisition import DataRecorder
+from core.segmentation import RepSegmenter, segment_actions, validate
+
+
+def _stream():
+    # 1 s de reposo, 2 s girando el pitch a 90 °/s y 1 s de reposo (100 Hz)
+    t = np.arange(400) * 10.0
+    pitch = np.clip(t - 1000, 0, 2000) * 0.09
+    return np.column_stack((t, np.zeros(400), pitch, np.zeros(400)))
+
+
+def test_segmenter_start_and_stop():
+    seg = RepSegmenter()
+    stream = _stream()
+    events = []
+    for i in range(0, len(stream), 7):
+        events += seg.update(stream[i:i + 7])
+    assert [e[0] for e in events] == ['start', 'stop']
+    start, stop = events
+    assert 950 <= start[1] <= 1020 and start[2] > start[1]
+    assert 3000 <= stop[2] <= 3100 and stop[3] - stop[2] >= 200
+    assert not seg.active
+
+
+def test_short_movement_is_cancelled():
+    seg = RepSegmenter(min_duration=5.0)
+    kinds = [e[0] for e in seg.update(_stream())]
+    assert kinds == ['start', 'cancel']
+
+
+def test_auto_segment_recorder_trims_rest(tmp_path):
+    rec = DataRecorder(None, str(tmp_path / 'raw.csv'), str(tmp_path / 'lab.csv'))
+    seg = RepSegmenter()
+    stream = _stream()
+    for i in range(0, len(stream), 5):
+        block = stream[i:i + 5]
+        rec.add_block('imu1', block)
+        actions = segment_actions(seg.update(block), block[-1, 0])
+        rec.apply_segment_actions(actions, 'correcto')
+    rec.close()
+
+    ts = pd.read_csv(tmp_path / 'lab.csv')['timestamp']
+    # Empieza con el movimiento (pre-roll desde el inicio detectado) y
+    # acaba al empezar el reposo (con el retraso del suavizado), sin los
+    # 200 ms que costó detectarlo
+    assert 950 <= ts.iloc[0] <= 1020
+    assert 3000 <= ts.iloc[-1] <= 3100
+
+
+def test_validate_recorded_reps():
+    df = pd.read_csv('data/datos_ejercicio.csv')
+    result = validate(df)
+    assert result['recall'] == 1.0 and result['precision'] == 1.0
@@ -0,0 +1,64 @@
+# test_shm_ring.py
+
+import numpy as np
+from core.imu.shm_ring import SharedSampleRing
+
+
+def _rows(start, n):
+    return np.repeat(np.arange(start, start + n, dtype=np.float64)[:, None], 3, axis=1)
+
+
+def test_readers_wrap_and_overrun():
+    ring = SharedSampleRing.create(capacity=8, n_columns=3)
+    try:
+        other = SharedSampleRing.attach(ring.name)
+        fast, slow = other.reader(), ring.reader()
+
+        ring.write(_rows(0, 6))
+        assert fast.read_array()[:, 0].tolist() == list(range(6))
+        ring.write(_rows(6, 5))
+        # El rango nuevo da la vuelta: dos vistas sin copia
+        views = fast.read()
+        assert len(views) == 2 and np.shares_memory(views[0], other._data)
+        assert np.concatenate(views)[:, 0].tolist() == list(range(6, 11))
+        assert fast.still_valid() and fast.lost == 0
+
+        # El lector lento se ha quedado más de una vuelta atrás
+        assert slow.read_array()[:, 0].tolist() == list(range(3, 11))
+        assert slow.lost == 3
+
+        ring.write(_rows(11, 8))
+        assert not fast.still_valid()
+        del views
+        other.close()
+    finally:
+        ring.close()
+
+
+def test_gui_drops_rows_overwritten_during_copy():
+    from core.acquisition_process import ProcessCaptureController, RING_COLUMNS
+    ctrl = ProcessCaptureController([{'id': 'imu1'}], 'raw.csv', 'lab.csv')
+    ring = SharedSampleRing.create(capacity=8, n_columns=RING_COLUMNS)
+    try:
+        ctrl._reader = reader = ring.reader()
+        batches = []
+        ctrl.data_batch_ready.connect(batches.append)
+        ring.write(np.zeros((4, RING_COLUMNS)))
+        ctrl.poll()
+        assert len(batches) == 1 and reader.lost == 0
+
+        # El escritor da una vuelta entera mientras la GUI copia
+        read_array = reader.read_array
+
+        def lapped_read():
+            rows = read_array()
+            ring.write(np.ones((8, RING_COLUMNS)))
+            return rows
+
+        ring.write(np.zeros((4, RING_COLUMNS)))
+        reader.read_array = lapped_read
+        ctrl.poll()
+        assert len(batches) == 1 and reader.lost == 4
+        ctrl._reader = None
+    finally:
+        ring.close()
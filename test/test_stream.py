@@ -0,0 +1,104 @@
+# test_stream.py
+
+import asyncio
+import time
+import numpy as np
+from core.imu.manager import SensorManager
+
+N = 2000
+
+
+def _manager(tmp_path, speed=20, sensors=('imu1',), loop=False):
+    path = str(tmp_path / 'raw.csv')
+    with open(path, 'w') as f:
+        f.write("timestamp,sensor_id,yaw,pitch,roll\n")
+        for k in range(N):
+            for sid in sensors:
+                f.write(f"{1000 + 10 * k},{sid},{k * 0.5},{-k * 0.25},{k}\n")
+    cfgs = [{'id': sid, 'replay': path, 'source_id': sid, 'speed': speed, 'loop': loop}
+            for sid in sensors]
+    manager = SensorManager(cfgs, io_mode='async')
+    # Lo leído mientras se esperaba a los sensores ya está en su buffer
+    return manager, manager.read_all_arrays()
+
+
+def _collect(gen, until, timeout=10.0):
+    async def run():
+        batches = []
+        async for batch in gen:
+            batches.append((time.monotonic(), batch))
+            if until(batches):
+                break
+        await gen.aclose()
+        return batches
+    return asyncio.run(asyncio.wait_for(run(), timeout))
+
+
+def _count(batches, sid='imu1'):
+    return sum(len(b.get(sid, ())) for _, b in batches)
+
+
+def test_max_batch_splits_and_keeps_every_sample(tmp_path):
+    manager, first = _manager(tmp_path, sensors=('imu1', 'imu2'))
+    try:
+        done = lambda bs: all(_count(bs, s) + len(first[s]) >= N for s in first)
+        batches = _collect(manager.stream(max_batch=64), done)
+    finally:
+        manager.close_all()
+    assert all(sum(map(len, b.values())) <= 64 for _, b in batches)
+    for sid in first:
+        ts = np.concatenate([first[sid]] + [b[sid] for _, b in batches if sid in b])[:, 0]
+        assert np.array_equal(ts, 1000 + 10 * np.arange(N))
+
+
+def test_max_wait_flushes_partial_batches(tmp_path):
+    # 100 Hz en tiempo real: nunca se llega a max_batch
+    manager, _ = _manager(tmp_path, speed=1)
+    try:
+        start = time.monotonic()
+        batches = _collect(manager.stream(max_batch=1000, max_wait=0.05),
+                           lambda bs: len(bs) >= 6)
+    finally:
+        manager.close_all()
+    assert all(0 < len(b['imu1']) < 1000 for _, b in batches)
+    # Cada lote sale ~max_wait después de su primera muestra
+    gaps = np.diff([start] + [t for t, _ in batches])
+    assert gaps.max() < 0.5
+
+
+def test_backpressure_leaves_excess_in_port(tmp_path):
+    # Sin límite de velocidad y en bucle: siempre hay datos esperando
+    manager, _ = _manager(tmp_path, speed=0, loop=True)
+    ser = manager.sensors[0].ser
+
+    async def run():
+        gen = manager.stream(max_batch=50, max_pending=100)
+        first = await gen.__anext__()
+        # El consumidor no pide lotes: dejan de leerse los puertos
+        await asyncio.sleep(0.3)
+        waiting = ser.in_waiting
+        rest = [await gen.__anext__() for _ in range(3)]
+        await gen.aclose()
+        return first, waiting, rest
+
+    try:
+        first, waiting, rest = asyncio.run(asyncio.wait_for(run(), 10))
+    finally:
+        manager.close_all()
+    assert waiting > 0
+    assert all(len(b['imu1']) <= 50 for b in [first] + rest)
+
+
+def test_stream_ends_when_every_port_fails(tmp_path):
+    manager, _ = _manager(tmp_path, sensors=('imu1', 'imu2'))
+
+    def broken():
+        raise OSError("desconectado")
+
+    for sensor in manager.sensors:
+        sensor.read_block = broken
+    try:
+        batches = _collect(manager.stream(), lambda bs: False, timeout=5)
+    finally:
+        manager.close_all()
+    assert batches == []
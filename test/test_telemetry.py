@@ -0,0 +1,33 @@
+# test_telemetry.py
+
+import numpy as np
+from core.imu.telemetry import StreamTelemetry
+
+
+def test_rate_gaps_and_resets():
+    tel = StreamTelemetry(window=2.0)
+    ts = np.arange(0.0, 1000.0, 10.0)           # 100 Hz
+    ts[50:] += 40.0                             # hueco de 4 muestras
+    for i in range(0, len(ts), 2):
+        tel.update(i * 0.01, 54, ts[i:i + 2], parse_errors=1 if i == 10 else 0)
+    tel.update(1.0, 27, np.array([5.0]))        # reinicio del ESP32
+
+    stats = tel.stats(1.0)
+    assert stats['gaps'] == 1 and stats['lost_samples'] == 4
+    assert stats['clock_resets'] == 1 and stats['parse_errors'] == 1
+    assert stats['samples'] == 101
+    assert abs(stats['hz'] - 100) < 5
+    assert stats['interval_ms']['p50'] == 10.0 and stats['jitter_ms']['p50'] == 0.0
+
+
+def test_repeated_timestamps_do_not_fix_zero_period():
+    # Ráfagas con timestamps repetidos: mediana 0 en los primeros intervalos
+    tel = StreamTelemetry()
+    tel.update(0.0, 100, np.array([0.0] * 10 + [10.0, 10.0, 20.0]))
+    stats = tel.stats(0.0)
+    assert stats['gaps'] == 0 and stats['samples'] == 13
+
+    ts = np.arange(30.0, 400.0, 10.0)
+    ts[20:] += 30.0                             # hueco de 3 muestras
+    tel.update(0.1, 500, ts)
+    assert tel.stats(0.1)['gaps'] == 1
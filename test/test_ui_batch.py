@@ -0,0 +1,29 @@
+# test_ui_batch.py
+
+import threading
+import numpy as np
+from PyQt5.QtCore import QCoreApplication
+from core.ui_batch import SampleBatcher
+
+app = QCoreApplication.instance() or QCoreApplication([])
+
+
+def test_coalesces_blocks_from_worker_thread():
+    batcher = SampleBatcher(rate_hz=30)
+    batches = []
+    batcher.data_batch_ready.connect(batches.append)
+
+    def worker():
+        for k in range(10):
+            batcher.push('imu1', np.array([[k, 1.0, 2.0, 3.0]]))
+        batcher.push('imu2', np.array([[0, 4.0, 5.0, 6.0], [1, 4.0, 5.0, 6.0]]))
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    batcher.flush()
+    batcher.flush()           # sin datos nuevos no se emite nada
+
+    assert len(batches) == 1
+    assert batches[0]['imu1']['timestamp'].tolist() == list(range(10))
+    assert batches[0]['imu2']['roll'].tolist() == [6.0, 6.0]
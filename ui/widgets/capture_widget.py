@@ -6,12 +6,16 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import (
     QWidget, QPushButton, QComboBox, QLabel, QCheckBox,
-    QHBoxLayout, QVBoxLayout, QSpacerItem, QSizePolicy, QShortcut
+    QHBoxLayout, QVBoxLayout, QSpacerItem, QSizePolicy, QShortcut, QMessageBox
 )
 
 import config
 from core.acquisition import CaptureController
+from core.acquisition_process import ProcessCaptureController
+from core.recording import recording_path
+from core.segmentation import RepSegmenter
 from visualization.plot2d import Plot2DWidget
+from visualization.telemetry_panel import TelemetryPanel
 
 
 # from visualization.heatmap import HeatmapWidget     # cuando tengas listo el heatmap
@@ -22,14 +26,26 @@ class CaptureWidget(QWidget):
         super().__init__(parent)
 
         # Rutas de fichero
-        raw_path = os.path.join(config.DATA_FOLDER, config.CSV_RAW_FILENAME)
-        label_path = os.path.join(config.DATA_FOLDER, config.CSV_FILENAME)
-
-        # Controlador de captura
-        self.ctrl = CaptureController(
+        raw_path = recording_path(os.path.join(config.DATA_FOLDER, config.CSV_RAW_FILENAME),
+                                  config.RECORD_FORMAT)
+        label_path = recording_path(os.path.join(config.DATA_FOLDER, config.CSV_FILENAME),
+                                    config.RECORD_FORMAT)
+
+        # Controlador de captura (en este proceso o en uno aparte)
+        controller_cls = (ProcessCaptureController if config.ACQUISITION_MODE == "process"
+                          else CaptureController)
+        self.ctrl = controller_cls(
             sensor_configs=config.SENSORS,
             raw_filepath=raw_path,
-            labeled_filepath=label_path
+            labeled_filepath=label_path,
+            io_mode=config.SENSOR_IO_MODE,
+            fsync=config.RECORD_FSYNC,
+            codec=config.RECORD_CODEC,
+            raw_partition_s=config.RAW_PARTITION_S,
+            ui_rate_hz=config.UI_RATE_HZ,
+            pre_roll=config.PRE_ROLL_S,
+            post_roll=config.POST_ROLL_S,
+            segmenter=RepSegmenter(**config.SEGMENTER_PROFILES[config.SEGMENTER_PROFILE])
         )
 
         # — Controles principales—
@@ -49,12 +65,16 @@ class CaptureWidget(QWidget):
         self.btn_stop_segment.setEnabled(False)  # Inicialmente deshabilitado
         self.btn_start_segment.setToolTip("Iniciar Repetición (espacio)")
         self.btn_stop_segment.setToolTip("Detener Repetición (espacio)")
+        # Repeticiones detectadas solas por el movimiento, con la etiqueta elegida
+        self.auto_segment = QCheckBox("Segmentación automática")
+        self.auto_segment.setToolTip(
+            f"Detecta inicio y fin de cada repetición (perfil '{config.SEGMENTER_PROFILE}')")
 
         self.status_label = QLabel("Estado: Detenido")
         self.status_label.setAlignment(Qt.AlignCenter)
 
         # — Sub-widgets de visualización—
-        # Asumen métodos `update_data(reading: dict)`
+        # Asumen métodos `update_batch(columns: dict)` (o `update_data(reading: dict)`)
 
         # Layout donde irán los plots
         self.plot_layout = QHBoxLayout()
@@ -80,6 +100,7 @@ class CaptureWidget(QWidget):
         ctrl_layout.addWidget(self.label_combo)
         ctrl_layout.addWidget(self.btn_start_segment)
         ctrl_layout.addWidget(self.btn_stop_segment)
+        ctrl_layout.addWidget(self.auto_segment)
         ctrl_layout.addItem(QSpacerItem(20, 0, QSizePolicy.Expanding, QSizePolicy.Minimum))
         ctrl_layout.addWidget(self.status_label)
 
@@ -87,6 +108,10 @@ class CaptureWidget(QWidget):
         main_layout = QVBoxLayout()
         main_layout.addLayout(ctrl_layout)
 
+        # — Estado de los sensores (Hz, jitter, huecos, errores, cola)—
+        self.telemetry_panel = TelemetryPanel(self.ctrl.telemetry)
+        main_layout.addWidget(self.telemetry_panel)
+
         # — Layout de sub-widgets (2D, heatmap, 3D)—
         # todo sub_layout = QHBoxLayout()
         # sub_layout.addWidget(self.heatmap,    stretch=1)
@@ -115,13 +140,16 @@ class CaptureWidget(QWidget):
         # sc_stop.activated.connect(self.ctrl.stop_segment)
 
         # Actualiza los estados de los botones cuando cambia el estado
-        self.ctrl.data_ready.connect(self._on_data_ready)
+        self.ctrl.data_batch_ready.connect(self._on_data_batch)
         self.ctrl.recording_started.connect(self._on_recording_started)
         self.ctrl.recording_stopped.connect(self._on_recording_stopped)
         self.ctrl.segment_started.connect(self._on_segment_started)
         self.ctrl.segment_stopped.connect(self._on_segment_stopped)
+        self.ctrl.start_failed.connect(self._on_start_failed)
         self.record_raw_data.stateChanged.connect(self._on_raw_data_changed)
         self.ctrl.set_record_raw_data(self.record_raw_data.isChecked())
+        self.auto_segment.stateChanged.connect(self._on_auto_segment_changed)
+        self.label_combo.currentTextChanged.connect(self._on_auto_segment_changed)
 
     def _toggle_segment(self):
         """Alterna entre iniciar y detener la repetición"""
@@ -137,19 +165,23 @@ class CaptureWidget(QWidget):
         # self.record_raw_data = state
         self.ctrl.set_record_raw_data(self.record_raw_data.isChecked())
 
+    def _on_auto_segment_changed(self, *_):
+        """Activa la segmentación automática con la etiqueta actual."""
+        self.ctrl.set_auto_segment(self.auto_segment.isChecked(), self.label_combo.currentText())
+
     def _on_start_segment(self):
         label = self.label_combo.currentText()
         self.ctrl.start_segment(label)
 
-    def _on_data_ready(self, reading: dict):
+    def _on_data_batch(self, batch: dict):
         """
-        Lectura recibida:
-        - reading = {'sensor_id','rep_id', 'timestamp','yaw','pitch','roll',}
+        Lote de lecturas recibido (a config.UI_RATE_HZ):
+        - batch = {sensor_id: {'timestamp','yaw','pitch','roll': array}}
         """
-        sid = reading.get('sensor_id')
-        # Solo el Plot2DWidget con ese sensor_id recibirá update_data
-        if sid in self.plot2d_widgets:
-            self.plot2d_widgets[sid].update_data(reading)
+        # Cada Plot2DWidget recibe sólo el lote de su sensor_id
+        for sid, columns in batch.items():
+            if sid in self.plot2d_widgets:
+                self.plot2d_widgets[sid].update_batch(columns)
 
         # TODO Heatmap y 3D los puedes mantener igual (recibirán
         # todos los readings y filtrar internamente o agregarlos)
@@ -157,6 +189,7 @@ class CaptureWidget(QWidget):
         # self.renderer3d.update_data(reading)
 
     def _on_segment_started(self, label: str):
+        self._recording_segment = True   # también si la inició el segmentador
         self.update_btn_state({
             'btn_start': False,
             'btn_stop': False,
@@ -167,6 +200,7 @@ class CaptureWidget(QWidget):
         })
 
     def _on_segment_stopped(self):
+        self._recording_segment = False
         self.update_btn_state({
             'btn_start': False,
             'btn_stop': True,
@@ -186,6 +220,9 @@ class CaptureWidget(QWidget):
             'status_style': "color: blue;",
         })
 
+    def _on_start_failed(self, message: str):
+        QMessageBox.critical(self, "Error", f"No se pudo iniciar la captura:\n{message}")
+
     def _on_recording_stopped(self):
         self.update_btn_state({
             'btn_start': True,
@@ -5,12 +5,15 @@ import os
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import (
-    QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, QSpacerItem, QSizePolicy, QShortcut
+    QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, QSpacerItem, QSizePolicy, QShortcut,
+    QMessageBox, QCheckBox
 )
 
 import config
 from core.predictor import PredictorController
+from core.segmentation import RepSegmenter
 from visualization.plot2d import Plot2DWidget
+from visualization.telemetry_panel import TelemetryPanel
 
 
 class LiveWidget(QWidget):
@@ -32,6 +35,7 @@ class LiveWidget(QWidget):
 
         self.btn_start_segment.setToolTip("Iniciar Reconocimiento (espacio)")
         self.btn_stop_segment.setToolTip("Detener Reconocimiento (espacio)")
+        self.auto_segment = QCheckBox("Reconocimiento automático")
 
         # Layout de controles
         ctrl_layout = QHBoxLayout()
@@ -40,6 +44,7 @@ class LiveWidget(QWidget):
         ctrl_layout.addItem(QSpacerItem(20, 0, QSizePolicy.Expanding, QSizePolicy.Minimum))
         ctrl_layout.addWidget(self.btn_start_segment)
         ctrl_layout.addWidget(self.btn_stop_segment)
+        ctrl_layout.addWidget(self.auto_segment)
         ctrl_layout.addItem(QSpacerItem(20, 0, QSizePolicy.Expanding, QSizePolicy.Minimum))
         ctrl_layout.addWidget(self.status_label)
 
@@ -60,14 +65,24 @@ class LiveWidget(QWidget):
         # — Controller de predicción—
         self.ctrl = PredictorController(
             sensor_configs=config.SENSORS,
-            model_path=os.path.join(config.MODEL_PATH)
+            model_path=os.path.join(config.MODEL_PATH),
+            io_mode=config.SENSOR_IO_MODE,
+            ui_rate_hz=config.UI_RATE_HZ,
+            pre_roll=config.PRE_ROLL_S,
+            post_roll=config.POST_ROLL_S,
+            segmenter=RepSegmenter(**config.SEGMENTER_PROFILES[config.SEGMENTER_PROFILE])
         )
 
+        # — Estado de los sensores, entre los controles y los plots—
+        self.telemetry_panel = TelemetryPanel(self.ctrl.telemetry)
+        main.insertWidget(1, self.telemetry_panel)
+
         # Conexiones UI → Controller
         self.btn_start.clicked.connect(self.ctrl.start)
         self.btn_stop.clicked.connect(self.ctrl.stop)
         self.btn_start_segment.clicked.connect(self.ctrl.start_segment)
         self.btn_stop_segment.clicked.connect(self.ctrl.stop_segment)
+        self.auto_segment.toggled.connect(self.ctrl.set_auto_segment)
 
         # — Atajos de teclado —
         # Espacio = Alternar entre Iniciar/Detener repetición
@@ -76,12 +91,13 @@ class LiveWidget(QWidget):
         sc_toggle.activated.connect(self._toggle_segment)
 
         # Conexiones Controller → UI
-        self.ctrl.data_ready.connect(self._on_data_ready)
+        self.ctrl.data_batch_ready.connect(self._on_data_batch)
         self.ctrl.recording_started.connect(self._on_recording_started)
         self.ctrl.recording_stopped.connect(self._on_recording_stopped)
         self.ctrl.segment_started.connect(self._on_segment_started)
         self.ctrl.segment_stopped.connect(self._on_segment_stopped)
         self.ctrl.prediction_ready.connect(self._on_prediction_ready)
+        self.ctrl.start_failed.connect(self._on_start_failed)
 
     def _toggle_segment(self):
         """Alterna entre iniciar y detener la repetición"""
@@ -92,10 +108,10 @@ class LiveWidget(QWidget):
             self.ctrl.stop_segment()
             self._recording_segment = False
 
-    def _on_data_ready(self, reading: dict):
-        sid = reading.get('sensor_id')
-        if sid in self.plot2d_widgets:
-            self.plot2d_widgets[sid].update_data(reading)
+    def _on_data_batch(self, batch: dict):
+        for sid, columns in batch.items():
+            if sid in self.plot2d_widgets:
+                self.plot2d_widgets[sid].update_batch(columns)
 
     def _on_recording_started(self):
         self.btn_start.setEnabled(False)
@@ -104,6 +120,9 @@ class LiveWidget(QWidget):
         self.status_label.setText("Estado: Activo")
         self.status_label.setStyleSheet("color: blue;")
 
+    def _on_start_failed(self, message: str):
+        QMessageBox.critical(self, "Error", f"No se pudieron iniciar los sensores:\n{message}")
+
     def _on_recording_stopped(self):
         self.btn_start.setEnabled(True)
         self.btn_stop.setEnabled(False)
@@ -113,6 +132,7 @@ class LiveWidget(QWidget):
         self.status_label.setStyleSheet("color: black;")
 
     def _on_segment_started(self):
+        self._recording_segment = True   # también si la inició el segmentador
         self.btn_start.setEnabled(False)
         self.btn_stop.setEnabled(False)
         self.btn_start_segment.setEnabled(False)
@@ -121,6 +141,7 @@ class LiveWidget(QWidget):
         self.status_label.setStyleSheet("color: green;")
 
     def _on_segment_stopped(self):
+        self._recording_segment = False
         self.btn_stop_segment.setEnabled(False)
         self.btn_start.setEnabled(False)
         self.btn_stop.setEnabled(True)
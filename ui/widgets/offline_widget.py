@@ -1,14 +1,17 @@
 # ui/widgets/offline_widget.py
 
 import os
-import pandas as pd
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLabel, QMessageBox
+    QPushButton, QLabel, QMessageBox, QComboBox
 )
 from PyQt5.QtCore import Qt
 import pyqtgraph as pg
 import config
+from core.recording import recording_path
+from core.catalog import RepCatalog, load_reps
+
+ALL_LABELS = "Todas"
 
 class OfflineWidget(QWidget):
     def __init__(self, parent=None):
@@ -16,7 +19,9 @@ class OfflineWidget(QWidget):
 
         # Indicador de si los datos ya se han cargado
         self._data_loaded = False
-        self._reps = []
+        self._path = None
+        self._catalog = None
+        self._reps = []     # entradas del catálogo (sólo metadatos)
         self._idx = 0
 
         # — 1) Creamos la UI base sin datos—
@@ -37,11 +42,15 @@ class OfflineWidget(QWidget):
         self.btn_next = QPushButton("Siguiente")
         self.btn_prev.clicked.connect(self.prev)
         self.btn_next.clicked.connect(self.next)
+        # Filtro por etiqueta (del catálogo)
+        self.label_filter = QComboBox()
+        self.label_filter.currentTextChanged.connect(self._on_filter_changed)
         # Deshabilitamos la navegación hasta cargar datos
         self.btn_prev.setEnabled(False)
         self.btn_next.setEnabled(False)
 
         nav_layout = QHBoxLayout()
+        nav_layout.addWidget(self.label_filter)
         nav_layout.addWidget(self.btn_prev)
         nav_layout.addWidget(self.btn_next)
         nav_layout.setAlignment(Qt.AlignCenter)
@@ -62,71 +71,74 @@ class OfflineWidget(QWidget):
 
     def load_data(self):
         """
-        Carga y valida el CSV, agrupa por rep_id y despliega la primera repetición.
-        Muestra errores con QMessageBox en caso de fallo.
+        Abre el catálogo de repeticiones del CSV (sin leer los datos) y
+        despliega la primera. Muestra errores con QMessageBox en caso de fallo.
         """
-        csv_path = os.path.join(config.DATA_FOLDER, config.CSV_FILENAME)
+        csv_path = recording_path(os.path.join(config.DATA_FOLDER, config.CSV_FILENAME),
+                                  config.RECORD_FORMAT)
         if not os.path.exists(csv_path):
             QMessageBox.critical(self, "Error", f"No se encuentra el archivo CSV:\n{csv_path}")
             return
 
         try:
-            df = pd.read_csv(csv_path)
-            if df.empty:
-                QMessageBox.warning(self, "Advertencia", "El archivo CSV está vacío")
-                return
+            catalog = RepCatalog.open(csv_path)
+            labels = catalog.labels()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"No se pudo leer el CSV:\n{e}")
             return
-
-        # Aceptar 'etiqueta' o 'label'
-        if 'etiqueta' in df.columns and 'label' not in df.columns:
-            df = df.rename(columns={'etiqueta': 'label'})
-
-        required = {'rep_id', 'timestamp', 'yaw', 'pitch', 'roll', 'label'}
-        miss = required - set(df.columns)
-        if miss:
-            QMessageBox.critical(self, "Error", f"Faltan columnas en CSV:\n{miss}")
-            return
-
-        # Agrupamos por rep_id
-        grouped = df.groupby('rep_id')
-        self._reps = [(rid, grp) for rid, grp in grouped]
-        if not self._reps:
+        if not labels:
             QMessageBox.information(self, "Info", "No hay repeticiones en el CSV")
+            catalog.close()
             return
 
         # Datos listos: activamos navegación y pintamos la primera
+        self._path = csv_path
+        self._catalog = catalog
         self._data_loaded = True
-        self.btn_prev.setEnabled(True)
-        self.btn_next.setEnabled(True)
+        self.label_filter.blockSignals(True)
+        self.label_filter.clear()
+        self.label_filter.addItems([ALL_LABELS] + list(labels))
+        self.label_filter.blockSignals(False)
+        self._on_filter_changed(ALL_LABELS)
+
+    def _on_filter_changed(self, text: str):
+        """Lista (del catálogo) las repeticiones con la etiqueta elegida."""
+        if self._catalog is None:
+            return
+        self._reps = self._catalog.reps(label=None if text == ALL_LABELS else text)
+        self.btn_prev.setEnabled(bool(self._reps))
+        self.btn_next.setEnabled(bool(self._reps))
         self._idx = 0
-        self._update_plot()
+        if self._reps:
+            self._update_plot()
 
     def _update_plot(self):
         """
-        Dibuja en la gráfica la repetición self._idx de self._reps.
+        Dibuja en la gráfica la repetición self._idx de self._reps, leyendo
+        sólo sus bytes del fichero.
         """
-        rep_id, grp = self._reps[self._idx]
-        label = grp['label'].iloc[0]
+        entry = self._reps[self._idx]
+        grp, = load_reps(self._path, [entry])
         t0 = grp['timestamp'].iloc[0]
         tiempo = grp['timestamp'] - t0
 
-        self._lbl_title.setText(f"Repetición {rep_id} — {label}")
+        session = f", sesión {entry['session_id']}" if entry['session_id'] is not None else ""
+        self._lbl_title.setText(f"Repetición {entry['rep_id']} — {entry['label']}{session} "
+                                f"({self._idx + 1}/{len(self._reps)})")
 
         for key, curve in self._curves.items():
             curve.setData(tiempo.values, grp[key].values)
 
     def prev(self):
         """Navegar a la repetición anterior."""
-        if not self._data_loaded:
+        if not self._data_loaded or not self._reps:
             return
         self._idx = (self._idx - 1) % len(self._reps)
         self._update_plot()
 
     def next(self):
         """Navegar a la repetición siguiente."""
-        if not self._data_loaded:
+        if not self._data_loaded or not self._reps:
             return
         self._idx = (self._idx + 1) % len(self._reps)
         self._update_plot()
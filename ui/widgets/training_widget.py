@@ -19,7 +19,7 @@ from sklearn.svm import SVC
 from sklearn.tree import DecisionTreeClassifier
 
 import config
-from core.features import extract_features
+from core.recording import recording_path
 from core.training import TrainingController
 
 
@@ -332,7 +332,8 @@ class TrainingWidget(QWidget):
         main.addWidget(self.log_area, stretch=1)
 
         # Preparar controller
-        csv_path = os.path.join(config.DATA_FOLDER, config.CSV_FILENAME)
+        csv_path = recording_path(os.path.join(config.DATA_FOLDER, config.CSV_FILENAME),
+                                  config.RECORD_FORMAT)
         model_path = config.MODEL_PATH
         algos = {
             "SVM (lineal)": SVC(kernel="linear", probability=True, random_state=42),
@@ -342,7 +343,12 @@ class TrainingWidget(QWidget):
         self.ctrl = TrainingController(
             csv_path=csv_path,
             model_output_path=model_path,
-            algorithms=algos
+            algorithms=algos,
+            feature_cache=config.FEATURE_CACHE_PATH,
+            feature_cache_size=config.FEATURE_CACHE_SIZE,
+            feature_workers=config.FEATURE_WORKERS,
+            feature_selection=config.FEATURE_SELECTION,
+            n_features=config.FEATURE_SELECT_K
         )
         self.ctrl.log.connect(self._append_log)
         self.ctrl.finished.connect(self._on_finished)
@@ -361,16 +367,9 @@ class TrainingWidget(QWidget):
             self.log_area.append("→ No hay resultados.")
             return
 
-        # Obtener X,y para scatter y clases
-        df = pd.read_csv(os.path.join(config.DATA_FOLDER, config.CSV_FILENAME))
-        if 'etiqueta' in df.columns and 'label' not in df.columns:
-            df = df.rename(columns={'etiqueta': 'label'})
-        feats, labels = [], []
-        for _, grp in df.groupby('rep_id'):
-            feats.append(extract_features(grp))
-            labels.append(grp['label'].iloc[0])
-        X = pd.DataFrame(feats)
-        y = pd.Series(labels)
+        # X,y del entrenamiento para scatter y clases (sin recalcular features)
+        info = next(iter(results.values()))
+        X, y = info['X'], info['y']
         classes = sorted(y.unique())
 
         # Preparar matrices para todos los algoritmos
@@ -66,7 +66,27 @@ class Plot2DWidget(pg.PlotWidget):
 
         # Avanzamos puntero (circular)
         self._ptr = (self._ptr + 1) % self.window_size
+        self._redraw()
 
+    def update_batch(self, columns: dict):
+        """
+        Añade un lote de muestras de este sensor y repinta una sola vez.
+        :param columns: {'yaw','pitch','roll',...: array} (ver SampleBatcher)
+        """
+        n = len(columns['yaw'])
+        if not n:
+            return
+        w = self.window_size
+        # Del lote sólo caben en pantalla las últimas window_size muestras
+        skip = max(0, n - w)
+        start = (self._ptr + skip) % w
+        idx = (start + np.arange(n - skip)) % w
+        for key in ('yaw', 'pitch', 'roll'):
+            self._data[key][idx] = columns[key][skip:]
+        self._ptr = (self._ptr + n) % w
+        self._redraw()
+
+    def _redraw(self):
         # Para cada curva, extraemos la ventana deslizante en orden
         rolled_x = self._x  # eje X siempre 0…N−1
         for key, curve in self.curves.items():
@@ -0,0 +1,64 @@
+# visualization/telemetry_panel.py
+
+from typing import Callable, Dict
+from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView
+
+COLUMNS = [
+    "Sensor", "Hz", "KB/s", "Intervalo p50/p99 (ms)", "Jitter p95/p99 (ms)",
+    "Huecos (perdidas)", "Errores parseo/framing", "Cola (máx)", "Descartes",
+]
+
+
+class TelemetryPanel(QTableWidget):
+    """
+    Tabla de estado en vivo de los sensores (una fila por IMU), refrescada
+    con un QTimer a partir de `source()` → {sensor_id: telemetría}, p.ej.
+    CaptureController.telemetry.
+    """
+
+    def __init__(self, source: Callable[[], Dict[str, dict]], interval_ms: int = 1000, parent=None):
+        """
+        :param source: función que devuelve la telemetría por sensor
+        :param interval_ms: periodo de refresco
+        """
+        super().__init__(0, len(COLUMNS), parent)
+        self.source = source
+        self.setHorizontalHeaderLabels(COLUMNS)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.verticalHeader().setVisible(False)
+        self.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.setSelectionMode(QTableWidget.NoSelection)
+        self.setMaximumHeight(120)
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start(interval_ms)
+
+    @staticmethod
+    def _row(sensor_id: str, t: dict) -> list:
+        interval, jitter = t.get('interval_ms'), t.get('jitter_ms')
+        return [
+            sensor_id,
+            f"{t['hz']:.1f}",
+            f"{t['bytes_per_s'] / 1024:.1f}",
+            f"{interval['p50']:.1f} / {interval['p99']:.1f}" if interval else "-",
+            f"{jitter['p95']:.1f} / {jitter['p99']:.1f}" if jitter else "-",
+            f"{t['gaps']} ({t['lost_samples']})",
+            f"{t['parse_errors']} / {t['framing_errors']}",
+            f"{t['queue_depth']} ({t['queue_high_water']})",
+            f"{t['queue_dropped']}",
+        ]
+
+    def refresh(self):
+        """Vuelve a leer la telemetría y actualiza la tabla."""
+        data = self.source() or {}
+        self.setRowCount(len(data))
+        for r, (sensor_id, t) in enumerate(data.items()):
+            for c, text in enumerate(self._row(sensor_id, t)):
+                item = self.item(r, c)
+                if item is None:
+                    item = QTableWidgetItem()
+                    item.setTextAlignment(Qt.AlignCenter)
+                    self.setItem(r, c, item)
+                item.setText(text)